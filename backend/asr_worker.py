@@ -0,0 +1,21 @@
+"""
+Code that runs inside the parallel ASR worker processes.
+
+Workers unpickle their tasks by importing this module, so it only imports what decoding
+needs. Nothing here may import server, transcript_gen or anything else that loads app
+state, or every worker would load it again.
+"""
+
+_model = None
+
+
+def init_worker(model_size, compute_type, cpu_threads):
+    global _model
+    from faster_whisper import WhisperModel
+    _model = WhisperModel(model_size, device="cpu", compute_type=compute_type, cpu_threads=cpu_threads)
+
+
+def transcribe_chunk(audio_chunk, offset, transcribe_kwargs):
+    """Returns (start, end, text) with timestamps shifted to the full file."""
+    segments, _info = _model.transcribe(audio_chunk, **transcribe_kwargs)
+    return [(offset + s.start, offset + s.end, s.text.strip()) for s in segments if s.text.strip()]
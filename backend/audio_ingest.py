@@ -0,0 +1,162 @@
+import os, json, time, uuid, wave, shutil, threading, subprocess
+import numpy as np
+import soundfile as sf
+import librosa
+
+INGEST_SAMPLE_RATE = 16000
+INGEST_BLOCK_SIZE = 1 << 20  # bytes copied into the decoder per write
+PCM_READ_SIZE = 1 << 16
+# Containers that may keep their index at the end of the file, so ffmpeg needs to seek
+SEEKABLE_FORMATS = {".mp4", ".m4a", ".mov", ".3gp", ".aac"}
+
+
+def manifest_path(audio_path):
+    return os.path.splitext(audio_path)[0] + ".manifest.json"
+
+
+def read_manifest(audio_path):
+    """Return the ingest manifest for an artifact, or None if the file wasn't produced by ingest."""
+    path = manifest_path(audio_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_manifest(manifest):
+    tmp_path = manifest_path(manifest["path"]) + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path(manifest["path"]))
+
+
+def audio_duration(audio_path):
+    manifest = read_manifest(audio_path)
+    if manifest:
+        return manifest["duration"]
+    return sf.info(audio_path).duration
+
+
+def load_pcm(audio_path, sample_rate=INGEST_SAMPLE_RATE):
+    """
+    Mono float32 samples at `sample_rate`. Ingested artifacts are already in that format and
+    are read directly; anything else is decoded (and resampled) through librosa.
+    """
+    manifest = read_manifest(audio_path)
+    if manifest and manifest["sample_rate"] == sample_rate:
+        audio, _ = sf.read(audio_path, dtype="float32")
+        return audio
+    audio, _ = librosa.load(audio_path, sr=sample_rate, mono=True)
+    return np.ascontiguousarray(audio, dtype=np.float32)
+
+
+def _feed(stream, stdin, counter):
+    """Copy the upload into ffmpeg's stdin without holding more than one block in memory."""
+    try:
+        for block in iter(lambda: stream.read(INGEST_BLOCK_SIZE), b""):
+            counter[0] += len(block)
+            stdin.write(block)
+    except (BrokenPipeError, OSError) as e:
+        print(f"Decoder stopped reading input: {e}")
+    finally:
+        try:
+            stdin.close()
+        except OSError:
+            pass
+
+
+def _drain(pipe, lines):
+    lines.extend(pipe.read().decode(errors="replace").splitlines())
+
+
+def ingest_stream(stream, filename, dest_dir, on_pcm=None):
+    """
+    Decode an uploaded recording in a single pass into the canonical artifact every later
+    stage uses: 16 kHz mono 16-bit PCM WAV, plus a manifest (<name>.manifest.json) with its
+    duration and source format.
+
+    The upload is piped straight into ffmpeg while the decoded PCM is written out, so the
+    original is never stored. Containers that need seeking (mp4/m4a/...) are spooled to
+    disk first. `on_pcm(bytes)` is called with each block of decoded samples.
+    Returns the manifest.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    stem, ext = os.path.splitext(os.path.basename(filename))
+    ext = ext.lower()
+    artifact_id = f"{stem}_{uuid.uuid4().hex[:8]}"
+    wav_path = os.path.join(dest_dir, f"{artifact_id}.wav")
+    start_time = time.time()
+
+    spool_path = None
+    if ext in SEEKABLE_FORMATS:
+        spool_path = os.path.join(dest_dir, f".{artifact_id}{ext}")
+        with open(spool_path, "wb") as f:
+            shutil.copyfileobj(stream, f, INGEST_BLOCK_SIZE)
+        source = spool_path
+    else:
+        source = "pipe:0"
+
+    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-i", source, "-vn",
+           "-ac", "1", "-ar", str(INGEST_SAMPLE_RATE), "-f", "s16le", "-acodec", "pcm_s16le", "pipe:1"]
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE if spool_path is None else subprocess.DEVNULL,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    bytes_in = [os.path.getsize(spool_path) if spool_path else 0]
+    stderr_lines = []
+    threads = [threading.Thread(target=_drain, args=(proc.stderr, stderr_lines))]
+    if spool_path is None:
+        threads.append(threading.Thread(target=_feed, args=(stream, proc.stdin, bytes_in)))
+    for thread in threads:
+        thread.start()
+
+    frames = 0
+    try:
+        with wave.open(wav_path, "wb") as out:
+            out.setnchannels(1)
+            out.setsampwidth(2)
+            out.setframerate(INGEST_SAMPLE_RATE)
+            for block in iter(lambda: proc.stdout.read(PCM_READ_SIZE), b""):
+                out.writeframesraw(block)
+                frames += len(block) // 2
+                if on_pcm:
+                    on_pcm(block)
+        proc.wait()
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        for thread in threads:
+            thread.join()
+        if spool_path and os.path.exists(spool_path):
+            os.remove(spool_path)
+
+    if proc.returncode != 0 or frames == 0:
+        os.remove(wav_path)
+        raise RuntimeError(f"Failed to decode {filename}: {' '.join(stderr_lines[-3:]) or 'no audio'}")
+
+    manifest = {
+        "id": artifact_id,
+        "path": wav_path,
+        "source_filename": filename,
+        "source_format": ext.lstrip("."),
+        "source_bytes": bytes_in[0],
+        "sample_rate": INGEST_SAMPLE_RATE,
+        "channels": 1,
+        "sample_format": "s16",
+        "frames": frames,
+        "duration": frames / INGEST_SAMPLE_RATE,
+        "decode_seconds": time.time() - start_time,
+        "created_at": time.time()
+    }
+    write_manifest(manifest)
+    print(f"Ingested {filename}: {manifest['duration']:.1f}s in {manifest['decode_seconds']:.1f}s")
+    return manifest
+
+
+def find_artifact(artifact_id, search_dirs):
+    """Locate a previously ingested artifact by id. Returns its manifest or None."""
+    if not artifact_id or os.path.basename(artifact_id) != artifact_id:
+        return None
+    for directory in search_dirs:
+        manifest = read_manifest(os.path.join(directory, f"{artifact_id}.wav"))
+        if manifest:
+            return manifest
+    return None
@@ -0,0 +1,105 @@
+"""
+Compares the meeting index types on recall and query latency, to pick thresholds for
+MEETING_INDEX_TYPE=auto.
+
+    python benchmark_index.py                       # synthetic clustered vectors
+    python benchmark_index.py --n 1000000 --k 5
+    python benchmark_index.py --index-dir meeting_index   # real vectors from the vector store
+
+Exact (flat) search gives the ground truth. For each type the report shows recall@k
+against it, mean and p95 single-query latency, build time and the serialized index size.
+"""
+import os, sys, time, argparse, tempfile
+import numpy as np
+import faiss
+from embedding_service import INDEX_TYPES, VectorStore, make_index, train_index
+from meeting_index import VECTORS_FILE, REBUILD_BATCH
+
+
+def synthetic_store(path, n, dim, seed=0):
+    """Clustered unit vectors, roughly how sentence embeddings of related chunks spread."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(1, n // 500), dim)).astype(np.float32)
+    store = VectorStore(path, dim)
+    for start in range(0, n, REBUILD_BATCH):
+        count = min(REBUILD_BATCH, n - start)
+        vectors = centers[rng.integers(len(centers), size=count)] + 0.5 * rng.standard_normal((count, dim)).astype(np.float32)
+        faiss.normalize_L2(vectors)
+        store.write(start, vectors)
+    return store
+
+
+def index_size(index):
+    return len(faiss.serialize_index(index))
+
+
+def benchmark(kind, store, ids, queries, k, truth):
+    started = time.time()
+    index = make_index(kind, store.dim, len(ids))
+    train_index(index, store, ids)
+    for start in range(0, len(ids), REBUILD_BATCH):
+        batch = ids[start:start + REBUILD_BATCH]
+        index.add_with_ids(store.read(batch), batch)
+    build_seconds = time.time() - started
+
+    latencies, found = [], []
+    for query in queries:
+        started = time.perf_counter()
+        _, I = index.search(query[None, :], k)
+        latencies.append(time.perf_counter() - started)
+        found.append(I[0])
+    if truth is None:
+        truth = found  # this is the exact run
+    recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+    return found, {
+        "type": kind,
+        "recall": recall,
+        "mean_ms": 1000 * np.mean(latencies),
+        "p95_ms": 1000 * np.percentile(latencies, 95),
+        "build_s": build_seconds,
+        "size_mb": index_size(index) / 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--index-dir", help="benchmark on the vectors in this meeting index instead")
+    parser.add_argument("--types", default=",".join(INDEX_TYPES))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.index_dir:
+            store = VectorStore(os.path.join(args.index_dir, VECTORS_FILE), args.dim)
+        else:
+            store = synthetic_store(os.path.join(tmp, VECTORS_FILE), args.n, args.dim)
+        ids = np.arange(store.rows, dtype=np.int64)
+        if not len(ids):
+            print("No vectors to benchmark")
+            return 1
+
+        # Queries are perturbed stored vectors, so each has real near neighbours
+        rng = np.random.default_rng(1)
+        queries = store.read(np.sort(rng.choice(ids, min(args.queries, len(ids)), replace=False)))
+        queries += 0.1 * rng.standard_normal(queries.shape).astype(np.float32)
+        faiss.normalize_L2(queries)
+        print(f"{len(ids)} vectors of dim {store.dim}, {len(queries)} queries, k={args.k}\n")
+
+        results, truth = [], None
+        for kind in ["flat"] + [t for t in args.types.split(",") if t != "flat"]:
+            found, result = benchmark(kind, store, ids, queries, args.k, truth)
+            if kind == "flat":
+                truth = found
+            results.append(result)
+
+    print(f"{'type':<8}{'recall@' + str(args.k):>10}{'mean ms':>10}{'p95 ms':>10}{'build s':>10}{'size MB':>10}")
+    for r in results:
+        print(f"{r['type']:<8}{r['recall']:>10.3f}{r['mean_ms']:>10.3f}{r['p95_ms']:>10.3f}"
+              f"{r['build_s']:>10.1f}{r['size_mb']:>10.1f}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
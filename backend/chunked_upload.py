@@ -0,0 +1,250 @@
+import os, time, uuid, shutil, threading
+import numpy as np
+from audio_ingest import ingest_stream, write_manifest, manifest_path, INGEST_SAMPLE_RATE
+from vad import EnergyVAD
+
+UPLOAD_PARTS_DIR = os.getenv("UPLOAD_PARTS_DIR", "upload_parts")
+UPLOAD_PART_SIZE = int(os.getenv("UPLOAD_PART_SIZE", 8 << 20))  # suggested to clients
+UPLOAD_MAX_PART_BYTES = int(os.getenv("UPLOAD_MAX_PART_BYTES", 64 << 20))
+UPLOAD_MAX_PARTS = int(os.getenv("UPLOAD_MAX_PARTS", 10000))
+UPLOAD_RETENTION_SECONDS = int(os.getenv("UPLOAD_RETENTION_SECONDS", 6 * 3600))
+COPY_BLOCK_SIZE = 1 << 20
+
+
+class UploadError(Exception):
+    pass
+
+
+class ChunkedUpload:
+    """
+    One resumable upload. Parts are numbered from 0 and may arrive in any order (and be
+    re-sent); each is written to disk in fixed-size blocks, so memory stays bounded
+    whatever the part size. A decoder thread starts immediately and reads the parts in
+    order as soon as they are contiguous, piping them through the normal single-pass
+    ingest, so decoding and speech detection overlap with the rest of the upload.
+    Parts are deleted once decoded.
+    """
+
+    def __init__(self, filename, dest_dir, parts_root=UPLOAD_PARTS_DIR):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.dest_dir = dest_dir
+        self.part_dir = os.path.join(parts_root, self.id)
+        os.makedirs(self.part_dir, exist_ok=True)
+        self.received = set()
+        self.total_parts = None
+        self.next_part = 0  # next part the decoder will read
+        self.aborted = False
+        self.cond = threading.Condition()
+        self.current = None
+        self.manifest = None
+        self.error = None
+        self.job_id = None  # transcription job started by complete()
+        self.vad = EnergyVAD(INGEST_SAMPLE_RATE)
+        self.speech_regions = []
+        self.decoded_frames = 0
+        self.pcm_tail = b""
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.done = threading.Event()
+        self.decoder = threading.Thread(target=self._decode, name=f"upload-{self.id[:8]}", daemon=True)
+        self.decoder.start()
+
+    def part_path(self, number):
+        return os.path.join(self.part_dir, f"{number:06d}.part")
+
+    @property
+    def status(self):
+        if self.aborted:
+            return "aborted"
+        if self.error:
+            return "failed"
+        if self.manifest:
+            return "ready"
+        return "receiving" if self.total_parts is None else "decoding"
+
+    def write_part(self, number, stream):
+        """Store one part from a file-like body. Returns the number of bytes written."""
+        with self.cond:
+            if self.aborted or self.error:
+                raise UploadError(f"Upload is {self.status}")
+            if not 0 <= number < UPLOAD_MAX_PARTS:
+                raise UploadError(f"Part numbers run from 0 to {UPLOAD_MAX_PARTS - 1}")
+            if self.total_parts is not None and number >= self.total_parts:
+                raise UploadError(f"Part {number} is beyond the completed upload ({self.total_parts} parts)")
+            if number < self.next_part:
+                return 0  # already decoded, the client is just retrying
+
+        path = self.part_path(number)
+        tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        written = 0
+        try:
+            with open(tmp_path, "wb") as f:
+                for block in iter(lambda: stream.read(COPY_BLOCK_SIZE), b""):
+                    written += len(block)
+                    if written > UPLOAD_MAX_PART_BYTES:
+                        raise UploadError(f"Part exceeds {UPLOAD_MAX_PART_BYTES} bytes")
+                    f.write(block)
+            if written == 0:
+                raise UploadError("Empty part")
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        with self.cond:
+            self.received.add(number)
+            self.updated_at = time.time()
+            self.cond.notify_all()
+        return written
+
+    def complete(self, total_parts, start_job):
+        """
+        Mark all `total_parts` parts received and start the upload's job with start_job(),
+        which returns the job id. A repeated complete (a client retrying after a lost
+        response) returns the job already started instead of starting another.
+        """
+        with self.cond:
+            if self.job_id is not None:
+                if total_parts != self.total_parts:
+                    raise UploadError(f"Upload was already completed with {self.total_parts} parts")
+                return self.job_id
+            if self.aborted or self.error:
+                raise UploadError(f"Upload is {self.status}")
+            if not 1 <= total_parts <= UPLOAD_MAX_PARTS:
+                raise UploadError(f"total_parts must be between 1 and {UPLOAD_MAX_PARTS}")
+            if self.total_parts is not None and total_parts != self.total_parts:
+                raise UploadError(f"Upload was already completed with {self.total_parts} parts")
+            missing = sorted(set(range(total_parts)) - self.received)
+            if missing:
+                raise UploadError(f"Missing parts: {missing[:20]}")
+            self.total_parts = total_parts
+            self.updated_at = time.time()
+            self.cond.notify_all()
+            # Under the lock, so concurrent completes can't both start one; if it fails
+            # (e.g. the job queue is full) the next complete tries again
+            self.job_id = start_job()
+            return self.job_id
+
+    def abort(self):
+        with self.cond:
+            self.aborted = True
+            self.cond.notify_all()
+
+    def read(self, size=-1):
+        """File-like read for the decoder: blocks until the next part arrives, b"" at the end."""
+        while True:
+            if self.current is None:
+                with self.cond:
+                    while not self.aborted:
+                        if self.total_parts is not None and self.next_part >= self.total_parts:
+                            return b""
+                        if self.next_part in self.received:
+                            break
+                        self.cond.wait(1.0)
+                    else:
+                        return b""
+                    self.current = open(self.part_path(self.next_part), "rb")
+            data = self.current.read(size if size and size > 0 else COPY_BLOCK_SIZE)
+            if data:
+                return data
+            self.current.close()
+            self.current = None
+            with self.cond:
+                os.remove(self.part_path(self.next_part))
+                self.next_part += 1
+
+    def _on_pcm(self, block):
+        block = self.pcm_tail + block
+        usable = len(block) - len(block) % 2
+        self.pcm_tail = block[usable:]
+        samples = np.frombuffer(block[:usable], dtype=np.int16).astype(np.float32) / 32768.0
+        self.speech_regions.extend(self.vad.process(samples))
+        self.decoded_frames += len(samples)
+
+    def _decode(self):
+        try:
+            manifest = ingest_stream(self, self.filename, self.dest_dir, on_pcm=self._on_pcm)
+            if self.aborted:
+                os.remove(manifest["path"])
+                os.remove(manifest_path(manifest["path"]))
+                return
+            self.speech_regions.extend(self.vad.flush())
+            manifest["upload_id"] = self.id
+            manifest["speech_regions"] = [[round(start, 2), round(end, 2)] for start, end in self.speech_regions]
+            manifest["speech_seconds"] = sum(end - start for start, end in self.speech_regions)
+            write_manifest(manifest)
+            self.manifest = manifest
+        except Exception as e:
+            print(f"Upload {self.id} failed to decode: {e}")
+            self.error = str(e)
+        finally:
+            if self.current is not None:
+                self.current.close()
+            shutil.rmtree(self.part_dir, ignore_errors=True)
+            self.updated_at = time.time()
+            self.done.set()
+
+    def wait(self, on_stage=None):
+        """Block until the tail of the upload is decoded; returns the artifact manifest."""
+        while not self.done.wait(1.0):
+            if on_stage:
+                on_stage("preparing")
+        if self.manifest is None:
+            raise RuntimeError(self.error or f"Upload {self.id} was {self.status}")
+        return self.manifest
+
+    def to_dict(self):
+        with self.cond:
+            received = sorted(self.received)
+        speech_seconds = sum(end - start for start, end in self.speech_regions)
+        return {
+            "upload_id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "part_size": UPLOAD_PART_SIZE,
+            "max_parts": UPLOAD_MAX_PARTS,
+            "received_parts": received,
+            "total_parts": self.total_parts,
+            "decoded_seconds": self.decoded_frames / INGEST_SAMPLE_RATE,
+            "speech_seconds": speech_seconds,
+            "artifact_id": self.manifest["id"] if self.manifest else None,
+            "job_id": self.job_id,
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at
+        }
+
+
+class UploadManager:
+    """In-process registry of uploads; stale or finished uploads are dropped after the retention period."""
+
+    def __init__(self, parts_root=UPLOAD_PARTS_DIR, retention_seconds=UPLOAD_RETENTION_SECONDS):
+        self.parts_root = parts_root
+        self.retention_seconds = retention_seconds
+        self.uploads = {}
+        self.lock = threading.Lock()
+
+    def create(self, filename, dest_dir):
+        with self.lock:
+            self._prune()
+            upload = ChunkedUpload(filename, dest_dir, self.parts_root)
+            self.uploads[upload.id] = upload
+        print(f"Upload {upload.id} started for {filename}")
+        return upload
+
+    def get(self, upload_id):
+        with self.lock:
+            return self.uploads.get(upload_id)
+
+    def abort(self, upload_id):
+        with self.lock:
+            upload = self.uploads.pop(upload_id, None)
+        if upload is not None:
+            upload.abort()
+        return upload
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        for upload_id in [u.id for u in self.uploads.values() if u.updated_at < cutoff]:
+            self.uploads.pop(upload_id).abort()
@@ -2,26 +2,64 @@ import numpy as np
 import sounddevice as sd
 import soundfile as sf
 import os, time
+import time as time_module  # audio_callback's `time` argument shadows the module
 import threading
 from queue import Queue
 from faster_whisper import WhisperModel
+from ring_buffer import AudioRingBuffer
+from streaming_decoder import LocalAgreementDecoder
+from vad import EnergyVAD
 import torch
 device = torch.device("mps" if torch.backends.mps.is_available() else "cpu")
 
+# Audio kept in memory for consumers that fall behind; older audio is dropped for them
+LIVE_RING_SECONDS = int(os.getenv("LIVE_RING_SECONDS", 120))
+LIVE_RECORDING_FORMAT = os.getenv("LIVE_RECORDING_FORMAT", "wav")  # or "flac"
+RECORDER_FLUSH_SECONDS = 5
+# Sliding-window decoding with local agreement; set to false for the old independent 1 s batches
+LIVE_STREAMING_DECODE = os.getenv("LIVE_STREAMING_DECODE", "true").lower() == "true"
+# The processing loop reads audio in small blocks and only sends speech to the model:
+# once at end of utterance, plus interim passes during long turns for provisional text
+VAD_BLOCK_SECONDS = 0.1
+VAD_PREROLL_SECONDS = 0.3  # audio kept from before speech onset, so first syllables aren't clipped
+LIVE_PARTIAL_DECODE_SECONDS = float(os.getenv("LIVE_PARTIAL_DECODE_SECONDS", 2.0))
+LIVE_MAX_UTTERANCE_SECONDS = float(os.getenv("LIVE_MAX_UTTERANCE_SECONDS", 20.0))
+LOW_INPUT_RMS = 0.01
+LOW_INPUT_WARNING_SECONDS = 30
+
 
 class CustomTranscriber:
-    def __init__(self):
+    def __init__(self, model=None, session_id=None):
         try:
-            print("Initializing Whisper model...")
-            self.model = WhisperModel("small", device='cpu', compute_type="int8")
-            print("Model initialized successfully")
-            self.audio_buffer = []
+            # Sessions share preloaded models through live_sessions; standalone use loads its own
+            if model is None:
+                print("Initializing Whisper model...")
+                model = WhisperModel("small", device='cpu', compute_type="int8")
+                print("Model initialized successfully")
+            self.model = model
+            self.session_id = session_id
             self.live_transcript = ""
+            self.segments = []  # committed segments, seq == index
             self.stop_flag = threading.Event()
             self.lock = threading.Lock()
+            self.segments_changed = threading.Condition(self.lock)
+            self.finished = False  # set once the last segment has been committed
             self.sample_rate = 16000
+            # One preallocated buffer; the ASR loop and the recorder read it through their own cursors
+            self.ring = AudioRingBuffer(self.sample_rate * LIVE_RING_SECONDS)
+            self.ring.add_reader("asr")
+            self.ring.add_reader("recorder")
+            self.recorded_samples = 0
+            self.decoder = LocalAgreementDecoder(self.model, self.sample_rate) if LIVE_STREAMING_DECODE else None
+            self.vad = EnergyVAD(self.sample_rate)
+            self.speech_samples = 0
+            self.skipped_samples = 0
+            self.decode_calls = 0
+            self.last_low_input_warning = 0.0
+            self.last_activity = time.time()  # last pushed audio or transcript read (see touch)
             self.stream = None
             self.processing_thread = None
+            self.recorder_thread = None
             self.transcript_file = ""
             self.audio_file = ""
             self.initialized = True
@@ -35,79 +73,200 @@ class CustomTranscriber:
         if status:
             print(f"Audio status: {status}")
         
-        # Calculate volume metrics
-        rms = np.sqrt(np.mean(indata**2))
-        max_val = np.max(np.abs(indata))
-        print(f"Audio - RMS: {rms:.4f}, Peak: {max_val:.4f}", end='\r')
-        
-        if rms < 0.01:  # Very quiet threshold
-            print("\nWarning: Low audio input (increase microphone volume)")
-        
+        samples = indata[:, 0]
+        self.write_audio(samples)
+
+        # Occasional level check; np.dot avoids allocating a squared copy of the block
+        now = time_module.monotonic()
+        if now - self.last_low_input_warning >= LOW_INPUT_WARNING_SECONDS:
+            if np.dot(samples, samples) < LOW_INPUT_RMS ** 2 * len(samples):
+                print("Warning: Low audio input (increase microphone volume)")
+                self.last_low_input_warning = now
+
+    def write_audio(self, samples):
+        """Append 16 kHz mono float32 samples from any source (device callback or pushed frames)"""
         if not self.stop_flag.is_set():
-            with self.lock:
-                self.audio_buffer.append(indata.copy())
+            self.ring.write(samples)
 
     def process_audio(self):
-        """Process audio chunks and transcribe using Whisper"""
+        """
+        Gate the model with a VAD: silence is read and dropped without a model call, speech
+        is collected into an utterance that is decoded when the speaker pauses (and at
+        intervals during long turns, so provisional text keeps up).
+        """
         print("Audio processing thread started")
-        min_audio_length = 1.0  # Minimum seconds of audio to process
-        min_samples = int(self.sample_rate * min_audio_length)
-        
-        while not self.stop_flag.is_set():
+        block_samples = int(self.sample_rate * VAD_BLOCK_SECONDS)
+        block = np.empty(block_samples, dtype=np.float32)
+        preroll = AudioRingBuffer(int(self.sample_rate * VAD_PREROLL_SECONDS))
+        preroll.add_reader("utterance")
+        in_utterance = False
+        utterance = []  # speech not yet handed to the model
+        utterance_start = 0.0
+        utterance_samples = 0
+        partial_decoded = False  # some of the utterance is already in the streaming decoder
+
+        while True:
+            stopping = self.stop_flag.is_set()
+            if self.ring.wait("asr", block_samples, timeout=0.2) < block_samples and not stopping:
+                continue
+            position = self.ring.position("asr") / self.sample_rate
+            n = self.ring.read_into("asr", block)
+            if n == 0:
+                break
+            samples = block[:n]
+
+            was_speech = self.vad.in_speech
+            ended = self.vad.process(samples)
+            if not (was_speech or self.vad.in_speech or ended):
+                # Silence: keep a short pre-roll for the next onset and skip the model
+                preroll.write(samples)
+                self.skipped_samples += n
+                continue
+
+            if not in_utterance:
+                in_utterance = True
+                lead = preroll.read("utterance")
+                utterance_start = position - len(lead) / self.sample_rate
+                utterance, utterance_samples = [lead], len(lead)
+                partial_decoded = False
+                if self.decoder is not None:
+                    self.decoder.restart(utterance_start)
+            utterance.append(samples.copy())
+            utterance_samples += n
+            self.speech_samples += n
+
+            undecoded = sum(len(u) for u in utterance)
+            if ended or utterance_samples >= LIVE_MAX_UTTERANCE_SECONDS * self.sample_rate:
+                self.decode_utterance(utterance, utterance_start, final=True)
+                in_utterance, utterance = False, []
+            elif not self.vad.in_speech:
+                # The VAD closed the region as too short to be speech: drop it unless part of
+                # it has already been decoded, in which case that text is finished off
+                if partial_decoded:
+                    self.decode_utterance(utterance, utterance_start, final=True)
+                in_utterance, utterance = False, []
+            elif self.decoder is not None and undecoded >= LIVE_PARTIAL_DECODE_SECONDS * self.sample_rate:
+                self.decode_utterance(utterance, utterance_start, final=False)
+                utterance = []  # the decoder now holds this audio
+                partial_decoded = True
+            if not in_utterance:
+                # Pre-roll is only wanted from the silence after this point: after a forced
+                # cut the next utterance continues straight on from this one
+                preroll.add_reader("utterance")
+
+        # End of stream: whatever speech is still open is decoded as a final utterance
+        self.vad.flush()
+        if in_utterance:
+            self.decode_utterance(utterance, utterance_start, final=True)
+        print(f"Processing finished: {self.speech_samples / self.sample_rate:.1f}s speech decoded in "
+              f"{self.decode_calls} model calls, {self.skipped_samples / self.sample_rate:.1f}s silence skipped")
+
+    def decode_utterance(self, chunks, start, final):
+        """Send speech to the model. The streaming decoder accumulates it across interim calls."""
+        audio_np = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+        self.decode_calls += 1
+        if self.decoder is None:
+            if len(audio_np):
+                self.decode_batch(audio_np, start)
+            return
+        self.decoder.insert_audio(audio_np)
+        try:
+            words = self.decoder.finish() if final else self.decoder.process()
+        except Exception as e:
+            print(f"Transcription error: {str(e)}")
+            return
+        self.append_words(words)
+
+    def decode_batch(self, audio_np, batch_start):
+        """Transcribe one batch on its own, with no context from earlier batches"""
+        # Normalize and boost volume
+        max_val = np.max(np.abs(audio_np))
+        if max_val > 0:
+            audio_np = (audio_np / max_val) * 0.9  # Normalize to 90% of max volume
+
+        try:
+            segments, info = self.model.transcribe(
+                audio_np,
+                beam_size=3,  # Faster processing
+                vad_filter=True,
+                no_speech_threshold=0.6,
+                log_prob_threshold=-1.0
+            )
+
+            text = " ".join(segment.text.strip() for segment in segments if segment.text.strip())
+            print(f"Raw transcript: '{text}'")
+            self.append_text(text, batch_start, batch_start + len(audio_np) / self.sample_rate)
+        except Exception as e:
+            print(f"Transcription error: {str(e)}")
+
+    def append_words(self, words):
+        if words:
+            self.append_text("".join(w for _, _, w in words).strip(), words[0][0], words[-1][1])
+
+    def append_text(self, text, start, end):
+        """Commit a segment: append it to the transcript and file, and wake anyone waiting for segments"""
+        if text:
             with self.lock:
-                if len(self.audio_buffer) * 1024 >= min_samples:  # 1024 samples per chunk
-                    audio_np = np.concatenate(self.audio_buffer)
-                    self.audio_buffer = []
-                    
-                    # Normalize and boost volume
-                    max_val = np.max(np.abs(audio_np))
-                    if max_val > 0:
-                        audio_np = (audio_np / max_val) * 0.9  # Normalize to 90% of max volume
-                    
-                    try:
-                        # Print audio stats for debugging
-                        print(f"Processing {len(audio_np)/self.sample_rate:.2f}s audio "
-                            f"(max: {np.max(np.abs(audio_np)):.3f}, "
-                            f"rms: {np.sqrt(np.mean(audio_np**2)):.3f})")
-                        
-                        segments, info = self.model.transcribe(
-                            audio_np,
-                            beam_size=3,  # Faster processing
-                            vad_filter=True,
-                            no_speech_threshold=0.6,
-                            log_prob_threshold=-1.0
-                        )
-                        
-                        text = " ".join(segment.text.strip() for segment in segments if segment.text.strip())
-                        print(f"Raw transcript: '{text}'")
-                        
-                        if text:
-                            with self.lock:
-                                self.live_transcript += text + "\n"
-                                # Save incrementally
-                                with open(self.transcript_file, 'a', encoding='utf-8') as f:
-                                    f.write(text + "\n")
-                    except Exception as e:
-                        print(f"Transcription error: {str(e)}")
-            
-            time.sleep(0.2)  # Reduce CPU usage
+                self.live_transcript += text + "\n"
+                self.segments.append({
+                    "seq": len(self.segments),
+                    "start": round(start, 2),
+                    "end": round(end, 2),
+                    "text": text,
+                    "committed_at": time.time()
+                })
+                # Save incrementally
+                with open(self.transcript_file, 'a', encoding='utf-8') as f:
+                    f.write(text + "\n")
+                self.segments_changed.notify_all()
 
-    def start(self, output_folder):
-        """Start real-time transcription"""
-        # Create output directory if it doesn't exist
-        # List available audio devices
-        print("Available audio devices:", sd.query_devices())
-         # Use default device or specify one
-        # device = sd.default.device
-        # print(f"Using audio device: {device} - {sd.query_devices(device)['name']}")
+    def record_audio(self):
+        """Stream everything captured to self.audio_file as it arrives, until the ring is closed and drained"""
+        scratch = np.empty(self.sample_rate, dtype=np.float32)
+        flush_every = self.sample_rate * RECORDER_FLUSH_SECONDS
+        unflushed = 0
+        with sf.SoundFile(self.audio_file, 'w', samplerate=self.sample_rate, channels=1,
+                          subtype='PCM_16') as f:
+            while True:
+                if self.ring.wait("recorder", 1, timeout=0.5) == 0:
+                    if self.ring.closed:
+                        break
+                    continue
+                n = self.ring.read_into("recorder", scratch)
+                f.write(scratch[:n])
+                self.recorded_samples += n
+                unflushed += n
+                if unflushed >= flush_every:
+                    f.flush()  # keeps the header current, so a crash still leaves a readable file
+                    unflushed = 0
+        print(f"Recorder finished: {self.recorded_samples / self.sample_rate:.2f}s written to {self.audio_file}")
+
+    def start(self, output_folder, capture_device=True):
+        """
+        Start real-time transcription. With capture_device=False nothing is opened on the
+        server; audio is pushed in through write_audio (see live_ingest).
+        """
         # Create output directory if it doesn't exist
         os.makedirs(output_folder, exist_ok=True)
         
         # Generate unique filenames
         timestamp = time.strftime("%Y%m%d_%H%M%S")
+        if self.session_id:
+            timestamp = f"{timestamp}_{self.session_id}"
         self.transcript_file = os.path.join(output_folder, f"transcript_{timestamp}.txt")
-        self.audio_file = os.path.join(output_folder, f"audio_{timestamp}.wav")
-        
+        self.audio_file = os.path.join(output_folder, f"audio_{timestamp}.{LIVE_RECORDING_FORMAT}")
+
+        if capture_device:
+            self.open_input_device()
+
+        # Start processing and recorder threads
+        self.processing_thread = threading.Thread(target=self.process_audio)
+        self.processing_thread.start()
+        self.recorder_thread = threading.Thread(target=self.record_audio)
+        self.recorder_thread.start()
+
+    def open_input_device(self):
+        """Capture from the first input device attached to this machine"""
         # List available audio devices
         print("Available audio devices:")
         devices = sd.query_devices()
@@ -139,10 +298,6 @@ class CustomTranscriber:
         except Exception as e:
             print(f"Error starting audio stream: {str(e)}")
             raise
-        
-        # Start processing thread
-        self.processing_thread = threading.Thread(target=self.process_audio)
-        self.processing_thread.start()
 
     def stop(self):
         """Stop transcription and save results"""
@@ -158,20 +313,20 @@ class CustomTranscriber:
         # Wait for processing thread to finish
         if self.processing_thread:
             print("Waiting for processing thread...")
-            self.processing_thread.join(timeout=2)
-        
-        # Save final audio (ensure we get all remaining chunks)
-        if len(self.audio_buffer) > 0:
-            print(f"Saving final audio ({len(self.audio_buffer)} chunks)...")
-            try:
-                audio_np = np.concatenate(self.audio_buffer)
-                duration = len(audio_np) / self.sample_rate
-                print(f"Saving {duration:.2f} seconds of audio")
-                sf.write(self.audio_file, audio_np, self.sample_rate)
-                print(f"Audio saved to {self.audio_file}")
-            except Exception as e:
-                print(f"Error saving audio: {str(e)}")
+            self.processing_thread.join()
+        with self.lock:
+            self.finished = True
+            self.segments_changed.notify_all()  # lets streaming clients see the end
         
+        # Let the recorder drain what is left in the ring and finalize the file
+        self.ring.close()
+        if self.recorder_thread:
+            print("Waiting for recorder to finish...")
+            self.recorder_thread.join()
+        for reader, dropped in self.ring.dropped.items():
+            if dropped:
+                print(f"Warning: {reader} fell behind and skipped {dropped / self.sample_rate:.2f}s of audio")
+
         # Ensure transcript file is created
         try:
             with open(self.transcript_file, 'w', encoding='utf-8') as f:
@@ -186,13 +341,45 @@ class CustomTranscriber:
             "transcript_file": self.transcript_file
         }
 
+    def touch(self):
+        """Record client activity; sessions without any are stopped after an idle timeout."""
+        self.last_activity = time.time()
+
     def get_live_transcript(self):
         """Get the current live transcript"""
         if not self.initialized:
             return "Transcriber not initialized"
             
+        self.touch()
         with self.lock:
             current_transcript = self.live_transcript
             # Clear the transcript after reading if desired
             # self.live_transcript = ""
-            return current_transcript
\ No newline at end of file
+            return current_transcript
+
+    def get_provisional_transcript(self):
+        """Text the streaming decoder has heard but not yet committed; it may still change"""
+        if self.decoder is None:
+            return ""
+        return self.decoder.provisional_text
+
+    def segments_since(self, seq):
+        """Committed segments with sequence number >= seq"""
+        self.touch()
+        with self.lock:
+            return self.segments[max(0, seq):]
+
+    def wait_for_segments(self, seq, timeout):
+        """Block until a segment >= seq is committed, the transcriber finishes, or the timeout passes"""
+        self.touch()
+        with self.lock:
+            self.segments_changed.wait_for(lambda: len(self.segments) > seq or self.finished, timeout)
+            return self.segments[max(0, seq):]
+
+    def processing_stats(self):
+        """How much audio reached the model versus how much the VAD skipped"""
+        return {
+            "speech_seconds": self.speech_samples / self.sample_rate,
+            "skipped_seconds": self.skipped_samples / self.sample_rate,
+            "model_calls": self.decode_calls
+        }
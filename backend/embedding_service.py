@@ -0,0 +1,171 @@
+import os, math, threading
+from collections import OrderedDict
+import numpy as np
+import faiss
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", 256))
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", 1024))
+# "auto" picks by corpus size; or force one of INDEX_TYPES
+MEETING_INDEX_TYPE = os.getenv("MEETING_INDEX_TYPE", "auto")
+INDEX_TYPES = ("flat", "sq8", "hnsw", "ivfpq")
+AUTO_FLAT_MAX = int(os.getenv("AUTO_FLAT_MAX", 50_000))
+AUTO_SQ8_MAX = int(os.getenv("AUTO_SQ8_MAX", 500_000))
+HNSW_M = 32
+HNSW_EF_SEARCH = 64
+IVF_NPROBE = 16
+PQ_SUB_DIM = 8  # dimensions per PQ sub-quantizer (8 bits each)
+TRAIN_SAMPLE = 100_000
+IVFPQ_MIN_VECTORS = 10_000
+
+
+class EmbeddingService:
+    """
+    Sentence embeddings for the meeting index. Documents are encoded in fixed-size
+    batches (never the whole corpus at once) and every vector is L2-normalized. Query
+    embeddings are kept in an LRU cache, so repeated or popular questions skip the model.
+    """
+
+    def __init__(self, model_name=EMBEDDING_MODEL, batch_size=EMBED_BATCH_SIZE, cache_size=QUERY_CACHE_SIZE):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name)
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def encode(self, texts):
+        return np.asarray(self.model.encode(texts, batch_size=self.batch_size, convert_to_numpy=True,
+                                            normalize_embeddings=True), dtype=np.float32)
+
+    def encode_batches(self, texts):
+        """Yield (start, vectors) for consecutive batches of `texts`."""
+        for start in range(0, len(texts), self.batch_size):
+            yield start, self.encode(texts[start:start + self.batch_size])
+
+    def count_tokens(self, text):
+        return len(self.model.tokenizer.encode(text, add_special_tokens=False))
+
+    def embed_query(self, text):
+        key = " ".join(text.split())
+        with self.lock:
+            vector = self.cache.get(key)
+            if vector is not None:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                return vector
+            self.misses += 1
+        vector = self.encode([key])
+        with self.lock:
+            self.cache[key] = vector
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return vector
+
+    def stats(self):
+        with self.lock:
+            return {"model": EMBEDDING_MODEL, "dim": self.dim, "cached_queries": len(self.cache),
+                    "hits": self.hits, "misses": self.misses}
+
+
+class VectorStore:
+    """
+    On-disk float32 matrix addressed by chunk id (row i = chunk i), written through a
+    memmap. It lets the writer rebuild or retrain the faiss index without re-embedding
+    and without holding all vectors in RAM. Rows of removed chunks are left in place.
+    """
+
+    def __init__(self, path, dim):
+        self.path = path
+        self.dim = dim
+        if not os.path.exists(path):
+            open(path, "wb").close()
+
+    @property
+    def rows(self):
+        return os.path.getsize(self.path) // (self.dim * 4)
+
+    def write(self, first_id, vectors):
+        end = first_id + len(vectors)
+        if end > self.rows:
+            with open(self.path, "r+b") as f:
+                f.truncate(end * self.dim * 4)
+        matrix = np.memmap(self.path, dtype=np.float32, mode="r+", shape=(self.rows, self.dim))
+        matrix[first_id:end] = vectors
+        matrix.flush()
+        del matrix
+
+    def read(self, ids):
+        matrix = np.memmap(self.path, dtype=np.float32, mode="r", shape=(self.rows, self.dim))
+        return np.array(matrix[np.asarray(ids, dtype=np.int64)])
+
+
+def choose_index_type(n, requested=MEETING_INDEX_TYPE):
+    if requested != "auto":
+        if requested not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type '{requested}'. Available: auto, {', '.join(INDEX_TYPES)}")
+        if requested == "ivfpq" and n < IVFPQ_MIN_VECTORS:
+            return "flat"  # too few vectors to train the coarse quantizer and codebooks
+        return requested
+    if n <= AUTO_FLAT_MAX:
+        return "flat"
+    if n <= AUTO_SQ8_MAX:
+        return "sq8"
+    return "ivfpq"
+
+
+def make_index(kind, dim, n):
+    """
+    Empty inner-product index of `kind`, sized for about `n` vectors. All kinds take
+    add_with_ids; quantized ones need train_index() first.
+      flat  - exact, 4*d bytes per vector
+      sq8   - int8 scalar quantized, d bytes per vector, near-exact
+      hnsw  - graph search over full vectors; fastest queries, no removal
+      ivfpq - inverted lists + product quantization, d/8 bytes per vector; for millions
+    """
+    if kind == "flat":
+        return faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+    if kind == "sq8":
+        return faiss.IndexIDMap2(faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit,
+                                                            faiss.METRIC_INNER_PRODUCT))
+    if kind == "hnsw":
+        hnsw = faiss.IndexHNSWFlat(dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        hnsw.hnsw.efSearch = HNSW_EF_SEARCH
+        return faiss.IndexIDMap2(hnsw)
+    if kind == "ivfpq":
+        nlist = max(1, min(65536, int(4 * math.sqrt(max(n, 1)))))
+        index = faiss.IndexIVFPQ(faiss.IndexFlatIP(dim), dim, nlist, max(1, dim // PQ_SUB_DIM), 8,
+                                 faiss.METRIC_INNER_PRODUCT)
+        index.nprobe = IVF_NPROBE
+        return index
+    raise ValueError(f"Unknown index type '{kind}'")
+
+
+def search_params(index, selector):
+    """
+    SearchParameters restricting a search of `index` to `selector`, carrying over the
+    index's own efSearch / nprobe (a bare SearchParameters would reset them to defaults).
+    """
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap2) else index
+    if isinstance(inner, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=inner.hnsw.efSearch)
+    if isinstance(inner, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(sel=selector, nprobe=inner.nprobe)
+    return faiss.SearchParameters(sel=selector)
+
+
+def supports_removal(kind):
+    return kind != "hnsw"
+
+
+def train_index(index, store, ids):
+    """Train a quantizing index on a sample of the stored vectors (no-op for exact indexes)."""
+    if index.is_trained:
+        return
+    ids = np.asarray(ids, dtype=np.int64)
+    if len(ids) > TRAIN_SAMPLE:
+        ids = np.sort(np.random.default_rng(0).choice(ids, TRAIN_SAMPLE, replace=False))
+    index.train(store.read(ids))
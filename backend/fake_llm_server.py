@@ -0,0 +1,80 @@
+"""
+Local stand-in for the NVIDIA chat completions API, for running the LLM routes offline.
+
+    python fake_llm_server.py
+    NVIDIA_INVOKE_URL=http://127.0.0.1:5055/v1/chat/completions python app.py
+
+Non-streaming requests get one JSON completion. Requests with "stream": true get a
+text/event-stream response with one chunk per word, FAKE_LLM_TOKEN_DELAY seconds apart,
+followed by "data: [DONE]".
+"""
+import os, json, time, uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FAKE_LLM_PORT = int(os.getenv("FAKE_LLM_PORT", 5055))
+FAKE_LLM_TOKEN_DELAY = float(os.getenv("FAKE_LLM_TOKEN_DELAY", 0.02))
+FAKE_LLM_FIRST_TOKEN_DELAY = float(os.getenv("FAKE_LLM_FIRST_TOKEN_DELAY", 0.2))
+
+
+def fake_reply(payload):
+    prompt = payload["messages"][-1]["content"]
+    first_line = prompt.strip().splitlines()[0] if prompt.strip() else ""
+    return (f"**Fake response** from {payload.get('model') or 'fake-model'} "
+            f"(temperature {payload.get('temperature')}) to a prompt of {len(prompt)} characters "
+            f"starting with: {first_line[:80]}\n"
+            "- Key point one was discussed.\n"
+            "- A decision was made about the next step.\n"
+            "- Follow-up items were assigned.")
+
+
+class FakeChatHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        reply = fake_reply(payload)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+        if not payload.get("stream"):
+            body = json.dumps({
+                "id": completion_id,
+                "object": "chat.completion",
+                "model": payload.get("model"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": reply},
+                             "finish_reason": "stop"}]
+            }).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        # HTTP/1.0 response without Content-Length: the stream ends when the connection closes
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        time.sleep(FAKE_LLM_FIRST_TOKEN_DELAY)
+        words = reply.split(" ")
+        for i, word in enumerate(words):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "model": payload.get("model"),
+                "choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word},
+                             "finish_reason": None}]
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(FAKE_LLM_TOKEN_DELAY)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        print(f"fake-llm: {format % args}")
+
+
+if __name__ == '__main__':
+    server = ThreadingHTTPServer(("127.0.0.1", FAKE_LLM_PORT), FakeChatHandler)
+    print(f"Fake LLM server listening on http://127.0.0.1:{FAKE_LLM_PORT}/v1/chat/completions")
+    server.serve_forever()
@@ -0,0 +1,184 @@
+import os, time, random, threading
+from collections import deque
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 10))  # keep-alive connections per host
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 5))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", 60))  # max silence between bytes, not total time
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", 3))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", 0.5))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", 20))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Statuses meaning the server did not act on the request, so even a POST can be resent
+UNPROCESSED_STATUSES = {429, 503}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+LATENCY_WINDOW = 1000  # recent calls per host kept for percentiles
+
+
+class HostClient:
+    """Pooled keep-alive session, defaults and call metrics for one upstream host."""
+
+    def __init__(self, host, pool_size=HTTP_POOL_SIZE, timeout=None, retries=HTTP_MAX_RETRIES):
+        self.host = host
+        self.timeout = timeout or (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+        self.retries = retries
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=False)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.retried = 0
+        self.statuses = {}
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def record(self, seconds, status=None, error=False):
+        with self.lock:
+            self.calls += 1
+            self.latencies.append(seconds)
+            if error:
+                self.errors += 1
+            else:
+                self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+
+    def stats(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            stats = {"calls": self.calls, "errors": self.errors, "retries": self.retried,
+                     "statuses": dict(self.statuses)}
+        if latencies:
+            stats["latency_ms"] = {
+                "mean": round(1000 * sum(latencies) / len(latencies), 1),
+                "p50": round(1000 * latencies[len(latencies) // 2], 1),
+                "p95": round(1000 * latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 1),
+                "max": round(1000 * latencies[-1], 1),
+            }
+        return stats
+
+
+hosts = {}
+hosts_lock = threading.Lock()
+
+
+def _host(url):
+    return urlsplit(url).netloc
+
+
+def configure(url, pool_size=HTTP_POOL_SIZE, timeout=None, retries=HTTP_MAX_RETRIES):
+    """Set pool size and defaults for the host of `url` (before its first request)."""
+    host = _host(url)
+    with hosts_lock:
+        hosts[host] = HostClient(host, pool_size, timeout, retries)
+    return hosts[host]
+
+
+def client_for(url):
+    host = _host(url)
+    with hosts_lock:
+        if host not in hosts:
+            hosts[host] = HostClient(host)
+        return hosts[host]
+
+
+def backoff_delay(attempt, response=None):
+    """Full-jitter exponential backoff, or the server's Retry-After when it sent one."""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(float(retry_after), HTTP_BACKOFF_MAX)
+            except ValueError:
+                pass  # an HTTP date; fall back to our own schedule
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2 ** attempt))
+
+
+def _replayable_bodies(kwargs):
+    """
+    (file, start offset) for each file body, so they can be rewound before a resend.
+    None if a body can't be replayed (e.g. a generator); such requests aren't retried.
+    """
+    bodies = [kwargs.get("data")] + list((kwargs.get("files") or {}).values())
+    positions = []
+    for body in bodies:
+        if isinstance(body, tuple):
+            body = body[1]
+        if body is None or isinstance(body, (bytes, str, dict, list)):
+            continue
+        if not hasattr(body, "seek"):
+            return None
+        positions.append((body, body.tell()))
+    return positions
+
+
+def never_sent(error):
+    """True if the request failed before a connection was made, so the server never saw it."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if isinstance(error, requests.Timeout):
+        return False  # read timeout: the server may be working on it
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+
+def request(method, url, timeout=None, retries=None, idempotent=None, **kwargs):
+    """
+    requests.request through the host's pooled session, with a timeout always set and
+    retries with jitter. Idempotent requests (GET etc., or any call made with
+    idempotent=True) are retried on connection errors, timeouts and 429/5xx; anything
+    else only when it never reached the server or was turned away with 429/503, so a
+    POST is never run twice. When retries run out the last response is returned as-is
+    (or the connection error raised), so callers keep checking status codes the way
+    they did with bare requests.
+    """
+    client = client_for(url)
+    if idempotent is None:
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+    retry_statuses = RETRY_STATUSES if idempotent else UNPROCESSED_STATUSES
+    timeout = timeout or client.timeout
+    retries = client.retries if retries is None else retries
+    positions = _replayable_bodies(kwargs)
+    if positions is None:
+        retries = 0
+
+    attempt = 0
+    while True:
+        started = time.time()
+        try:
+            response = client.session.request(method, url, timeout=timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            client.record(time.time() - started, error=True)
+            if attempt >= retries or not (idempotent or never_sent(e)):
+                raise
+            delay = backoff_delay(attempt)
+            print(f"{method} {client.host} failed ({e.__class__.__name__}); retry {attempt + 1} in {delay:.1f}s")
+        else:
+            client.record(time.time() - started, response.status_code)
+            if response.status_code not in retry_statuses or attempt >= retries:
+                return response
+            delay = backoff_delay(attempt, response)
+            print(f"{method} {client.host} returned {response.status_code}; retry {attempt + 1} in {delay:.1f}s")
+            response.close()
+        with client.lock:
+            client.retried += 1
+        time.sleep(delay)
+        for body, position in positions:
+            body.seek(position)
+        attempt += 1
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+def stats():
+    with hosts_lock:
+        clients = list(hosts.values())
+    return {client.host: client.stats() for client in clients}
@@ -0,0 +1,99 @@
+import os, time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from llm_generate import (query_nvidia_model, query_nvidia_scoring_model,
+                          stream_nvidia_model, stream_nvidia_scoring_model)
+from long_transcript import needs_map_reduce, map_reduce_artifact, reduce_input
+from rate_limiter import UpstreamRateLimited
+from prompts import (SUMMARY_PROMPT, ACTION_ITEMS_PROMPT, MINUTES_OF_MEETING_PROMPT,
+                     SENTIMENT_PROMPT, SCORING_PROMPT)
+
+INSIGHTS_WORKERS = int(os.getenv("INSIGHTS_WORKERS", 10))
+
+# Artifact name -> prompt and whether the agenda is sent along (or required)
+ARTIFACTS = {
+    "summary": {"prompt": SUMMARY_PROMPT, "uses_agenda": False, "requires_agenda": False},
+    "action_items": {"prompt": ACTION_ITEMS_PROMPT, "uses_agenda": False, "requires_agenda": False},
+    "minutes_of_meeting": {"prompt": MINUTES_OF_MEETING_PROMPT, "uses_agenda": True, "requires_agenda": False},
+    "sentiment": {"prompt": SENTIMENT_PROMPT, "uses_agenda": False, "requires_agenda": False},
+    "score": {"prompt": SCORING_PROMPT, "uses_agenda": True, "requires_agenda": True},
+}
+
+executor = ThreadPoolExecutor(max_workers=INSIGHTS_WORKERS, thread_name_prefix="insights")
+
+
+def generate_artifact(name, transcript, agenda=None, use_cache=True, speaker_segments=None):
+    """
+    Run the prompt for one artifact. Returns the generated text or None on failure.
+    Transcripts over the prompt token budget go through map-reduce, chunked on speaker turns.
+    """
+    spec = ARTIFACTS[name]
+    if needs_map_reduce(transcript, spec["prompt"], agenda if spec["uses_agenda"] else None):
+        return map_reduce_artifact(name, spec["prompt"], spec["uses_agenda"], transcript, agenda,
+                                   speaker_segments=speaker_segments, use_cache=use_cache)
+    if spec["uses_agenda"]:
+        return query_nvidia_scoring_model(transcript, agenda, spec["prompt"], use_cache=use_cache)
+    return query_nvidia_model(transcript, spec["prompt"], use_cache=use_cache)
+
+
+def stream_artifact(name, transcript, agenda=None, use_cache=True, speaker_segments=None):
+    """
+    Like generate_artifact, but yields text deltas as the model produces them.
+    For long transcripts the map phase runs first and only the final reduce call is streamed.
+    """
+    spec = ARTIFACTS[name]
+    task_prompt = spec["prompt"]
+    if needs_map_reduce(transcript, task_prompt, agenda if spec["uses_agenda"] else None):
+        transcript, task_prompt = reduce_input(name, task_prompt, spec["uses_agenda"], transcript, agenda,
+                                               speaker_segments=speaker_segments, use_cache=use_cache)
+    if spec["uses_agenda"]:
+        return stream_nvidia_scoring_model(transcript, agenda, task_prompt, use_cache=use_cache)
+    return stream_nvidia_model(transcript, task_prompt, use_cache=use_cache)
+
+
+def _timed_artifact(name, transcript, agenda, use_cache, speaker_segments):
+    start_time = time.time()
+    retry_after = None
+    try:
+        result = generate_artifact(name, transcript, agenda, use_cache=use_cache,
+                                   speaker_segments=speaker_segments)
+        error = None if result is not None else "Failed to get response from NVIDIA API"
+    except UpstreamRateLimited as e:
+        result, error, retry_after = None, str(e), e.retry_after
+    except Exception as e:
+        result, error = None, str(e)
+    event = {
+        "artifact": name,
+        "status": "success" if error is None else "error",
+        "result": result,
+        "error": error,
+        "elapsed": time.time() - start_time
+    }
+    if retry_after is not None:
+        event["retry_after"] = retry_after
+    return event
+
+
+def stream_meeting_insights(transcript, agenda=None, artifacts=None, use_cache=True, speaker_segments=None):
+    """
+    Dispatch all artifact prompts at once and yield one event per artifact as it completes.
+    A failing artifact only produces an error event; the last event has "done": True.
+    """
+    start_time = time.time()
+    futures, skipped = [], []
+    for name in artifacts or ARTIFACTS:
+        if ARTIFACTS[name]["requires_agenda"] and not agenda:
+            skipped.append(name)
+        else:
+            futures.append(executor.submit(_timed_artifact, name, transcript, agenda, use_cache,
+                                           speaker_segments))
+
+    failed = len(skipped)
+    for name in skipped:
+        yield {"artifact": name, "status": "error", "result": None,
+               "error": "No agenda provided", "elapsed": 0.0}
+    for future in as_completed(futures):
+        event = future.result()
+        failed += event["status"] != "success"
+        yield event
+
+    yield {"done": True, "failed": failed, "elapsed": time.time() - start_time}
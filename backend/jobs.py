@@ -0,0 +1,137 @@
+import os, time, uuid, threading
+from concurrent.futures import ThreadPoolExecutor
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", 50))
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", 3600))
+
+# Rough progress reported for each pipeline stage
+STAGE_PROGRESS = {
+    "queued": 0.0,
+    "preparing": 0.1,
+    "uploading": 0.2,
+    "transcribing": 0.4,
+    "diarizing": 0.6,
+    "recognizing": 0.8,
+    "completed": 1.0,
+}
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, kind):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = "queued"
+        self.stage = "queued"
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.cancel_event = threading.Event()
+        self.future = None
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATUSES
+
+    def set_stage(self, stage):
+        """Stage callback handed to the pipeline; raises JobCancelled once cancellation is requested."""
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+        if stage != self.stage:
+            self.stage = stage
+            self.progress = STAGE_PROGRESS.get(stage, self.progress)
+            self.updated_at = time.time()
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": self.progress,
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at
+        }
+
+
+class JobQueue:
+    """
+    Bounded worker pool for long-running pipelines.
+    `fn` is called as fn(*args, on_stage=job.set_stage, **kwargs) and its return value
+    becomes the job result.
+    """
+
+    def __init__(self, max_workers=JOB_WORKERS, max_pending=JOB_MAX_PENDING,
+                 retention_seconds=JOB_RETENTION_SECONDS):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def submit(self, kind, fn, *args, **kwargs):
+        with self.lock:
+            self._prune()
+            pending = sum(1 for job in self.jobs.values() if not job.finished)
+            if pending >= self.max_pending:
+                raise QueueFull(f"{pending} jobs already pending")
+            job = Job(kind)
+            self.jobs[job.id] = job
+        job.future = self.executor.submit(self._run, job, fn, args, kwargs)
+        print(f"Job {job.id} ({kind}) queued")
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        if job.cancel_event.is_set():
+            self._finish(job, "cancelled")
+            return
+        job.status = "running"
+        job.updated_at = time.time()
+        try:
+            job.result = fn(*args, on_stage=job.set_stage, **kwargs)
+            job.stage = "completed"
+            job.progress = 1.0
+            self._finish(job, "completed")
+        except JobCancelled:
+            self._finish(job, "cancelled")
+        except Exception as e:
+            print(f"Job {job.id} failed: {e}")
+            job.error = str(e)
+            self._finish(job, "failed")
+
+    def _finish(self, job, status):
+        job.status = status
+        job.updated_at = time.time()
+        print(f"Job {job.id} {status}")
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Request cancellation. Queued jobs stop immediately, running jobs at their next stage check."""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        if not job.finished:
+            job.cancel_event.set()
+            if job.future is not None and job.future.cancel():
+                self._finish(job, "cancelled")
+        return job
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        for job_id in [j.id for j in self.jobs.values() if j.finished and j.updated_at < cutoff]:
+            del self.jobs[job_id]
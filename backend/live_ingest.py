@@ -0,0 +1,213 @@
+import os, queue, threading, subprocess
+import numpy as np
+
+LIVE_SAMPLE_RATE = 16000
+# Out-of-order frames held while waiting for a missing one. Past this, raw PCM skips the gap;
+# an encoded stream can't be decoded past a missing frame, so later frames are refused instead
+LIVE_JITTER_MAX_FRAMES = int(os.getenv("LIVE_JITTER_MAX_FRAMES", 50))
+# Clients are told to back off (429) once this much audio is waiting to be decoded
+LIVE_MAX_BACKLOG_SECONDS = float(os.getenv("LIVE_MAX_BACKLOG_SECONDS", 10))
+PCM_FORMATS = {"pcm_s16le": np.int16, "pcm_f32le": np.float32}
+ENCODED_FORMATS = ("webm", "ogg")  # MediaRecorder output (Opus), decoded through one ffmpeg pipe per session
+DECODER_READ_SIZE = 1 << 14
+# Compressed audio accepted but not yet written to ffmpeg; past this, frames get 429 (~60 s of 32 kbit/s Opus)
+LIVE_DECODER_MAX_QUEUED_BYTES = int(os.getenv("LIVE_DECODER_MAX_QUEUED_BYTES", 256 << 10))
+
+
+class Backpressure(Exception):
+    """The frame wasn't accepted; the client should send it again after `retry_after` seconds."""
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = max(1, int(retry_after))
+
+
+class IngestError(Exception):
+    pass
+
+
+class JitterBuffer:
+    """
+    Reorders sequence-numbered frames. Frames are released strictly in order; duplicates
+    and frames older than the release point are dropped. If more than `max_pending`
+    frames are waiting behind a gap, the missing frames are given up as lost, or, with
+    skip_gaps=False, further frames past the gap raise Backpressure until it is filled.
+    """
+
+    def __init__(self, max_pending=LIVE_JITTER_MAX_FRAMES, skip_gaps=True):
+        self.max_pending = max_pending
+        self.skip_gaps = skip_gaps
+        self.next_seq = 0
+        self.pending = {}
+        self.lost = 0
+        self.duplicates = 0
+
+    def push(self, seq, frame):
+        """Add one frame; returns the frames that are now ready, in order."""
+        if seq < self.next_seq or seq in self.pending:
+            self.duplicates += 1
+            return []
+        if not self.skip_gaps and seq != self.next_seq and len(self.pending) >= self.max_pending:
+            raise Backpressure(f"Waiting for frame {self.next_seq}; {len(self.pending)} later frames are held")
+        self.pending[seq] = frame
+        ready = []
+        while True:
+            if self.next_seq in self.pending:
+                ready.append(self.pending.pop(self.next_seq))
+                self.next_seq += 1
+            elif len(self.pending) > self.max_pending:
+                resume = min(self.pending)
+                self.lost += resume - self.next_seq
+                self.next_seq = resume
+            else:
+                return ready
+
+    def flush(self):
+        """Release everything still held, skipping over gaps (or, with skip_gaps=False, dropping it)."""
+        ready = []
+        if not self.skip_gaps:
+            # Everything held is behind a gap the stream can't be decoded across
+            if self.pending:
+                self.lost += max(self.pending) + 1 - self.next_seq
+                self.next_seq = max(self.pending) + 1
+                self.pending.clear()
+            return ready
+        for seq in sorted(self.pending):
+            self.lost += seq - self.next_seq
+            ready.append(self.pending.pop(seq))
+            self.next_seq = seq + 1
+        return ready
+
+
+class StreamDecoder:
+    """
+    Long-running ffmpeg process turning a compressed stream (webm/ogg Opus) into 16 kHz
+    mono float32. write() only queues the data; a writer thread feeds ffmpeg's stdin, so
+    a slow decoder never blocks the caller.
+    """
+
+    def __init__(self, on_samples, sample_rate=LIVE_SAMPLE_RATE):
+        self.on_samples = on_samples
+        self.proc = subprocess.Popen(
+            ["ffmpeg", "-hide_banner", "-loglevel", "error", "-i", "pipe:0", "-vn",
+             "-ac", "1", "-ar", str(sample_rate), "-f", "f32le", "pipe:1"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        self.queue = queue.Queue()
+        self.queued_bytes = 0
+        self.queued_lock = threading.Lock()
+        self.error = None
+        self.writer = threading.Thread(target=self._write, daemon=True)
+        self.writer.start()
+        self.reader = threading.Thread(target=self._read, daemon=True)
+        self.reader.start()
+
+    def _write(self):
+        for data in iter(self.queue.get, None):
+            if self.error is None:
+                try:
+                    self.proc.stdin.write(data)
+                    self.proc.stdin.flush()
+                except (BrokenPipeError, OSError) as e:
+                    self.error = f"Decoder stopped: {e}"
+            with self.queued_lock:
+                self.queued_bytes -= len(data)
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+
+    def _read(self):
+        tail = b""
+        for block in iter(lambda: self.proc.stdout.read(DECODER_READ_SIZE), b""):
+            block = tail + block
+            usable = len(block) - len(block) % 4
+            tail = block[usable:]
+            if usable:
+                self.on_samples(np.frombuffer(block[:usable], dtype=np.float32))
+
+    def write(self, data):
+        if self.error:
+            raise IngestError(self.error)
+        with self.queued_lock:
+            self.queued_bytes += len(data)
+        self.queue.put(data)
+
+    def close(self):
+        """Write what is queued, end the input and wait for the decoded tail."""
+        self.queue.put(None)
+        self.writer.join()
+        self.reader.join()
+        self.proc.wait()
+
+
+class LiveIngest:
+    """
+    Audio pushed by a remote client into one live session. Frames carry a sequence
+    number and go through a jitter buffer before reaching the transcriber (via the
+    decoder for compressed formats). push() raises Backpressure instead of accepting
+    a frame when the session is too far behind, or when a compressed stream is stuck
+    waiting for a missing frame, so the client can retry it later.
+    """
+
+    def __init__(self, transcriber, fmt="pcm_s16le"):
+        if fmt not in PCM_FORMATS and fmt not in ENCODED_FORMATS:
+            raise IngestError(f"Unsupported audio format: {fmt}")
+        self.transcriber = transcriber
+        self.format = fmt
+        self.jitter = JitterBuffer(skip_gaps=fmt in PCM_FORMATS)
+        self.decoder = StreamDecoder(transcriber.write_audio) if fmt in ENCODED_FORMATS else None
+        self.received_bytes = 0
+        self.closed = False
+        self.lock = threading.Lock()
+
+    def backlog_seconds(self):
+        return self.transcriber.ring.available("asr") / self.transcriber.sample_rate
+
+    def push(self, seq, data):
+        if self.format in PCM_FORMATS and len(data) % np.dtype(PCM_FORMATS[self.format]).itemsize:
+            raise IngestError(f"Frame length {len(data)} is not a whole number of {self.format} samples")
+        self.transcriber.touch()
+        backlog = self.backlog_seconds()
+        if backlog > LIVE_MAX_BACKLOG_SECONDS:
+            raise Backpressure(f"{backlog:.1f}s of audio waiting to be decoded",
+                               retry_after=backlog - LIVE_MAX_BACKLOG_SECONDS / 2)
+        if self.decoder is not None and self.decoder.queued_bytes > LIVE_DECODER_MAX_QUEUED_BYTES:
+            raise Backpressure(f"{self.decoder.queued_bytes} bytes waiting for the decoder")
+        with self.lock:
+            if self.closed:
+                raise IngestError("Session is no longer accepting audio")
+            ready = self.jitter.push(seq, data)
+            self.received_bytes += len(data)
+            for frame in ready:
+                self._deliver(frame)
+
+    def _deliver(self, frame):
+        if self.decoder is not None:
+            self.decoder.write(frame)
+            return
+        samples = np.frombuffer(frame, dtype=PCM_FORMATS[self.format])
+        if samples.dtype == np.int16:
+            samples = samples.astype(np.float32) / 32768.0
+        self.transcriber.write_audio(samples)
+
+    def close(self):
+        """Deliver anything still held and wait for the decoder to drain."""
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            for frame in self.jitter.flush():
+                self._deliver(frame)
+        if self.decoder is not None:
+            self.decoder.close()
+
+    def stats(self):
+        return {
+            "format": self.format,
+            "next_seq": self.jitter.next_seq,
+            "held_frames": len(self.jitter.pending),
+            "lost_frames": self.jitter.lost,
+            "duplicate_frames": self.jitter.duplicates,
+            "received_bytes": self.received_bytes,
+            "backlog_seconds": self.backlog_seconds()
+        }
@@ -0,0 +1,234 @@
+import os, time, uuid, threading
+from collections import deque
+from concurrent.futures import Future
+from faster_whisper import WhisperModel
+from custom_transcriber import CustomTranscriber
+from live_ingest import LiveIngest
+
+LIVE_MODEL_SIZE = os.getenv("LIVE_MODEL_SIZE", "small")
+LIVE_MODEL_COMPUTE_TYPE = os.getenv("LIVE_MODEL_COMPUTE_TYPE", "int8")
+LIVE_MODEL_POOL_SIZE = int(os.getenv("LIVE_MODEL_POOL_SIZE", 2))
+LIVE_MAX_SESSIONS = int(os.getenv("LIVE_MAX_SESSIONS", 32))
+LIVE_SESSION_RETENTION_SECONDS = int(os.getenv("LIVE_SESSION_RETENTION_SECONDS", 3600))
+# A running session nobody has pushed audio to or read from for this long is stopped (0 = never)
+LIVE_SESSION_IDLE_SECONDS = int(os.getenv("LIVE_SESSION_IDLE_SECONDS", 600))
+DEFAULT_SESSION_ID = "default"  # used by the original single-session routes
+
+
+class TooManySessions(Exception):
+    pass
+
+
+class SessionExists(Exception):
+    pass
+
+
+class ModelPool:
+    """
+    Process-wide set of preloaded faster-whisper models, one worker thread per model.
+    Work is taken from a FIFO queue; because each live session has at most one decode
+    in flight (its processing loop waits for the result), sessions are served round
+    robin and a busy meeting cannot starve the others.
+    """
+
+    def __init__(self, size=LIVE_MODEL_POOL_SIZE, model_size=LIVE_MODEL_SIZE,
+                 compute_type=LIVE_MODEL_COMPUTE_TYPE):
+        self.size = size
+        self.model_size = model_size
+        self.compute_type = compute_type
+        self.queue = deque()
+        self.cond = threading.Condition()
+        self.workers = []
+        self.started = False
+        self.busy = 0
+        self.completed = 0
+        self.total_wait = 0.0
+
+    def start(self):
+        """Load the models (once) and start their workers."""
+        with self.cond:
+            if self.started:
+                return
+            self.started = True
+        cpu_threads = max(1, (os.cpu_count() or 1) // self.size)
+        for i in range(self.size):
+            print(f"Loading live model {i + 1}/{self.size} ({self.model_size}, {self.compute_type})")
+            try:
+                model = WhisperModel(self.model_size, device="cpu", compute_type=self.compute_type,
+                                     cpu_threads=cpu_threads)
+            except Exception:
+                if not self.workers:
+                    with self.cond:
+                        self.started = False  # let the next caller retry
+                raise
+            worker = threading.Thread(target=self._worker, args=(model,), name=f"live-model-{i}", daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def _worker(self, model):
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.queue)
+                session_id, fn, future, queued_at = self.queue.popleft()
+                self.busy += 1
+                self.total_wait += time.time() - queued_at
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(model))
+                except BaseException as e:
+                    future.set_exception(e)
+            with self.cond:
+                self.busy -= 1
+                self.completed += 1
+
+    def run(self, session_id, fn):
+        """Run fn(model) on the next free model, in turn with other sessions; blocks for the result."""
+        self.start()
+        future = Future()
+        with self.cond:
+            self.queue.append((session_id, fn, future, time.time()))
+            self.cond.notify()
+        return future.result()
+
+    def stats(self):
+        with self.cond:
+            return {
+                "models": self.size,
+                "model_size": self.model_size,
+                "busy": self.busy,
+                "queued": len(self.queue),
+                "completed": self.completed,
+                "avg_wait_seconds": self.total_wait / self.completed if self.completed else 0.0
+            }
+
+
+class PooledModel:
+    """Stands in for a WhisperModel inside one session; every call is scheduled on the pool."""
+
+    def __init__(self, pool, session_id):
+        self.pool = pool
+        self.session_id = session_id
+
+    def transcribe(self, audio, **kwargs):
+        def decode(model):
+            segments, info = model.transcribe(audio, **kwargs)
+            return list(segments), info  # segments are lazy; decode while holding the model
+        return self.pool.run(self.session_id, decode)
+
+
+class SessionManager:
+    """
+    Live transcription sessions keyed by id, all sharing one ModelPool. A session whose
+    client went away without calling stop (no audio pushed, no transcript read for
+    `idle_seconds`) is stopped by a background reaper, which saves its results as usual.
+    """
+
+    def __init__(self, pool, max_sessions=LIVE_MAX_SESSIONS, retention_seconds=LIVE_SESSION_RETENTION_SECONDS,
+                 idle_seconds=LIVE_SESSION_IDLE_SECONDS):
+        self.pool = pool
+        self.max_sessions = max_sessions
+        self.retention_seconds = retention_seconds
+        self.idle_seconds = idle_seconds
+        self.sessions = {}
+        self.ingests = {}  # session id -> LiveIngest, for sessions fed by a remote client
+        self.stopped_at = {}
+        self.stopping = set()  # sessions whose stop() is in progress
+        self.lock = threading.Lock()
+        self.reaper = None
+
+    def start(self, output_folder, session_id=None, source="device", audio_format="pcm_s16le"):
+        """
+        Start a session. source="device" captures from the server's microphone;
+        source="push" waits for audio frames posted by the client in `audio_format`.
+        """
+        session_id = session_id or uuid.uuid4().hex
+        with self.lock:
+            self._prune()
+            existing = self.sessions.get(session_id)
+            if existing is not None and not existing.stop_flag.is_set():
+                raise SessionExists(session_id)
+            active = sum(1 for t in self.sessions.values() if not t.stop_flag.is_set())
+            if active >= self.max_sessions:
+                raise TooManySessions(f"{active} live sessions already running")
+            transcriber = CustomTranscriber(model=PooledModel(self.pool, session_id), session_id=session_id)
+            self.sessions[session_id] = transcriber
+            self.stopped_at.pop(session_id, None)
+            self.ingests.pop(session_id, None)
+        ingest = None
+        try:
+            if source == "push":
+                ingest = LiveIngest(transcriber, audio_format)
+                transcriber.start(output_folder, capture_device=False)
+                with self.lock:
+                    self.ingests[session_id] = ingest
+            else:
+                transcriber.start(output_folder)
+        except Exception:
+            if ingest is not None:
+                ingest.close()  # ends its ffmpeg decoder process, if it started one
+            with self.lock:
+                self.sessions.pop(session_id, None)
+                self.ingests.pop(session_id, None)
+            raise
+        self._ensure_reaper()
+        print(f"Live session {session_id} started")
+        return transcriber
+
+    def get(self, session_id):
+        with self.lock:
+            return self.sessions.get(session_id)
+
+    def get_ingest(self, session_id):
+        with self.lock:
+            return self.ingests.get(session_id)
+
+    def stop(self, session_id):
+        """Stop a running session; returns CustomTranscriber.stop() results, or None if not running."""
+        with self.lock:
+            # Claimed under the lock, so the reaper and a client /stop can't both stop it
+            transcriber = self.sessions.get(session_id)
+            if transcriber is None or transcriber.stop_flag.is_set() or session_id in self.stopping:
+                return None
+            self.stopping.add(session_id)
+            ingest = self.ingests.get(session_id)
+        try:
+            if ingest is not None:
+                ingest.close()  # deliver frames still held in the jitter buffer first
+            return transcriber.stop()
+        finally:
+            with self.lock:
+                self.stopping.discard(session_id)
+                self.stopped_at[session_id] = time.time()
+
+    def list(self):
+        with self.lock:
+            return [{"session_id": session_id, "active": not t.stop_flag.is_set(), "segments": len(t.segments)}
+                    for session_id, t in self.sessions.items()]
+
+    def _ensure_reaper(self):
+        with self.lock:
+            if self.idle_seconds <= 0 or self.reaper is not None:
+                return
+            self.reaper = threading.Thread(target=self._reap, name="live-session-reaper", daemon=True)
+            self.reaper.start()
+
+    def _reap(self):
+        while True:
+            time.sleep(min(30, max(1, self.idle_seconds / 4)))
+            cutoff = time.time() - self.idle_seconds
+            with self.lock:
+                idle = [session_id for session_id, t in self.sessions.items()
+                        if not t.stop_flag.is_set() and t.last_activity < cutoff]
+            for session_id in idle:
+                print(f"Live session {session_id} idle for {self.idle_seconds}s; stopping it")
+                try:
+                    self.stop(session_id)
+                except Exception as e:
+                    print(f"Stopping idle session {session_id} failed: {e}")
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        for session_id in [s for s, stopped in self.stopped_at.items() if stopped < cutoff]:
+            self.sessions.pop(session_id, None)
+            self.ingests.pop(session_id, None)
+            del self.stopped_at[session_id]
@@ -1,58 +1,154 @@
-import os, requests, json
+import os, json
 from dotenv import load_dotenv
+import http_client
+from rate_limiter import admitted_request, PRIORITY_BATCH, PRIORITY_INTERACTIVE
+from llm_cache import LLMCache, make_cache_key
 
 load_dotenv()
 
 NVIDIA_API_TOKEN = os.getenv("NVIDIA_API_TOKEN")
 NVIDIA_INVOKE_URL = os.getenv("NVIDIA_INVOKE_URL")
 LLM_MODEL_NAME = os.getenv("LLM_MODEL_NAME")
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", 10))
+# Opt-in deterministic mode: greedy decoding with a fixed seed, so cached responses stay valid.
+# Off by default, which keeps the usual temperature 0.8 sampling and no caching.
+LLM_DETERMINISTIC = os.getenv("LLM_DETERMINISTIC", "false").lower() == "true"
+LLM_SEED = int(os.getenv("LLM_SEED", 0))
 
 HEADERS = {
     "Authorization": f"Bearer {NVIDIA_API_TOKEN}",
     "Accept": "application/json"  # Use "text/event-stream" if stream=True
 }
+STREAM_HEADERS = {**HEADERS, "Accept": "text/event-stream"}
 
+# Keep-alive connections shared by concurrent prompts (e.g. /meeting-insights)
+if NVIDIA_INVOKE_URL:
+    http_client.configure(NVIDIA_INVOKE_URL, pool_size=LLM_POOL_SIZE)
 
-def query_nvidia_model(transcript, task_prompt):
-    prompt = f"{task_prompt}\n\nTranscript:\n{transcript}"
-    payload = {
-        "model": LLM_MODEL_NAME,
-        "messages": [{"role": "user", "content": prompt}],
+
+llm_cache = LLMCache()
+
+
+def sampling_params(deterministic=LLM_DETERMINISTIC):
+    params = {
         "max_tokens": 1024,
         "temperature": 0.8,
         "top_p": 1.0,
         "frequency_penalty": 0.0,
-        "presence_penalty": 0.0,
+        "presence_penalty": 0.0
+    }
+    if deterministic:
+        params.update({"temperature": 0.0, "seed": LLM_SEED})
+    return params
+
+
+def _chat_completion(prompt, cache_key=None, use_cache=True, priority=PRIORITY_BATCH):
+    """
+    Run one chat completion. Responses are cached under `cache_key` in deterministic mode;
+    use_cache=False (explicit regenerate) skips the lookup and samples normally, so it
+    actually produces a different answer; that answer isn't cached. Calls wait for
+    admission by the NVIDIA rate limiter; raises UpstreamRateLimited if that times out or
+    the API still answers 429.
+    """
+    # A regenerate must not reuse the seeded greedy params, or it returns the same text
+    cacheable = cache_key is not None and LLM_DETERMINISTIC and use_cache
+    if cacheable:
+        cached = llm_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    payload = {
+        "model": LLM_MODEL_NAME,
+        "messages": [{"role": "user", "content": prompt}],
+        **sampling_params(deterministic=cacheable),
         "stream": False
     }
 
-    response = requests.post(NVIDIA_INVOKE_URL, headers=HEADERS, json=payload)
+    def send():
+        return http_client.post(NVIDIA_INVOKE_URL, headers=HEADERS, json=payload, retries=0)
 
-    if response.status_code == 200:
-        return response.json()["choices"][0]["message"]["content"]
-    else:
-        print("Error from NVIDIA API:", response.text)
-        return None
+    with admitted_request("nvidia", prompt, send, priority) as response:
+        if response.status_code != 200:
+            print("Error from NVIDIA API:", response.text)
+            return None
+        content = response.json()["choices"][0]["message"]["content"]
+    if cacheable and content:
+        llm_cache.set(cache_key, content)
+    return content
 
 
+def _stream_chat_completion(prompt, cache_key=None, use_cache=True, priority=PRIORITY_INTERACTIVE):
+    """
+    Streaming variant of _chat_completion: yields content deltas as the server-sent events
+    arrive. A cache hit is yielded as one delta; a completed stream is stored in the cache.
+    The limiter slot is held until the stream ends, since the request is in flight until
+    then. Raises RuntimeError if the API rejects the request.
+    """
+    # A regenerate must not reuse the seeded greedy params, or it returns the same text
+    cacheable = cache_key is not None and LLM_DETERMINISTIC and use_cache
+    if cacheable:
+        cached = llm_cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
 
-def query_nvidia_scoring_model(transcript, agenda, task_prompt):
-    prompt = f"{task_prompt}\n\nAgenda:\n{agenda}\nTranscript:\n{transcript}"
     payload = {
         "model": LLM_MODEL_NAME,
         "messages": [{"role": "user", "content": prompt}],
-        "max_tokens": 1024,
-        "temperature": 0.8,
-        "top_p": 1.0,
-        "frequency_penalty": 0.0,
-        "presence_penalty": 0.0,
-        "stream": False
+        **sampling_params(deterministic=cacheable),
+        "stream": True
     }
 
-    response = requests.post(NVIDIA_INVOKE_URL, headers=HEADERS, json=payload)
+    parts = []
+    completed = False  # only a stream that reached [DONE] is whole enough to cache
+    def send():
+        return http_client.post(NVIDIA_INVOKE_URL, headers=STREAM_HEADERS, json=payload, stream=True, retries=0)
+
+    with admitted_request("nvidia", prompt, send, priority) as response:
+        if response.status_code != 200:
+            print("Error from NVIDIA API:", response.text)
+            raise RuntimeError(f"NVIDIA API returned {response.status_code}")
+        # chunk_size=None hands lines over as soon as the bytes arrive
+        for line in response.iter_lines(chunk_size=None):
+            line = line.decode("utf-8").strip()
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                completed = True
+                break
+            choices = json.loads(data).get("choices") or [{}]
+            delta = (choices[0].get("delta") or {}).get("content")
+            if delta:
+                parts.append(delta)
+                yield delta
+
+    content = "".join(parts)
+    if cacheable and completed and content:
+        llm_cache.set(cache_key, content)
+
+
+def prompt_cache_key(task_prompt, transcript, agenda=None):
+    return make_cache_key(model=LLM_MODEL_NAME, task_prompt=task_prompt, agenda=agenda,
+                          transcript=transcript, params=sampling_params())
+
+
+def query_nvidia_model(transcript, task_prompt, use_cache=True):
+    prompt = f"{task_prompt}\n\nTranscript:\n{transcript}"
+    return _chat_completion(prompt, prompt_cache_key(task_prompt, transcript), use_cache)
+
+
+
+def query_nvidia_scoring_model(transcript, agenda, task_prompt, use_cache=True):
+    prompt = f"{task_prompt}\n\nAgenda:\n{agenda}\nTranscript:\n{transcript}"
+    return _chat_completion(prompt, prompt_cache_key(task_prompt, transcript, agenda), use_cache)
+
 
-    if response.status_code == 200:
-        return response.json()["choices"][0]["message"]["content"]
-    else:
-        print("Error from NVIDIA API:", response.text)
-        return None
\ No newline at end of file
+def stream_nvidia_model(transcript, task_prompt, use_cache=True):
+    prompt = f"{task_prompt}\n\nTranscript:\n{transcript}"
+    return _stream_chat_completion(prompt, prompt_cache_key(task_prompt, transcript), use_cache)
+
+
+def stream_nvidia_scoring_model(transcript, agenda, task_prompt, use_cache=True):
+    prompt = f"{task_prompt}\n\nAgenda:\n{agenda}\nTranscript:\n{transcript}"
+    return _stream_chat_completion(prompt, prompt_cache_key(task_prompt, transcript, agenda), use_cache)
@@ -0,0 +1,135 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import tiktoken
+from llm_generate import query_nvidia_model, query_nvidia_scoring_model
+from transcript_chunker import SENTENCE_PATTERN, format_turn, parse_turns
+
+# Prompts above this size go through map-reduce instead of a single call
+LLM_MAX_PROMPT_TOKENS = int(os.getenv("LLM_MAX_PROMPT_TOKENS", 6000))
+# Transcript tokens per map call
+LONG_TRANSCRIPT_CHUNK_TOKENS = int(os.getenv("LONG_TRANSCRIPT_CHUNK_TOKENS", 3000))
+MAP_WORKERS = int(os.getenv("LONG_TRANSCRIPT_MAP_WORKERS", 8))
+MAX_REDUCE_ROUNDS = 4
+
+# The served model uses its own tokenizer; cl100k is a close enough estimate for budgeting
+encoding = tiktoken.get_encoding("cl100k_base")
+map_executor = ThreadPoolExecutor(max_workers=MAP_WORKERS, thread_name_prefix="map")
+
+# What each map call pulls out of its part of the transcript
+MAP_FOCUS = {
+    "summary": "the key discussion points, decisions made and important context",
+    "action_items": "every task, responsibility, next step or decision, with owners and deadlines when mentioned",
+    "minutes_of_meeting": "attendees, agenda topics discussed, key discussion points, decisions made and action items",
+    "sentiment": "the tone of the conversation per topic and per speaker, including moments of tension, enthusiasm, disagreement or alignment, with short evidence",
+    "score": "which agenda topics were covered and in how much depth, off-topic digressions, time spent per topic and whether outcomes or next steps were stated",
+}
+MAP_PROMPT = """You are processing part {part} of {parts} of a long meeting transcript.
+    Extract {focus}.
+    Write concise notes, keep speaker names and timestamps where they matter, and do not add anything that is not in this part.
+    Below is this part of the transcript: """
+REDUCE_NOTE = """
+    Note: the meeting was too long to send in full. Instead of the raw transcript you are given notes extracted from consecutive parts of it, in order. Treat them as the complete record of the meeting."""
+
+
+def count_tokens(text):
+    return len(encoding.encode(text or "", disallowed_special=()))
+
+
+def needs_map_reduce(transcript, task_prompt, agenda=None):
+    return count_tokens(task_prompt) + count_tokens(agenda) + count_tokens(transcript) > LLM_MAX_PROMPT_TOKENS
+
+
+def _split_long_text(text, max_tokens):
+    """Split text that exceeds the budget on sentence boundaries, falling back to raw tokens."""
+    pieces, current, current_tokens = [], [], 0
+    for sentence in SENTENCE_PATTERN.split(text):
+        tokens = count_tokens(sentence)
+        if tokens > max_tokens:
+            ids = encoding.encode(sentence, disallowed_special=())
+            for i in range(0, len(ids), max_tokens):
+                pieces.append(encoding.decode(ids[i:i + max_tokens]))
+            continue
+        if current and current_tokens + tokens > max_tokens:
+            pieces.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(sentence)
+        current_tokens += tokens
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def chunk_turns(turns, max_tokens=LONG_TRANSCRIPT_CHUNK_TOKENS):
+    """Group whole speaker turns into transcript chunks of at most `max_tokens` tokens."""
+    chunks, current, current_tokens = [], [], 0
+    for turn in turns:
+        line = format_turn(turn)
+        tokens = count_tokens(line) + 1
+        if tokens > max_tokens:
+            # A single monologue longer than the budget is split by sentences
+            pieces = [dict(turn, text=piece) for piece in _split_long_text(turn["text"], max_tokens - 32)]
+        else:
+            pieces = [turn]
+        for piece in pieces:
+            line = format_turn(piece)
+            tokens = count_tokens(line) + 1
+            if current and current_tokens + tokens > max_tokens:
+                chunks.append("\n".join(current))
+                current, current_tokens = [], 0
+            current.append(line)
+            current_tokens += tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def _map(chunks, name, agenda, use_cache):
+    """Run the map prompt for every chunk concurrently; results keep the chunk order."""
+    focus = MAP_FOCUS[name]
+    futures = []
+    for i, chunk in enumerate(chunks):
+        prompt = MAP_PROMPT.format(part=i + 1, parts=len(chunks), focus=focus)
+        if name == "score" and agenda:
+            futures.append(map_executor.submit(query_nvidia_scoring_model, chunk, agenda, prompt, use_cache=use_cache))
+        else:
+            futures.append(map_executor.submit(query_nvidia_model, chunk, prompt, use_cache=use_cache))
+    notes = [future.result() for future in futures]
+    if any(note is None for note in notes):
+        raise RuntimeError(f"{notes.count(None)} of {len(notes)} map calls failed")
+    return notes
+
+
+def reduce_input(name, task_prompt, uses_agenda, transcript, agenda=None,
+                 speaker_segments=None, use_cache=True):
+    """
+    Map phase for a transcript too long for one prompt. Extracts artifact-specific notes from
+    each chunk of whole speaker turns concurrently; notes still over budget are condensed again.
+    Returns (ordered notes, reduce prompt) for the final call.
+    """
+    turns = speaker_segments if speaker_segments else parse_turns(transcript)
+    chunks = chunk_turns(turns)
+    print(f"Map-reduce for {name}: {count_tokens(transcript)} tokens in {len(chunks)} chunks")
+
+    notes = _map(chunks, name, agenda, use_cache)
+    combined = "\n\n".join(f"Part {i + 1}:\n{note}" for i, note in enumerate(notes))
+    for _ in range(MAX_REDUCE_ROUNDS):
+        if not needs_map_reduce(combined, task_prompt, agenda if uses_agenda else None):
+            break
+        previous_tokens = count_tokens(combined)
+        paragraphs = [{"speaker": None, "text": note} for note in notes]
+        notes = _map(chunk_turns(paragraphs), name, agenda, use_cache)
+        combined = "\n\n".join(f"Part {i + 1}:\n{note}" for i, note in enumerate(notes))
+        if count_tokens(combined) >= previous_tokens:
+            break
+
+    return combined, task_prompt + REDUCE_NOTE
+
+
+def map_reduce_artifact(name, task_prompt, uses_agenda, transcript, agenda=None,
+                        speaker_segments=None, use_cache=True):
+    """Generate an artifact for a long transcript: map (reduce_input), then the artifact prompt over the notes."""
+    combined, reduce_prompt = reduce_input(name, task_prompt, uses_agenda, transcript, agenda,
+                                           speaker_segments=speaker_segments, use_cache=use_cache)
+    if uses_agenda:
+        return query_nvidia_scoring_model(combined, agenda, reduce_prompt, use_cache=use_cache)
+    return query_nvidia_model(combined, reduce_prompt, use_cache=use_cache)
@@ -0,0 +1,607 @@
+import os, re, json, time, shutil, sqlite3, hashlib, threading
+import numpy as np
+import faiss
+from embedding_service import VectorStore, choose_index_type, make_index, supports_removal, train_index, search_params
+
+MEETING_INDEX_DIR = os.getenv("MEETING_INDEX_DIR", "meeting_index")
+MEETING_SOURCE = os.getenv("MEETING_SOURCE", "supabase")  # or "local" to run offline
+LOCAL_MEETINGS_PATH = os.getenv("LOCAL_MEETINGS_PATH", "sample_meetings.json")
+CURRENT_FILE = "CURRENT"
+CHUNKS_DB = "chunks.sqlite3"
+VECTORS_FILE = "vectors.f32"
+REBUILD_BATCH = 50_000
+CHUNK_COLUMNS = ("meeting_id", "type", "date", "title", "note_id", "timestamp",
+                 "start_seconds", "end_seconds", "speakers")
+REAL_COLUMNS = ("start_seconds", "end_seconds")  # offsets into the meeting audio, for deep links
+# One table shared by all checkpoints. A row is visible to checkpoint g when
+# added_gen <= g < removed_gen, so a checkpoint only writes the rows that changed.
+CHUNKS_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS chunks (
+    row_id INTEGER PRIMARY KEY,
+    id INTEGER NOT NULL,
+    doc_id TEXT NOT NULL,
+    {", ".join(f"{column} {'REAL' if column in REAL_COLUMNS else 'TEXT'}" for column in CHUNK_COLUMNS)},
+    text TEXT NOT NULL,
+    added_gen INTEGER NOT NULL,
+    removed_gen INTEGER
+);
+CREATE INDEX IF NOT EXISTS chunks_id ON chunks(id);
+CREATE INDEX IF NOT EXISTS chunks_added ON chunks(added_gen);
+CREATE INDEX IF NOT EXISTS chunks_removed ON chunks(removed_gen);
+CREATE INDEX IF NOT EXISTS chunks_doc ON chunks(doc_id);
+CREATE INDEX IF NOT EXISTS chunks_meeting ON chunks(meeting_id, date);
+CREATE INDEX IF NOT EXISTS chunks_type_date ON chunks(type, date);
+"""
+# Keyword (BM25) index over chunk text, kept in step with the chunks table by triggers
+CHUNKS_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(text, content='chunks', content_rowid='row_id');
+CREATE TRIGGER IF NOT EXISTS chunks_fts_insert AFTER INSERT ON chunks BEGIN
+    INSERT INTO chunks_fts(rowid, text) VALUES (new.row_id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS chunks_fts_delete AFTER DELETE ON chunks BEGIN
+    INSERT INTO chunks_fts(chunks_fts, rowid, text) VALUES ('delete', old.row_id, old.text);
+END;
+"""
+CHUNK_TYPES = ("transcript", "note")
+FILTER_KEYS = ("meeting_id", "type", "date_from", "date_to")
+RRF_K = 60  # reciprocal rank fusion constant; damps the weight of the very top ranks
+CANDIDATES_PER_RESULT = 4  # each retriever contributes k * this many ranked ids to the fusion
+
+
+class SupabaseSource:
+    """Meetings and notes from the Supabase tables the app writes to."""
+
+    def fetch(self):
+        from supabase import create_client
+        supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_ANON_KEY"))
+        meetings = supabase.table("meetings").select("id, title, transcript, date").execute().data
+        notes = supabase.table("notes").select("id, content, meeting_id, timestamp").execute().data
+        return meetings, notes
+
+
+class LocalJsonSource:
+    """Offline stand-in for Supabase: a JSON file with "meetings" and "notes" lists of the same rows."""
+
+    def __init__(self, path=LOCAL_MEETINGS_PATH):
+        self.path = path
+
+    def fetch(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data.get("meetings", []), data.get("notes", [])
+
+
+SOURCES = {
+    "supabase": SupabaseSource,
+    "local": LocalJsonSource,
+}
+
+
+def get_source(name=None):
+    name = name or MEETING_SOURCE
+    if name not in SOURCES:
+        raise ValueError(f"Unknown meeting source '{name}'. Available: {', '.join(SOURCES)}")
+    return SOURCES[name]()
+
+
+def build_documents(meetings, notes):
+    """One document per meeting transcript and per note, each with a stable doc_id."""
+    notes_by_meeting = {}
+    for note in notes:
+        notes_by_meeting.setdefault(note["meeting_id"], []).append(note)
+
+    documents = []
+    for m in meetings:
+        metadata_base = {
+            "meeting_id": m["id"],
+            "title": m["title"],
+            "date": m["date"]
+        }
+        if m["transcript"]:
+            documents.append({
+                "doc_id": f"meeting:{m['id']}:transcript",
+                "text": m["transcript"],
+                "metadata": {**metadata_base, "type": "transcript"}
+            })
+        for note in notes_by_meeting.get(m["id"], []):
+            if note["content"]:
+                documents.append({
+                    "doc_id": f"note:{note['id']}",
+                    "text": note["content"],
+                    "metadata": {**metadata_base, "type": "note", "note_id": note["id"],
+                                 "timestamp": note["timestamp"]}
+                })
+    return documents
+
+
+def content_hash(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(json.dumps(part, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def current_checkpoint(index_dir=MEETING_INDEX_DIR):
+    """Path of the checkpoint CURRENT points at, or None before the first build."""
+    pointer = os.path.join(index_dir, CURRENT_FILE)
+    if not os.path.exists(pointer):
+        return None
+    with open(pointer, "r", encoding="utf-8") as f:
+        return os.path.join(index_dir, json.load(f)["checkpoint"])
+
+
+def read_index(path, mmap=False):
+    if mmap:
+        try:
+            return faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            pass  # this index type can't be mapped; read it into memory
+    return faiss.read_index(path)
+
+
+def add_missing_columns(conn):
+    """Columns added to CHUNK_COLUMNS since the chunk table was created."""
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(chunks)")}
+    for column in CHUNK_COLUMNS:
+        if column not in existing:
+            conn.execute(f"ALTER TABLE chunks ADD COLUMN {column} {'REAL' if column in REAL_COLUMNS else 'TEXT'}")
+
+
+def chunk_value(column, value):
+    if value is None:
+        return None
+    return float(value) if column in REAL_COLUMNS else str(value)
+
+
+def filter_clause(filters, alias=""):
+    """SQL WHERE fragment and parameters for meeting_id / type / date_from / date_to filters."""
+    clauses, params = [], []
+    for key, value in (filters or {}).items():
+        if value is None or value == "":
+            continue
+        if key == "meeting_id":
+            clauses.append(f"{alias}meeting_id = ?")
+        elif key == "type":
+            clauses.append(f"{alias}type = ?")
+        elif key == "date_from":
+            clauses.append(f"{alias}date >= ?")
+        elif key == "date_to":
+            clauses.append(f"{alias}date <= ?")
+        else:
+            raise ValueError(f"Unknown filter '{key}'. Available: {', '.join(FILTER_KEYS)}")
+        params.append(str(value))
+    return " AND ".join(clauses), params
+
+
+def fts_query(text):
+    """OR of the quoted terms in `text`, so punctuation (ticket ids, dates) can't break the MATCH syntax."""
+    terms = re.findall(r"\w+", text.lower())
+    return " OR ".join(f'"{term}"' for term in dict.fromkeys(terms))
+
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """Merge ranked id lists: each id scores sum(1 / (k + rank)) over the lists it appears in."""
+    scores = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class IndexSnapshot:
+    """
+    One immutable checkpoint opened for querying: the faiss index (memory-mapped where the
+    index type allows) and a connection per thread to the chunk table, reading only the
+    rows visible at this checkpoint's generation. Nothing a snapshot sees changes after it
+    is opened, so any number of queries can use it without locking.
+
+    Checkpoints written before the shared chunk table carry their own chunks.sqlite3,
+    which is read as-is: metadata columns it lacks come back unset, and without a
+    keyword index (chunks_fts) hybrid search falls back to dense retrieval alone.
+    """
+
+    def __init__(self, checkpoint_dir):
+        self.checkpoint_dir = checkpoint_dir
+        self.index = read_index(os.path.join(checkpoint_dir, "index.faiss"), mmap=True)
+        with open(os.path.join(checkpoint_dir, "state.json"), "r", encoding="utf-8") as f:
+            state = json.load(f)
+        self.generation = state["generation"]
+        self.num_docs = len(state["docs"])
+        legacy_db = os.path.join(checkpoint_dir, CHUNKS_DB)
+        self.legacy = os.path.exists(legacy_db)
+        db_path = legacy_db if self.legacy else os.path.join(os.path.dirname(checkpoint_dir), CHUNKS_DB)
+        self.db_uri = f"file:{os.path.abspath(db_path)}"
+        self.rowid_column = "id" if self.legacy else "row_id"
+        self.local = threading.local()
+        existing = {row[1] for row in self.db().execute("PRAGMA table_info(chunks)")}
+        self.columns = [column for column in CHUNK_COLUMNS if column in existing]
+        self.has_fts = self.db().execute("SELECT 1 FROM sqlite_master WHERE name = 'chunks_fts'").fetchone() is not None
+        if self.legacy and (not self.has_fts or len(self.columns) < len(CHUNK_COLUMNS)):
+            print(f"{checkpoint_dir} predates part of the chunk schema "
+                  f"(keyword index: {self.has_fts}, missing columns: {sorted(set(CHUNK_COLUMNS) - existing)})")
+
+    def visible(self, alias=""):
+        """WHERE fragment and parameters selecting the rows this snapshot's generation sees."""
+        if self.legacy:
+            return "1", []
+        return (f"{alias}added_gen <= ? AND ({alias}removed_gen IS NULL OR {alias}removed_gen > ?)",
+                [self.generation, self.generation])
+
+    @property
+    def ntotal(self):
+        return int(self.index.ntotal)
+
+    def db(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_uri, uri=True, check_same_thread=False)
+            self.local.conn = conn
+        return conn
+
+    def search(self, vectors, k, candidate_ids=None):
+        """
+        (scores, chunk ids) for each query vector; missing results have id -1. With
+        `candidate_ids`, only those chunks are considered (faiss skips the rest while
+        searching rather than results being filtered afterwards).
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if candidate_ids is None:
+            return self.index.search(vectors, k)
+        selector = faiss.IDSelectorBatch(np.asarray(candidate_ids, dtype=np.int64))
+        return self.index.search(vectors, k, params=search_params(self.index, selector))
+
+    def candidate_ids(self, filters):
+        """Ids of the chunks matching `filters`, or None when nothing is filtered."""
+        where, params = filter_clause(filters)
+        if not where:
+            return None
+        visible, visible_params = self.visible()
+        rows = self.db().execute(f"SELECT id FROM chunks WHERE {visible} AND {where}",
+                                 visible_params + params).fetchall()
+        return [row[0] for row in rows]
+
+    def keyword_search(self, text, k, filters=None):
+        """Chunk ids ranked by BM25 over the chunk text, restricted by `filters`."""
+        match = fts_query(text)
+        if not match or not self.has_fts:
+            return []
+        where, params = filter_clause(filters, alias="c.")
+        visible, visible_params = self.visible(alias="c.")
+        rows = self.db().execute(
+            f"SELECT c.id FROM chunks_fts JOIN chunks c ON c.{self.rowid_column} = chunks_fts.rowid "
+            f"WHERE chunks_fts MATCH ? AND {visible} {'AND ' + where if where else ''} "
+            "ORDER BY bm25(chunks_fts) LIMIT ?", [match, *visible_params, *params, k]).fetchall()
+        return [row[0] for row in rows]
+
+    def hybrid_search(self, query_vector, text, k, filters=None):
+        """
+        Top `k` chunk ids from dense and BM25 retrieval merged by reciprocal rank fusion.
+        Filters are resolved to candidate ids first, so both retrievers only ever look at
+        matching chunks.
+        """
+        candidates = self.candidate_ids(filters)
+        if candidates is not None and not candidates:
+            return []
+        depth = k * CANDIDATES_PER_RESULT
+        _, I = self.search(query_vector, min(depth, len(candidates)) if candidates else depth, candidates)
+        dense = [int(i) for i in I[0] if i != -1]
+        return reciprocal_rank_fusion([dense, self.keyword_search(text, depth, filters)])[:k]
+
+    def fetch(self, chunk_ids):
+        """Chunks for `chunk_ids`, in the same order; unknown ids are skipped."""
+        ids = [int(i) for i in chunk_ids if i != -1]
+        if not ids:
+            return []
+        visible, visible_params = self.visible()
+        rows = self.db().execute(
+            f"SELECT id, doc_id, {', '.join(self.columns)}, text FROM chunks "
+            f"WHERE id IN ({', '.join('?' * len(ids))}) AND {visible}", ids + visible_params).fetchall()
+        by_id = {}
+        for row in rows:
+            metadata = {column: value for column, value in zip(self.columns, row[2:-1]) if value is not None}
+            by_id[row[0]] = {"id": row[0], "doc_id": row[1], "metadata": metadata, "text": row[-1]}
+        return [by_id[i] for i in ids if i in by_id]
+
+
+class ResidentIndex:
+    """
+    Keeps the current snapshot loaded for the life of the process. snapshot() costs one
+    stat of CURRENT, so queries never wait on a rebuild; when CURRENT has been replaced
+    (by this process or any other writer) the new checkpoint is opened off to the side
+    and the reference swapped in one assignment. Queries already running finish on the
+    snapshot they started with (the writer keeps the previous checkpoint on disk for them).
+    """
+
+    def __init__(self, index_dir=MEETING_INDEX_DIR):
+        self.index_dir = index_dir
+        self.current = None
+        self.pointer_state = None  # (inode, mtime) of the CURRENT file the snapshot came from
+        self.lock = threading.Lock()
+
+    def _pointer_state(self):
+        try:
+            st = os.stat(os.path.join(self.index_dir, CURRENT_FILE))
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns
+
+    def snapshot(self):
+        if self._pointer_state() != self.pointer_state:
+            with self.lock:
+                if self._pointer_state() != self.pointer_state:
+                    self._swap()
+        return self.current
+
+    def reload(self):
+        with self.lock:
+            self._swap()
+
+    def _swap(self):
+        self.pointer_state = self._pointer_state()
+        checkpoint = current_checkpoint(self.index_dir)
+        if checkpoint is None:
+            return
+        if self.current is not None and self.current.checkpoint_dir == checkpoint:
+            return
+        snapshot = IndexSnapshot(checkpoint)
+        self.current = snapshot
+        print(f"Meeting index snapshot {snapshot.generation} loaded: {snapshot.ntotal} chunks")
+
+
+class MeetingIndex:
+    """
+    Incrementally maintained vector index over meeting documents (the writer side;
+    queries go through ResidentIndex).
+
+    Vectors are searched by inner product (embeddings are L2-normalized, so scores are
+    cosine similarities) and keyed by a stable int64 chunk id. The index type follows the
+    corpus size (see choose_index_type): exact while small, quantized as it grows. Each
+    document is
+    tracked by a hash of its text and metadata: unchanged documents are skipped, changed
+    ones are re-chunked and only chunks whose text is new get embedded (in batches, never
+    the whole corpus at once), and documents that disappeared from the source have their
+    vectors removed. Every embedded vector is also kept in the vector store, so switching
+    or retraining the index type is a rebuild from disk rather than a re-embed.
+
+    Layout inside `index_dir`:
+      CURRENT               - {"checkpoint": "checkpoint-<n>"}
+      vectors.f32           - vector store, row = chunk id (writer only)
+      chunks.sqlite3        - chunk text and metadata columns for every checkpoint (WAL);
+                              each row records the generations it is visible in
+      checkpoint-<n>/       - index.faiss and state.json (per-document hashes and chunk
+                              ids, next id)
+
+    A checkpoint is fully written before CURRENT is swapped to it, so a crash mid-update
+    leaves the previous checkpoint in place. Only the changed rows of the chunk table are
+    written: replaced rows are marked removed as of the new generation rather than
+    deleted, so the previous checkpoint still sees them. The previous checkpoint (and its
+    rows) is kept until the next one replaces it, for queries still running against it.
+    """
+
+    def __init__(self, embedder, split, split_key="", index_dir=MEETING_INDEX_DIR, on_checkpoint=None):
+        self.embedder = embedder  # EmbeddingService: .dim and .encode_batches(texts)
+        self.dim = embedder.dim
+        self.split = split  # text -> list of {"text", <any CHUNK_COLUMNS>}
+        self.split_key = split_key  # identifies the chunking settings; changing it re-chunks every document
+        self.index_dir = index_dir
+        self.on_checkpoint = on_checkpoint
+        self.lock = threading.Lock()
+        os.makedirs(index_dir, exist_ok=True)
+        self.store = VectorStore(os.path.join(index_dir, VECTORS_FILE), self.dim)
+        self.index = None  # loaded on the first update, so query-only processes don't hold a copy
+        self.index_type = None
+        self.built_size = 0  # live chunks at the last rebuild; IVF centroids are trained on these
+        self.docs = {}
+        self.next_id = 0
+        self.generation = 0
+        self.retire_all = False  # the next checkpoint starts the chunk table over
+        self.loaded = False
+        self.db = None  # writer connection to the shared chunk table, opened on the first checkpoint
+
+    def _load(self):
+        self.loaded = True
+        checkpoint = current_checkpoint(self.index_dir)
+        if checkpoint is None:
+            return
+        with open(os.path.join(checkpoint, "state.json"), "r", encoding="utf-8") as f:
+            state = json.load(f)
+        self.generation = state["generation"]
+        self.retire_all = True
+        if not (os.path.exists(os.path.join(checkpoint, CHUNKS_DB))
+                or os.path.exists(os.path.join(self.index_dir, CHUNKS_DB))):
+            print(f"{checkpoint} predates the chunk table; rebuilding the meeting index from scratch")
+            return
+        if self.store.rows < state["next_id"]:
+            print(f"{checkpoint} predates the vector store; rebuilding the meeting index from scratch")
+            return
+        self.retire_all = False
+        self.index = read_index(os.path.join(checkpoint, "index.faiss"))
+        self.index_type = state.get("index_type", "flat")
+        self.built_size = state.get("built_size", 0)
+        self.docs = state["docs"]
+        self.next_id = state["next_id"]
+        print(f"Loaded meeting index: {len(self.docs)} documents, {self.index.ntotal} chunks ({self.index_type})")
+
+    def live_ids(self):
+        return sorted(chunk_id for doc in self.docs.values() for chunk_id, _ in doc["chunks"])
+
+    def _rebuild(self, index_type):
+        """Fresh index of `index_type` over every live chunk, read back from the vector store."""
+        ids = np.asarray(self.live_ids(), dtype=np.int64)
+        index = make_index(index_type, self.dim, len(ids))
+        if len(ids):
+            train_index(index, self.store, ids)
+            for start in range(0, len(ids), REBUILD_BATCH):
+                batch = ids[start:start + REBUILD_BATCH]
+                index.add_with_ids(self.store.read(batch), batch)
+        print(f"Rebuilt meeting index as {index_type}: {index.ntotal} chunks")
+        self.index = index
+        self.index_type = index_type
+        self.built_size = len(ids)
+
+    def _unload(self):
+        """Forget all in-memory state; the next update reloads it from CURRENT."""
+        self.index = None
+        self.index_type = None
+        self.built_size = 0
+        self.docs = {}
+        self.next_id = 0
+        self.generation = 0
+        self.retire_all = False
+        self.loaded = False
+
+    def update(self, documents):
+        """Bring the index in line with `documents` (the full current corpus). Returns counts."""
+        start_time = time.time()
+        with self.lock:
+            if not self.loaded:
+                self._load()
+            try:
+                stats, changed = self._apply(documents, start_time)
+            except BaseException:
+                # docs/next_id/index were changed ahead of the embeddings and checkpoint; if we
+                # kept them, the failed documents would count as unchanged next time
+                self._unload()
+                raise
+        if changed and self.on_checkpoint:
+            self.on_checkpoint()
+        return stats
+
+    def _apply(self, documents, start_time):
+        stats = {"unchanged": 0, "added": 0, "changed": 0, "removed": 0,
+                 "embedded_chunks": 0, "removed_chunks": 0}
+        seen = set()
+        new_texts, new_ids = [], []
+        rows, stale_ids = [], []
+
+        for doc in documents:
+            doc_id = doc["doc_id"]
+            seen.add(doc_id)
+            doc_hash = content_hash(doc["text"], doc["metadata"], self.split_key)
+            previous = self.docs.get(doc_id)
+            if previous and previous["hash"] == doc_hash:
+                stats["unchanged"] += 1
+                continue
+            stats["changed" if previous else "added"] += 1
+
+            # Chunks whose text survived the edit keep their id and vector
+            reusable = {}
+            for chunk_id, chunk_hash in previous["chunks"] if previous else []:
+                reusable.setdefault(chunk_hash, []).append(chunk_id)
+            chunks = []
+            for chunk in self.split(doc["text"]):
+                text = chunk["text"]
+                metadata = [chunk_value(column, chunk.get(column, doc["metadata"].get(column)))
+                            for column in CHUNK_COLUMNS]
+                chunk_hash = content_hash(text)
+                if reusable.get(chunk_hash):
+                    chunk_id = reusable[chunk_hash].pop()
+                else:
+                    chunk_id = self.next_id
+                    self.next_id += 1
+                    new_texts.append(text)
+                    new_ids.append(chunk_id)
+                rows.append((chunk_id, doc_id, *metadata, text))
+                chunks.append([chunk_id, chunk_hash])
+            for leftover in reusable.values():
+                stale_ids.extend(leftover)
+            self.docs[doc_id] = {"hash": doc_hash, "chunks": chunks}
+
+        for doc_id in [d for d in self.docs if d not in seen]:
+            stale_ids.extend(chunk_id for chunk_id, _ in self.docs.pop(doc_id)["chunks"])
+            stats["removed"] += 1
+
+        # Stay incremental unless the corpus outgrew the current index type, chunks must be
+        # removed from one that can't remove them (hnsw), or IVF centroids trained on a
+        # much smaller corpus have gone stale
+        total = sum(len(doc["chunks"]) for doc in self.docs.values())
+        index_type = choose_index_type(total)
+        rebuild = (self.index is None or index_type != self.index_type
+                   or (stale_ids and not supports_removal(self.index_type))
+                   or (index_type == "ivfpq" and total > 2 * self.built_size))
+        if stale_ids and not rebuild:
+            self.index.remove_ids(np.asarray(stale_ids, dtype=np.int64))
+        if new_texts:
+            # new_ids are consecutive, so each batch lands in one contiguous run of the store
+            print(f"Embedding {len(new_texts)} new chunks...")
+            for start, vectors in self.embedder.encode_batches(new_texts):
+                self.store.write(new_ids[start], vectors)
+                if not rebuild:
+                    self.index.add_with_ids(vectors, np.asarray(new_ids[start:start + len(vectors)], dtype=np.int64))
+        if rebuild:
+            self._rebuild(index_type)
+        stats["embedded_chunks"] = len(new_texts)
+        stats["index_type"] = self.index_type
+        stats["removed_chunks"] = len(stale_ids)
+
+        changed = bool(rows or stale_ids or rebuild)
+        if changed:
+            self._checkpoint(rows, stale_ids)
+        stats["total_chunks"] = int(self.index.ntotal)
+        stats["seconds"] = round(time.time() - start_time, 2)
+        print(f"Meeting index updated: {stats}")
+        return stats, changed
+
+    def _chunks_db(self):
+        """The shared chunk table, created (and filled from a pre-WAL checkpoint) on first use."""
+        if self.db is not None:
+            return self.db
+        path = os.path.join(self.index_dir, CHUNKS_DB)
+        fresh = not os.path.exists(path)
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(CHUNKS_SCHEMA + CHUNKS_FTS_SCHEMA)
+        add_missing_columns(conn)
+        previous = current_checkpoint(self.index_dir)
+        legacy = os.path.join(previous, CHUNKS_DB) if previous else None
+        if fresh and legacy and os.path.exists(legacy):
+            conn.execute("ATTACH DATABASE ? AS legacy", (legacy,))
+            existing = {row[1] for row in conn.execute("PRAGMA legacy.table_info(chunks)")}
+            columns = ", ".join(["id", "doc_id"] + [c for c in CHUNK_COLUMNS if c in existing] + ["text"])
+            with conn:
+                conn.execute(f"INSERT INTO chunks ({columns}, added_gen) SELECT {columns}, ? FROM legacy.chunks",
+                             (self.generation,))
+            conn.execute("DETACH DATABASE legacy")
+            print(f"Moved the chunk table of {previous} into {path}")
+        self.db = conn
+        return conn
+
+    def _checkpoint(self, rows, stale_ids):
+        generation = self.generation + 1
+        name = f"checkpoint-{generation}"
+        tmp_dir = os.path.join(self.index_dir, f".{name}.tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        conn = self._chunks_db()
+        with conn:
+            # Rows of a checkpoint that crashed before becoming current
+            conn.execute("DELETE FROM chunks WHERE added_gen > ?", (self.generation,))
+            conn.execute("UPDATE chunks SET removed_gen = NULL WHERE removed_gen > ?", (self.generation,))
+            if self.retire_all:
+                conn.execute("UPDATE chunks SET removed_gen = ? WHERE removed_gen IS NULL", (generation,))
+            conn.executemany("UPDATE chunks SET removed_gen = ? WHERE id = ? AND removed_gen IS NULL",
+                             [(generation, int(i)) for i in stale_ids] + [(generation, row[0]) for row in rows])
+            conn.executemany(
+                f"INSERT INTO chunks (id, doc_id, {', '.join(CHUNK_COLUMNS)}, text, added_gen) "
+                f"VALUES ({', '.join('?' * (len(CHUNK_COLUMNS) + 4))})", [(*row, generation) for row in rows])
+            # Only the current and new checkpoints are still on disk to read these
+            conn.execute("DELETE FROM chunks WHERE removed_gen <= ?", (self.generation,))
+
+        faiss.write_index(self.index, os.path.join(tmp_dir, "index.faiss"))
+        with open(os.path.join(tmp_dir, "state.json"), "w", encoding="utf-8") as f:
+            json.dump({"generation": generation, "next_id": self.next_id, "index_type": self.index_type,
+                       "built_size": self.built_size, "docs": self.docs}, f)
+        # A leftover from a crash between this rename and the pointer swap is never current
+        shutil.rmtree(os.path.join(self.index_dir, name), ignore_errors=True)
+        os.replace(tmp_dir, os.path.join(self.index_dir, name))
+
+        pointer = os.path.join(self.index_dir, CURRENT_FILE)
+        with open(f"{pointer}.tmp", "w", encoding="utf-8") as f:
+            json.dump({"checkpoint": name}, f)
+        os.replace(f"{pointer}.tmp", pointer)
+
+        # Keep the checkpoint just replaced for queries still using it; drop the one before
+        shutil.rmtree(os.path.join(self.index_dir, f"checkpoint-{self.generation - 1}"), ignore_errors=True)
+        self.generation = generation
+        self.retire_all = False
@@ -0,0 +1,96 @@
+import os, threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import asr_worker
+from audio_ingest import load_pcm
+
+SAMPLE_RATE = 16000
+PARALLEL_ASR_CHUNK_SECONDS = float(os.getenv("PARALLEL_ASR_CHUNK_SECONDS", 30))
+# How far either side of a nominal boundary to look for a pause to cut at
+PARALLEL_ASR_SEARCH_SECONDS = float(os.getenv("PARALLEL_ASR_SEARCH_SECONDS", 5))
+# Shorter recordings are not worth the fan-out
+PARALLEL_ASR_MIN_SECONDS = float(os.getenv("PARALLEL_ASR_MIN_SECONDS", 120))
+PARALLEL_ASR_WORKERS = int(os.getenv("PARALLEL_ASR_WORKERS", 0)) or os.cpu_count() or 1
+FRAME_SECONDS = 0.03
+SMOOTHING_FRAMES = 10  # ~300 ms, so a cut lands inside a pause rather than between two syllables
+
+_pools = {}
+_pools_lock = threading.Lock()
+# Spawned workers import only asr_worker (and re-run the main script, which is why app.py is kept bare)
+mp_context = multiprocessing.get_context("spawn")
+
+
+def find_split_points(audio, sr=SAMPLE_RATE, chunk_seconds=PARALLEL_ASR_CHUNK_SECONDS,
+                      search_seconds=PARALLEL_ASR_SEARCH_SECONDS):
+    """
+    Sample offsets to cut `audio` at, roughly every `chunk_seconds`. Each cut is moved to the
+    quietest ~300 ms stretch within `search_seconds` of the nominal boundary, so words are not
+    split. Only the search windows are scanned, never the whole buffer.
+    """
+    frame = int(sr * FRAME_SECONDS)
+    chunk = int(sr * chunk_seconds)
+    search = int(sr * search_seconds)
+    splits = [0]
+    while len(audio) - splits[-1] > chunk + search:
+        target = splits[-1] + chunk
+        lo, hi = max(splits[-1] + frame, target - search), min(len(audio), target + search)
+        window = audio[lo:hi]
+        n_frames = len(window) // frame
+        if n_frames <= SMOOTHING_FRAMES:
+            splits.append(target)
+            continue
+        frames = window[:n_frames * frame].reshape(n_frames, frame)
+        energy = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+        smoothed = np.convolve(energy, np.ones(SMOOTHING_FRAMES) / SMOOTHING_FRAMES, mode="valid")
+        quietest = int(np.argmin(smoothed)) + SMOOTHING_FRAMES // 2
+        splits.append(lo + quietest * frame)
+    splits.append(len(audio))
+    return splits
+
+
+def get_pool(model_size, compute_type="int8", workers=PARALLEL_ASR_WORKERS):
+    """Process pool with one preloaded model per worker, kept alive between calls."""
+    key = (model_size, compute_type, workers)
+    with _pools_lock:
+        if key not in _pools:
+            cpu_threads = max(1, (os.cpu_count() or 1) // workers)
+            print(f"Starting {workers} ASR workers ({model_size}, {compute_type}, {cpu_threads} threads each)")
+            _pools[key] = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=mp_context,
+                initializer=asr_worker.init_worker,
+                initargs=(model_size, compute_type, cpu_threads))
+        return _pools[key]
+
+
+def transcribe_parallel(audio, model_size, compute_type="int8", workers=PARALLEL_ASR_WORKERS,
+                        on_stage=None, **transcribe_kwargs):
+    """
+    Transcribe a long recording by cutting it at pauses and decoding the chunks across a pool
+    of faster-whisper processes. `audio` is a file path or a 16 kHz mono float32 array.
+    Returns (start, end, text) tuples in order, with timestamps relative to the whole recording.
+    """
+    if isinstance(audio, str):
+        audio = load_pcm(audio, sample_rate=SAMPLE_RATE)
+    splits = find_split_points(audio)
+    pool = get_pool(model_size, compute_type, workers)
+    print(f"Transcribing {len(audio) / SAMPLE_RATE:.0f}s of audio in {len(splits) - 1} chunks")
+
+    futures = {}
+    for i, (start, end) in enumerate(zip(splits[:-1], splits[1:])):
+        future = pool.submit(asr_worker.transcribe_chunk, audio[start:end], start / SAMPLE_RATE, transcribe_kwargs)
+        futures[future] = i
+
+    results = [None] * len(futures)
+    try:
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+            if on_stage:
+                on_stage("transcribing")  # lets a job be cancelled between chunks
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
+
+    return [segment for chunk_segments in results for segment in chunk_segments]
@@ -0,0 +1,129 @@
+# Task prompts for the meeting artifacts generated by llm_generate
+
+SUMMARY_PROMPT = """You are an AI assistant designed to process meeting transcripts and generate clear, concise summaries that can be shared with team members or stakeholders. 
+    The goal is to highlight key discussion points, decisions made, and important context without including unnecessary dialogue or filler content.
+    Please read the entire transcript carefully and generate a structured, high-quality summary with the following guidelines: 
+    Instructions:
+    1. Concise & Clear: Use professional and simple language suitable for internal communication.
+    2. Avoid:
+    - Word-for-word repetition from the transcript
+    - Including non-meaningful small talk
+    - Naming participants unless relevant to the summary
+    3. Assume Context: If roles (e.g., PM, developer) or project names are mentioned, interpret them accordingly without over-explaining.
+    
+    Below is the transcript of a meeting: """
+
+ACTION_ITEMS_PROMPT = """You are an AI assistant that analyzes meeting transcripts and extracts clear, concise, actionable items(task or decision) from the meeting. 
+    Your task is to identify all responsibilities, next steps, or tasks discussed in the meeting, even if they were informally mentioned.
+    Please read the entire transcript carefully and generate a list of Action Items based on what was discussed.
+    Instructions:
+    1. Clarity: Each action item should be clear and specific, even if the task was mentioned casually or indirectly.
+    4. Output format: Use bullet points with each bullet being a specific task or decision.
+    5. Avoid:
+    - Repeating general discussion points.
+    - Listing vague or unconfirmed suggestions.
+    
+    Below is the transcript of a meeting: """
+
+MINUTES_OF_MEETING_PROMPT = """You are an AI assistant responsible for generating formal "Minutes of Meeting (MoM)" from raw meeting transcripts. The minutes should capture all critical information in a structured, professional format suitable for sharing with internal and external stakeholders.
+    Your output must follow official meeting minutes formatting and provide a clear record of what happened, who attended, what was discussed, and the decisions and action items that resulted.
+    ---
+    Instructions:
+    Generate the Minutes of Meeting from the transcript below, using the following format and guidelines:
+    ---
+    ###Format for Minutes of Meeting:
+    *Meeting Title*: <Use a title based on the transcript, or default to “Project Status Meeting”>  
+    *Date*: <Infer or leave blank if not available>  
+    *Time*: <Optional - include if present in transcript>  
+    *Attendees*: <List names/roles if mentioned; otherwise mark as “Not Specified”>  
+    *Prepared By*: AI Assistant
+    ---
+    ### Agenda:  
+    <Write 1-5 bullet points summarizing the key topics intended for discussion>
+    ---
+    ### Discussion Summary:
+    <Summary of key discussion>  
+    ---
+    ### Decisions Made:
+    - <Decision 1>
+    - <Decision 2>
+    ---
+    ### Action Items:
+    - <Action Item 1>
+    - <Action Item 2>
+    ---
+
+    Below is the transcript of a meeting: 
+    """
+
+SENTIMENT_PROMPT = """You are an AI assistant tasked with analyzing a meeting transcript and performing sentiment analysis. 
+    Your goal is to assess the overall tone and emotional content of the conversation, identify individual sentiments where appropriate, and highlight moments of tension, enthusiasm, disagreement, or positive alignment.
+    ---
+    ### Instructions:
+    Analyze the meeting transcript and output the sentiment insights in the following structured format:
+    ---
+    ### Sentiment Analysis Output:
+    **1. Overall Sentiment**:  
+    - <Summary of the general mood of the meeting: Positive / Neutral / Negative>  
+    - <1-2 lines explaining why>
+
+    **2. Sentiment by Topic**:  
+    List key topics discussed and the sentiment expressed around each topic.
+    Example:
+    | Topic                       | Sentiment  | Reasoning / Evidence from Transcript               |
+    |-----------------------------|------------|----------------------------------------------------|
+    | Project deadline extension  | Negative   | Team expressed frustration over delays             |
+    | Product demo feedback       | Positive   | Participants were pleased with the client's input  |
+    | Budget concerns             | Neutral    | Discussed constructively, without strong emotions  |
+
+    **3. Sentiment by Speaker (if applicable)**:  
+    If speakers are identified in the transcript, summarize the emotional tone of their contributions.
+    Example:
+    | Speaker        | Sentiment  | Notes                                               |
+    |----------------|------------|-----------------------------------------------------|
+    | Alice (PM)     | Neutral    | Focused on timelines and task tracking              |
+    | Bob (Dev)     | Negative   | Expressed concern about workload and deadlines      |
+
+    ---
+    ### Guidelines:
+    - Be objective and context-aware; do not misinterpret sarcasm or polite disagreement.
+    - If the tone shifts during the meeting, capture those shifts clearly.
+    - Assume a business meeting setting with professional language.
+    ---
+
+    Below is the transcript of a meeting: 
+    """
+
+SCORING_PROMPT = """You are an AI assistant that evaluates the quality and focus of meetings based on how well they align with the stated agenda. 
+    Your job is to analyze a meeting transcript and provide a "Meeting Score" between 0 and 10, along with a breakdown and justification.
+    ---
+    ### Instructions:
+    Using the transcript and agenda provided below, evaluate the meeting on the following criteria:
+    ### Scoring Criteria (Total: 10 Points):
+    1. **Agenda Coverage** (4 points)  
+    - Were all agenda topics addressed?  
+    - Were they discussed in reasonable depth?
+    2. **Focus and Relevance** (2 points)  
+    - Did the discussion stay on topic?  
+    - Was there minimal unrelated chatter or tangents?
+    3. **Time Management & Flow** (2 points)  
+    - Was the time spent proportionate across topics?  
+    - Was there a logical flow to the discussion?
+    4. **Clarity of Outcomes** (2 points)  
+    - Were conclusions or next steps clearly stated for each agenda item?
+    ---
+
+    ### Output Format:
+    **Meeting Score**: X / 10  
+    **Verdict**: <One-liner summary, e.g., “Mostly aligned with agenda, but had off-topic digressions.”>
+    **Breakdown**:  
+    - **Agenda Coverage**: X/4 - <Brief explanation>  
+    - **Focus and Relevance**: X/2 - <Brief explanation>  
+    - **Time Management & Flow**: X/2 - <Brief explanation>  
+    - **Clarity of Outcomes**: X/2 - <Brief explanation>
+    **Suggestions for Improvement**:  
+    - <Actionable tips to improve agenda alignment in future meetings>
+    ---
+
+    Below is the transcript of a meeting: 
+    """
@@ -0,0 +1,223 @@
+import os, time, heapq, itertools, threading
+from collections import deque
+from contextlib import contextmanager
+import requests
+import http_client
+
+# Lower runs first: someone waiting on /query or a token stream beats a batch MoM job
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+# Per provider: concurrent requests, requests per minute, tokens per minute (0 = unlimited)
+PROVIDER_LIMITS = {
+    "nvidia": {
+        "max_in_flight": int(os.getenv("NVIDIA_MAX_IN_FLIGHT", 8)),
+        "rpm": int(os.getenv("NVIDIA_RPM", 40)),
+        "tpm": int(os.getenv("NVIDIA_TPM", 0)),
+    },
+    "groq": {
+        "max_in_flight": int(os.getenv("GROQ_MAX_IN_FLIGHT", 4)),
+        "rpm": int(os.getenv("GROQ_RPM", 30)),
+        "tpm": int(os.getenv("GROQ_TPM", 6000)),
+    },
+}
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", 60))  # longest a request waits for admission
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", 100))  # waiting requests per provider before rejecting outright
+COMPLETION_TOKENS_ESTIMATE = 256  # counted against TPM up front, on top of the prompt
+WAIT_WINDOW = 1000  # recent admission waits kept for percentiles
+
+
+class UpstreamRateLimited(Exception):
+    """An LLM call couldn't be admitted in time, or the provider itself answered 429."""
+
+    def __init__(self, provider, retry_after, message=None):
+        super().__init__(message or f"{provider} is rate limited; retry in {retry_after}s")
+        self.provider = provider
+        self.retry_after = max(1, int(retry_after + 0.999))
+
+
+def estimate_tokens(text, completion_tokens=COMPLETION_TOKENS_ESTIMATE):
+    """Rough token count for budgeting (about 4 characters per token) plus the expected reply."""
+    return len(text or "") // 4 + completion_tokens
+
+
+class TokenBucket:
+    """`per_minute` units, refilled continuously; a full minute's worth can be spent at once."""
+
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = float(per_minute)
+        self.updated = time.time()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until(self, amount, now):
+        """Seconds until `amount` can be taken (0 if now); requests over capacity wait for a full bucket."""
+        if not self.capacity:
+            return 0.0
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.level) / self.rate)
+
+    def take(self, amount):
+        if self.capacity:
+            self.level -= min(amount, self.capacity)
+
+
+class ProviderLimiter:
+    """
+    Admission control for one provider. Requests wait in a priority queue (FIFO within a
+    priority) and only the head of the queue is admitted, once there is a free in-flight
+    slot and both the request and token buckets can cover it. A 429 from the provider
+    pauses admission for its Retry-After. Waiting longer than the queue timeout, or
+    arriving to a full queue, raises UpstreamRateLimited.
+    """
+
+    def __init__(self, name, max_in_flight, rpm, tpm):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.condition = threading.Condition()
+        self.queue = []  # heap of (priority, arrival)
+        self.arrivals = itertools.count()
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.admitted = 0
+        self.rejected = 0
+        self.upstream_429s = 0
+        self.max_queue_depth = 0
+        self.waits = deque(maxlen=WAIT_WINDOW)
+
+    def _admission_delay(self, tokens, now):
+        return max(self.paused_until - now, self.requests.time_until(1, now), self.tokens.time_until(tokens, now))
+
+    def acquire(self, tokens, priority=PRIORITY_BATCH, timeout=LLM_QUEUE_TIMEOUT):
+        """Block until admitted; returns the seconds spent waiting."""
+        started = time.time()
+        with self.condition:
+            if len(self.queue) >= LLM_MAX_QUEUE:
+                self.rejected += 1
+                raise UpstreamRateLimited(self.name, self._admission_delay(tokens, started) or 1,
+                                          f"Too many {self.name} requests waiting")
+            ticket = (priority, next(self.arrivals))
+            heapq.heappush(self.queue, ticket)
+            self.max_queue_depth = max(self.max_queue_depth, len(self.queue))
+            try:
+                while True:
+                    now = time.time()
+                    delay = None  # wait to be notified: not at the head, or no free slot
+                    if self.queue[0] == ticket and self.in_flight < self.max_in_flight:
+                        delay = self._admission_delay(tokens, now)
+                        if delay <= 0:
+                            heapq.heappop(self.queue)
+                            self.requests.take(1)
+                            self.tokens.take(tokens)
+                            self.in_flight += 1
+                            self.admitted += 1
+                            self.waits.append(now - started)
+                            self.condition.notify_all()  # the next head may be admissible too
+                            return now - started
+                    remaining = started + timeout - now
+                    if remaining <= 0:
+                        self.rejected += 1
+                        raise UpstreamRateLimited(self.name, delay or 1,
+                                                  f"Timed out waiting {timeout:g}s for a {self.name} slot")
+                    self.condition.wait(min(delay, remaining) if delay else remaining)
+            except BaseException:
+                if ticket in self.queue:
+                    self.queue.remove(ticket)
+                    heapq.heapify(self.queue)
+                    self.condition.notify_all()
+                raise
+
+    def release(self):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def throttled(self, retry_after):
+        """The provider answered 429 anyway: hold everyone back for `retry_after` seconds."""
+        with self.condition:
+            self.upstream_429s += 1
+            self.paused_until = max(self.paused_until, time.time() + retry_after)
+
+    def stats(self):
+        with self.condition:
+            waits = sorted(self.waits)
+            stats = {"in_flight": self.in_flight, "max_in_flight": self.max_in_flight,
+                     "queue_depth": len(self.queue), "max_queue_depth": self.max_queue_depth,
+                     "admitted": self.admitted, "rejected": self.rejected,
+                     "upstream_429s": self.upstream_429s,
+                     "paused_for": round(max(0.0, self.paused_until - time.time()), 1)}
+        if waits:
+            stats["wait_ms"] = {
+                "mean": round(1000 * sum(waits) / len(waits), 1),
+                "p95": round(1000 * waits[min(len(waits) - 1, int(len(waits) * 0.95))], 1),
+                "max": round(1000 * waits[-1], 1),
+            }
+        return stats
+
+
+limiters = {name: ProviderLimiter(name, **limits) for name, limits in PROVIDER_LIMITS.items()}
+
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get("Retry-After", 5))
+    except ValueError:
+        return 5
+
+
+@contextmanager
+def admitted_request(provider, prompt, send, priority=PRIORITY_BATCH, retries=http_client.HTTP_MAX_RETRIES):
+    """
+    Make one LLM call under admission and yield its response, holding the slot until the
+    block exits (including a streamed reply). `send` makes a single attempt (an
+    http_client call with retries=0). Retries happen here instead: the slot is given back
+    during the backoff and every attempt queues for admission again, so retries count
+    against the provider's limits and a 429 pauses admission before anyone else sends.
+    Retried, like any POST, only when the request never reached the provider or was
+    turned away with 429/503. A 429 on the last attempt raises UpstreamRateLimited.
+    """
+    limiter = limiters[provider]
+    tokens = estimate_tokens(prompt)
+    attempt = 0
+    while True:
+        limiter.acquire(tokens, priority)
+        try:
+            try:
+                response = send()
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= retries or not http_client.never_sent(e):
+                    raise
+                delay = http_client.backoff_delay(attempt)
+                print(f"{provider} request failed ({e.__class__.__name__}); retry {attempt + 1} in {delay:.1f}s")
+            else:
+                if response.status_code == 429:
+                    retry_after = _retry_after(response)
+                    limiter.throttled(retry_after)
+                    response.close()
+                    if attempt >= retries:
+                        raise UpstreamRateLimited(provider, retry_after)
+                    delay = 0  # the pause just set holds the next acquire back
+                    print(f"{provider} returned 429; retry {attempt + 1} after {retry_after:g}s")
+                elif response.status_code == 503 and attempt < retries:
+                    delay = http_client.backoff_delay(attempt, response)
+                    response.close()
+                    print(f"{provider} returned 503; retry {attempt + 1} in {delay:.1f}s")
+                else:
+                    with response:
+                        yield response
+                    return
+        finally:
+            limiter.release()
+        time.sleep(delay)
+        attempt += 1
+
+
+def stats():
+    return {name: limiter.stats() for name, limiter in limiters.items()}
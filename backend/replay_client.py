@@ -0,0 +1,81 @@
+"""
+Replays a recording into a push live session as if it were a browser, for testing the
+live path without a microphone.
+
+    python replay_client.py meeting.wav
+    python replay_client.py meeting.wav --url http://127.0.0.1:5000 --speed 4 --reorder 3
+
+The file is decoded to 16 kHz mono and sent as pcm_s16le frames of --frame-ms, paced
+at --speed times real time. --reorder N shuffles frames within windows of N to exercise
+the jitter buffer. 429 responses are honoured by waiting Retry-After and resending.
+New transcript segments are printed as they are committed.
+"""
+import sys, time, random, argparse
+import numpy as np
+import requests
+from audio_ingest import load_pcm
+
+SAMPLE_RATE = 16000
+
+
+def send_frame(session, url, seq, payload):
+    while True:
+        response = session.post(url, params={"seq": seq}, data=payload,
+                                 headers={"Content-Type": "application/octet-stream"}, timeout=30)
+        if response.status_code != 429:
+            response.raise_for_status()
+            return response.json()
+        wait = float(response.headers.get("Retry-After", 1))
+        print(f"server busy, retrying frame {seq} in {wait:.0f}s")
+        time.sleep(wait)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("audio")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--frame-ms", type=int, default=100)
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--reorder", type=int, default=1)
+    args = parser.parse_args()
+
+    audio = load_pcm(args.audio, sample_rate=SAMPLE_RATE)
+    pcm = (np.clip(audio, -1, 1) * 32767).astype("<i2").tobytes()
+    frame_bytes = SAMPLE_RATE * args.frame_ms // 1000 * 2
+    frames = [pcm[i:i + frame_bytes] for i in range(0, len(pcm), frame_bytes)]
+
+    http = requests.Session()
+    created = http.post(f"{args.url}/live_sessions", json={"source": "push", "format": "pcm_s16le"}, timeout=30)
+    created.raise_for_status()
+    session_id = created.json()["session_id"]
+    audio_url = f"{args.url}/live_sessions/{session_id}/audio"
+    print(f"session {session_id}: sending {len(audio) / SAMPLE_RATE:.1f}s in {len(frames)} frames")
+
+    order = list(range(len(frames)))
+    for i in range(0, len(order), args.reorder):
+        window = order[i:i + args.reorder]
+        random.shuffle(window)
+        order[i:i + args.reorder] = window
+
+    next_seq = 0
+    started = time.time()
+    for sent, seq in enumerate(order):
+        # Pace on the frame's position in the recording
+        due = started + sent * args.frame_ms / 1000 / args.speed
+        time.sleep(max(0.0, due - time.time()))
+        send_frame(http, audio_url, seq, frames[seq])
+        if sent % 20 == 0:
+            status = http.get(f"{args.url}/live_sessions/{session_id}", params={"since": next_seq}, timeout=30).json()
+            for segment in status["segments"]:
+                print(f"[{segment['start']:.1f}-{segment['end']:.1f}] {segment['text']}")
+            next_seq = status["next_seq"]
+
+    stopped = http.post(f"{args.url}/live_sessions/{session_id}/stop", timeout=600)
+    stopped.raise_for_status()
+    result = stopped.json()
+    print(f"\nsent in {time.time() - started:.1f}s; final transcript ({result['audio_duration']:.1f}s of audio):")
+    print(result["transcript"])
+
+
+if __name__ == '__main__':
+    sys.exit(main())
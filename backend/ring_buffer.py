@@ -0,0 +1,89 @@
+import threading
+import numpy as np
+
+
+class AudioRingBuffer:
+    """
+    Preallocated float32 ring buffer with one writer and any number of named readers.
+    Positions are absolute sample counts, so each reader has its own cursor and sees
+    every sample exactly once. write() copies into the existing array and never
+    allocates. A reader that falls more than `capacity` samples behind loses its oldest
+    unread audio; the number of samples it lost is counted in `dropped`.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self.buffer = np.zeros(self.capacity, dtype=np.float32)
+        self.write_pos = 0
+        self.readers = {}
+        self.dropped = {}
+        self.closed = False
+        self.cond = threading.Condition()
+
+    def add_reader(self, name, from_start=False):
+        """Register a cursor at the current write position (or the oldest retained sample)."""
+        with self.cond:
+            start = max(0, self.write_pos - self.capacity) if from_start else self.write_pos
+            self.readers[name] = start
+            self.dropped[name] = 0
+
+    def write(self, samples):
+        n = len(samples)
+        if n > self.capacity:
+            samples = samples[-self.capacity:]
+            n = self.capacity
+        with self.cond:
+            start = self.write_pos % self.capacity
+            first = min(n, self.capacity - start)
+            self.buffer[start:start + first] = samples[:first]
+            if first < n:
+                self.buffer[:n - first] = samples[first:]
+            self.write_pos += n
+            oldest = self.write_pos - self.capacity
+            for name, pos in self.readers.items():
+                if pos < oldest:
+                    self.dropped[name] += oldest - pos
+                    self.readers[name] = oldest
+            self.cond.notify_all()
+
+    def close(self):
+        """No more writes; blocked readers return what is left."""
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def available(self, name):
+        with self.cond:
+            return self.write_pos - self.readers[name]
+
+    def wait(self, name, min_samples, timeout=None):
+        """Block until `min_samples` are unread (or the buffer is closed). Returns the unread count."""
+        with self.cond:
+            self.cond.wait_for(lambda: self.closed or self.write_pos - self.readers[name] >= min_samples,
+                               timeout)
+            return self.write_pos - self.readers[name]
+
+    def read_into(self, name, out):
+        """Copy up to len(out) unread samples into `out` and advance the cursor. Returns the count."""
+        with self.cond:
+            pos = self.readers[name]
+            n = min(len(out), self.write_pos - pos)
+            start = pos % self.capacity
+            first = min(n, self.capacity - start)
+            out[:first] = self.buffer[start:start + first]
+            if first < n:
+                out[first:n] = self.buffer[:n - first]
+            self.readers[name] = pos + n
+            return n
+
+    def read(self, name, max_samples=None):
+        """Return a new array with up to `max_samples` unread samples (all of them by default)."""
+        n = self.available(name)
+        if max_samples is not None:
+            n = min(n, max_samples)
+        out = np.empty(n, dtype=np.float32)
+        return out[:self.read_into(name, out)]
+
+    def position(self, name):
+        with self.cond:
+            return self.readers[name]
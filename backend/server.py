@@ -0,0 +1,864 @@
+from flask import (Flask, request, render_template, jsonify, send_file, send_from_directory, Response,
+                   stream_with_context, abort, make_response)
+import os, uuid, json, time
+import soundfile as sf
+from werkzeug.utils import secure_filename
+import threading
+from transcript_gen import diarize_and_transcribe, speaker_rec_and_transcribe, voiceprints
+from insights import ARTIFACTS, generate_artifact, stream_artifact, stream_meeting_insights
+from llm_generate import llm_cache
+import http_client
+import rate_limiter
+from rate_limiter import UpstreamRateLimited
+from chat import build_meeting_index, query_meeting_qa
+from meeting_index import FILTER_KEYS, CHUNK_TYPES
+from transcript_chunker import validate_turns
+from live_sessions import (ModelPool, SessionManager, SessionExists, TooManySessions,
+                           DEFAULT_SESSION_ID)
+from live_ingest import Backpressure, IngestError
+from jobs import JobQueue, QueueFull
+from audio_ingest import ingest_stream, find_artifact
+from chunked_upload import UploadManager, UploadError
+from transcription_backends import (poller, BACKENDS, TRANSCRIPTION_BACKEND, ASSEMBLYAI_WEBHOOK_SECRET,
+                                    WEBHOOK_AUTH_HEADER)
+from datetime import datetime
+from flask_cors import CORS
+import torch
+# print('GPU on mac? ', torch.backends.mps.is_available())  # True = Apple GPU available
+
+
+app = Flask(__name__)
+# CORS(app, origins=['http://localhost:3000'])
+CORS(app)
+
+# Configuration
+UPLOAD_FOLDER = 'uploads'
+PROCESSED_UPLOAD_FOLDER = 'processed_uploads'
+OUTPUT_FOLDER = 'outputs'
+LIVE_TRANSCRIPT_FOLDER = 'live_transcripts'
+LIVE_RECORDED_MEET_FOLDER = 'live_recorded_meet_audio'
+VOICE_SAMPLES = 'voice_samples'
+os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+os.makedirs(PROCESSED_UPLOAD_FOLDER, exist_ok=True)
+os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+os.makedirs(LIVE_TRANSCRIPT_FOLDER, exist_ok=True)
+os.makedirs(LIVE_RECORDED_MEET_FOLDER, exist_ok=True)
+os.makedirs(VOICE_SAMPLES, exist_ok=True)
+app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+LIVE_STREAM_HEARTBEAT_SECONDS = 15
+INGEST_FOLDERS = [PROCESSED_UPLOAD_FOLDER, UPLOAD_FOLDER, LIVE_RECORDED_MEET_FOLDER]
+
+stop_flag = threading.Event() # A flag to signal the transcription thread to stop
+transcription_thread = None
+live_model_pool = ModelPool()
+live_sessions = SessionManager(live_model_pool)
+# Load the live models in the background at startup, so the first live session doesn't wait
+# for them. Set LIVE_PRELOAD_MODELS=false where live transcription isn't used to save the memory.
+if os.getenv("LIVE_PRELOAD_MODELS", "true").lower() == "true":
+    threading.Thread(target=live_model_pool.start, daemon=True).start()
+job_queue = JobQueue()
+uploads = UploadManager()
+print('App started')
+
+
+@app.route('/')
+def index():
+    print('root route opened')
+    return render_template('index.html')
+
+def save_transcription_upload():
+    """
+    Save the uploaded meeting audio (and any voice samples) from the current request.
+    Returns (filepath, speaker_identification, None) or (None, None, error response).
+    """
+    backend = request.form.get('backend')
+    if backend and backend not in BACKENDS:
+        return None, None, (jsonify({"error": f"Unknown transcription backend: {backend}"}), 400)
+
+    # Check if speaker identification is requested. Validated before ingesting, so a bad
+    # request doesn't leave a decoded artifact behind
+    speaker_identification = request.form.get('speaker_identification') == 'true'
+    attendee_names = request.form.getlist('attendee_names')
+    samples = request.files.getlist('samples')
+    if speaker_identification and len(attendee_names) != len(samples):
+        return None, None, (jsonify({"error": "Mismatch in number of names and samples"}), 400)
+
+    artifact_id = request.form.get('artifact_id')
+    if artifact_id:
+        # Audio already ingested through /ingest
+        manifest = find_artifact(artifact_id, INGEST_FOLDERS)
+        if manifest is None:
+            return None, None, (jsonify({"error": "Unknown artifact_id"}), 404)
+        filepath = manifest["path"]
+    else:
+        if 'file' not in request.files:
+            return None, None, (jsonify({"error": "No file uploaded"}), 400)
+        file = request.files['file']
+        if file.filename == '':
+            return None, None, (jsonify({"error": "No file selected"}), 400)
+
+        # Determine save folder based on mode
+        mode = request.form.get('mode', 'upload')
+        if mode == 'record':
+            save_folder = LIVE_RECORDED_MEET_FOLDER
+        else:
+            save_folder = app.config['UPLOAD_FOLDER']
+
+        # Decode once, straight from the upload stream, into the 16 kHz mono artifact
+        try:
+            manifest = ingest_stream(file.stream, secure_filename(file.filename), save_folder)
+        except Exception as e:
+            return None, None, (jsonify({"error": f"Failed to decode audio: {e}"}), 400)
+        filepath = manifest["path"]
+        print(f'file ingested to {filepath}')
+
+    if speaker_identification:
+        enrolled = []
+        for name, sample in zip(attendee_names, samples):
+            sample_filename = secure_filename(f"{name}.wav")
+            sample_path = os.path.join(VOICE_SAMPLES, sample_filename)
+            sample.save(sample_path)
+            print(f"Saved sample for {name} at {sample_path}")
+            enrolled.append((name, sample_path))
+        # Only samples whose content changed get re-embedded
+        voiceprints.enroll_many(enrolled)
+
+    return filepath, speaker_identification, None
+
+
+def run_transcription(filepath, speaker_identification, backend=None, on_stage=None):
+    """Transcribe a saved upload and build the /transcribe response body."""
+    backend = backend or TRANSCRIPTION_BACKEND
+    if speaker_identification:
+        speaker_transcripts, transcription_time = speaker_rec_and_transcribe(filepath, backend=backend,
+                                                                             on_stage=on_stage)
+    else:
+        speaker_transcripts, transcription_time = diarize_and_transcribe(filepath, backend=backend,
+                                                                         on_stage=on_stage)
+
+    combined_transcript = "\n".join(
+        [f"[{seg['speaker']} - {seg['start']:.2f}s to {seg['end']:.2f}s]: {seg['text']}" for seg in speaker_transcripts])
+
+    return {
+        "transcript": combined_transcript,
+        "speaker_segments": speaker_transcripts,
+        "model": "whisper + diarization",
+        "backend": backend,
+        "transcription time": transcription_time
+    }
+
+
+# using whisper model
+@app.route('/transcribe', methods=['POST'])
+def transcribe():
+    print('upload route called')
+    filepath, speaker_identification, error = save_transcription_upload()
+    if error:
+        return error
+    return jsonify(run_transcription(filepath, speaker_identification, backend=request.form.get('backend')))
+
+
+# Raw request body (any format ffmpeg reads) -> 16 kHz mono artifact + manifest.
+# The returned id can be passed as artifact_id to /transcribe or /jobs/transcribe.
+@app.route('/ingest', methods=['POST'])
+def ingest():
+    filename = secure_filename(request.args.get('filename', ''))
+    if not filename:
+        return jsonify({"error": "filename query parameter is required"}), 400
+    try:
+        manifest = ingest_stream(request.stream, filename, PROCESSED_UPLOAD_FOLDER)
+    except Exception as e:
+        return jsonify({"error": f"Failed to decode audio: {e}"}), 400
+    return jsonify(manifest), 201
+
+
+# Same as /transcribe, but returns a job id immediately and runs on the job queue
+@app.route('/jobs/transcribe', methods=['POST'])
+def submit_transcription_job():
+    filepath, speaker_identification, error = save_transcription_upload()
+    if error:
+        return error
+    try:
+        job = job_queue.submit("transcribe", run_transcription, filepath, speaker_identification,
+                               backend=request.form.get('backend'))
+    except QueueFull as e:
+        return jsonify({"error": f"Too many pending jobs: {e}"}), 503
+    return jsonify(job.to_dict()), 202
+
+
+def run_uploaded_transcription(upload, speaker_identification, backend=None, on_stage=None):
+    """Job body for chunked uploads: wait for the last parts to decode, then transcribe."""
+    manifest = upload.wait(on_stage=on_stage)
+    return run_transcription(manifest["path"], speaker_identification, backend=backend, on_stage=on_stage)
+
+
+# Resumable chunked upload: POST /uploads -> PUT /uploads/<id>/parts/<n> (any order, retries ok)
+# -> POST /uploads/<id>/complete. Decoding starts as soon as part 0 arrives.
+@app.route('/uploads', methods=['POST'])
+def create_upload():
+    body = request.get_json(silent=True) or request.form
+    filename = secure_filename(body.get('filename', ''))
+    if not filename:
+        return jsonify({"error": "filename is required"}), 400
+    save_folder = LIVE_RECORDED_MEET_FOLDER if body.get('mode') == 'record' else app.config['UPLOAD_FOLDER']
+    upload = uploads.create(filename, save_folder)
+    return jsonify(upload.to_dict()), 201
+
+
+@app.route('/uploads/<upload_id>', methods=['GET'])
+def upload_status(upload_id):
+    upload = uploads.get(upload_id)
+    if upload is None:
+        return jsonify({"error": "Upload not found"}), 404
+    return jsonify(upload.to_dict())
+
+
+@app.route('/uploads/<upload_id>/parts/<int:part_number>', methods=['PUT'])
+def upload_part(upload_id, part_number):
+    upload = uploads.get(upload_id)
+    if upload is None:
+        return jsonify({"error": "Upload not found"}), 404
+    try:
+        written = upload.write_part(part_number, request.stream)
+    except UploadError as e:
+        return jsonify({"error": str(e)}), 409
+    return jsonify({"part": part_number, "bytes": written, "received_parts": len(upload.received)})
+
+
+@app.route('/uploads/<upload_id>/complete', methods=['POST'])
+def complete_upload(upload_id):
+    upload = uploads.get(upload_id)
+    if upload is None:
+        return jsonify({"error": "Upload not found"}), 404
+    body = request.get_json(silent=True) or request.form
+    backend = body.get('backend')
+    if backend and backend not in BACKENDS:
+        return jsonify({"error": f"Unknown transcription backend: {backend}"}), 400
+    speaker_identification = str(body.get('speaker_identification')).lower() == 'true'
+
+    def start_job():
+        return job_queue.submit("transcribe", run_uploaded_transcription, upload, speaker_identification,
+                                backend=backend).id
+
+    try:
+        job_id = upload.complete(int(body.get('total_parts', -1)), start_job)
+    except ValueError:
+        return jsonify({"error": "total_parts must be an integer"}), 400
+    except UploadError as e:
+        return jsonify({"error": str(e), **upload.to_dict()}), 409
+    except QueueFull as e:
+        return jsonify({"error": f"Too many pending jobs: {e}"}), 503
+    job = job_queue.get(job_id)
+    return jsonify({**(job.to_dict() if job else {"job_id": job_id}), "upload": upload.to_dict()}), 202
+
+
+@app.route('/uploads/<upload_id>', methods=['DELETE'])
+def abort_upload(upload_id):
+    upload = uploads.abort(upload_id)
+    if upload is None:
+        return jsonify({"error": "Upload not found"}), 404
+    return jsonify(upload.to_dict())
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    if job.status == "completed":
+        return jsonify(job.result)
+    if job.status == "failed":
+        return jsonify({**job.to_dict(), "error": job.error}), 500
+    return jsonify(job.to_dict()), 409
+
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    job = job_queue.cancel(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict()), 202
+
+
+# AssemblyAI completion callback (set ASSEMBLYAI_WEBHOOK_URL to this route's public URL)
+@app.route('/webhooks/assemblyai', methods=['POST'])
+def assemblyai_webhook():
+    if ASSEMBLYAI_WEBHOOK_SECRET and request.headers.get(WEBHOOK_AUTH_HEADER) != ASSEMBLYAI_WEBHOOK_SECRET:
+        return jsonify({"error": "Unauthorized"}), 401
+    body = request.get_json(silent=True) or {}
+    transcript_id = body.get("transcript_id")
+    if not transcript_id:
+        return jsonify({"error": "transcript_id is required"}), 400
+    tracked = poller.notify(transcript_id)
+    return jsonify({"status": "accepted" if tracked else "ignored"}), 200
+
+
+@app.route('/voiceprints', methods=['GET'])
+def list_voiceprints():
+    return jsonify({"speakers": voiceprints.list()})
+
+
+@app.route('/voiceprints', methods=['POST'])
+def enroll_voiceprint():
+    name = request.form.get('name', '').strip()
+    sample = request.files.get('sample')
+    if not name or sample is None or sample.filename == '':
+        return jsonify({"error": "Name and sample are required"}), 400
+
+    sample_path = os.path.join(VOICE_SAMPLES, secure_filename(f"{name}.wav"))
+    sample.save(sample_path)
+    try:
+        updated = voiceprints.enroll(name, sample_path)
+    except Exception as e:
+        return jsonify({"error": f"Failed to enroll voice sample: {e}"}), 500
+    return jsonify({"name": name, "updated": updated}), 201 if updated else 200
+
+
+@app.route('/voiceprints/<name>', methods=['DELETE'])
+def delete_voiceprint(name):
+    if not voiceprints.delete(name):
+        return jsonify({"error": "Speaker not found"}), 404
+    return jsonify({"status": "deleted", "name": name})
+
+
+# using faster-whisper model
+# @app.route('/faster-whisper', methods=['POST'])
+# def faster_whisper():
+#     print('upload/faster-whisper route called')
+#     if 'file' not in request.files:
+#         return jsonify({"error": "No file uploaded"}), 400
+#     file = request.files['file']
+#     if file.filename == '':
+#         return jsonify({"error": "No file selected"}), 400
+
+#     filename = secure_filename(file.filename)
+#     filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+#     file.save(filepath)
+#     print('file saved successfully')
+
+#     # Generate transcript using faster-whisper
+#     print('faster-whisper transcript being generated...')
+#     transcript, transcription_time = generate_transcript_faster_whisper(filepath)
+#     print('generated faster-whisper transcript !!')
+
+#     # Save transcript to file
+#     transcript_filename = f"faster_whisper_transcript_{uuid.uuid4()}.txt"
+#     transcript_filepath = os.path.join(OUTPUT_FOLDER, transcript_filename)
+#     with open(transcript_filepath, 'w', encoding='utf-8') as f:
+#         f.write(transcript)
+#     print("written and saved faster-whisper transcript file")
+#     return jsonify({"transcript": transcript, "transcript_file": transcript_filename, "model": "faster-whisper", "transcription time": transcription_time})
+
+
+def request_speaker_segments(data):
+    """The request's speaker_segments, checked up front: a malformed one is a 400, not a failed LLM job."""
+    segments = data.get("speaker_segments")
+    if not segments:
+        return None
+    try:
+        return validate_turns(segments)
+    except ValueError as e:
+        abort(make_response(jsonify({"error": f"Invalid speaker_segments: {e}"}), 400))
+
+
+@app.route('/summarize', methods=['POST'])
+def summarize():
+    data = request.json
+    transcript = data.get("transcript")
+    if not transcript:
+        return jsonify({"error": "No transcript provided"}), 400
+    # Generate summary
+    print("summarising your transcript..")
+    summary = generate_artifact("summary", transcript, use_cache=not data.get("regenerate", False),
+                                speaker_segments=request_speaker_segments(data))
+    if summary is None:
+        return jsonify({"error": "Failed to get summary from NVIDIA API"}), 500
+
+    return jsonify({"summary": summary})
+
+
+
+@app.route('/action-items', methods=['POST'])
+def action_items():
+    data = request.json
+    transcript = data.get("transcript")
+    if not transcript:
+        return jsonify({"error": "No transcript provided"}), 400
+    print("Extracting action items...")
+    actions = generate_artifact("action_items", transcript, use_cache=not data.get("regenerate", False),
+                                speaker_segments=request_speaker_segments(data))
+    if actions is None:
+        return jsonify({"error": "Failed to get action items from NVIDIA API"}), 500
+
+    return jsonify({"action_items": actions})
+
+
+@app.route('/minutes-of-meeting', methods=['POST'])
+def minutes_of_meeting():
+    data = request.json
+    transcript = data.get("transcript")
+    agenda = data.get("agenda")
+    if not transcript:
+        return jsonify({"error": "No transcript provided"}), 400
+    print("Generating minutes of meeting...")
+    mom = generate_artifact("minutes_of_meeting", transcript, agenda, use_cache=not data.get("regenerate", False),
+                            speaker_segments=request_speaker_segments(data))
+    if mom is None:
+        return jsonify({"error": "Failed to get minutes of meeting from NVIDIA API"}), 500
+
+    return jsonify({"minutes_of_meeting": mom})
+
+
+@app.route('/sentiment', methods=['POST'])
+def sentiment():
+    data = request.json
+    transcript = data.get("transcript")
+    if not transcript:
+        return jsonify({"error": "No transcript provided"}), 400
+    print("Generating Sentiment Analysis...")
+    sentiment = generate_artifact("sentiment", transcript, use_cache=not data.get("regenerate", False),
+                                  speaker_segments=request_speaker_segments(data))
+    if sentiment is None:
+        return jsonify({"error": "Failed to get sentiment analysis from NVIDIA API"}), 500
+
+    return jsonify({"sentiment": sentiment})
+
+
+@app.route('/scoring-mechanism', methods=['POST'])
+def scoring_mechanism():
+    data = request.json
+    transcript = data.get("transcript")
+    agenda = data.get("agenda")
+    if not transcript or not agenda:
+        return jsonify({"error": "No transcript or agenda provided"}), 400
+    print("Generating Meeting Score...")
+    score = generate_artifact("score", transcript, agenda, use_cache=not data.get("regenerate", False),
+                              speaker_segments=request_speaker_segments(data))
+    if score is None:
+        return jsonify({"error": "Failed to get score from NVIDIA API"}), 500
+
+    return jsonify({"score": score})
+
+
+# All five artifacts from one request, generated concurrently and streamed as each finishes
+@app.route('/meeting-insights', methods=['POST'])
+def meeting_insights():
+    data = request.json or {}
+    transcript = data.get("transcript")
+    agenda = data.get("agenda")
+    if not transcript:
+        return jsonify({"error": "No transcript provided"}), 400
+    artifacts = data.get("artifacts") or list(ARTIFACTS.keys())
+    unknown = [name for name in artifacts if name not in ARTIFACTS]
+    if unknown:
+        return jsonify({"error": f"Unknown artifacts: {', '.join(unknown)}"}), 400
+
+    events = stream_meeting_insights(transcript, agenda, artifacts,
+                                     use_cache=not data.get("regenerate", False),
+                                     speaker_segments=request_speaker_segments(data))
+    if data.get("format") == "sse":
+        body = (f"event: {'done' if event.get('done') else 'artifact'}\ndata: {json.dumps(event)}\n\n"
+                for event in events)
+        return Response(stream_with_context(body), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache'})
+    body = (json.dumps(event) + "\n" for event in events)
+    return Response(stream_with_context(body), mimetype='application/x-ndjson')
+
+
+# Streaming counterparts of the artifact routes: tokens are forwarded as Server-Sent Events
+@app.route('/summarize/stream', methods=['POST'], defaults={'artifact': 'summary'})
+@app.route('/action-items/stream', methods=['POST'], defaults={'artifact': 'action_items'})
+@app.route('/minutes-of-meeting/stream', methods=['POST'], defaults={'artifact': 'minutes_of_meeting'})
+@app.route('/sentiment/stream', methods=['POST'], defaults={'artifact': 'sentiment'})
+@app.route('/scoring-mechanism/stream', methods=['POST'], defaults={'artifact': 'score'})
+def stream_artifact_route(artifact):
+    data = request.json or {}
+    transcript = data.get("transcript")
+    agenda = data.get("agenda")
+    if not transcript:
+        return jsonify({"error": "No transcript provided"}), 400
+    if ARTIFACTS[artifact]["requires_agenda"] and not agenda:
+        return jsonify({"error": "No transcript or agenda provided"}), 400
+
+    speaker_segments = request_speaker_segments(data)
+
+    start_time = time.time()
+    # Run the map phase and pull the first delta before the 200 goes out: admission happens
+    # here, so a rate limit still reaches the client as a 429 with Retry-After
+    try:
+        stream = stream_artifact(artifact, transcript, agenda, use_cache=not data.get("regenerate", False),
+                                 speaker_segments=speaker_segments)
+        first = next(stream, None)
+    except UpstreamRateLimited:
+        raise
+    except Exception as e:
+        print(f"Streaming {artifact} failed: {e}")
+        return jsonify({"error": str(e)}), 502
+    first_token_time = time.time() - start_time if first is not None else None
+
+    def events():
+        try:
+            if first is not None:
+                yield f"data: {json.dumps({'delta': first})}\n\n"
+            for delta in stream:
+                yield f"data: {json.dumps({'delta': delta})}\n\n"
+        except Exception as e:
+            print(f"Streaming {artifact} failed: {e}")
+            error = {"error": str(e)}
+            if isinstance(e, UpstreamRateLimited):
+                error["retry_after"] = e.retry_after
+            yield f"event: error\ndata: {json.dumps(error)}\n\n"
+            return
+        done = {"artifact": artifact, "time_to_first_token": first_token_time, "elapsed": time.time() - start_time}
+        yield f"event: done\ndata: {json.dumps(done)}\n\n"
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/llm-cache/stats', methods=['GET'])
+def llm_cache_stats():
+    return jsonify(llm_cache.stats())
+
+
+# Per-upstream-host call counts, statuses, retries and latency percentiles
+@app.route('/http-client/stats', methods=['GET'])
+def http_client_stats():
+    return jsonify(http_client.stats())
+
+
+# Per-LLM-provider in-flight count, queue depth and admission wait times
+@app.route('/llm-limits/stats', methods=['GET'])
+def llm_limits_stats():
+    return jsonify(rate_limiter.stats())
+
+
+def rate_limited_response(e):
+    response = jsonify({"status": "error", "message": str(e), "provider": e.provider})
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, 429
+
+
+# LLM routes that don't catch it themselves answer 429 instead of 500
+app.register_error_handler(UpstreamRateLimited, rate_limited_response)
+
+
+@app.route('/download/<filename>')
+def download_file(filename):
+    filepath = os.path.join(OUTPUT_FOLDER, filename)
+    if os.path.exists(filepath):
+        return send_file(filepath, as_attachment=True, mimetype='application/pdf')
+    return jsonify({"error": "File not found"}), 404
+
+
+
+
+@app.route('/audio/<filename>')
+def serve_audio(filename):
+    return send_from_directory("audio_folder", filename)
+
+@app.route('/live_transcripts/<path:filename>')
+def serve_live_transcript_file(filename):
+    return send_from_directory('live_transcripts', filename)
+
+@app.route('/live_recored_meet_audio/<path:filename>')
+def serve_live_audio_file(filename):
+    return send_from_directory('live_recored_meet_audio', filename)
+
+
+@app.route('/save_audio_recording', methods=['POST'])
+def save_audio_recording():
+    if 'audio_data' not in request.files:
+        return jsonify({'error': 'No audio file uploaded'}), 400
+    
+    audio_file = request.files['audio_data']
+    
+    if audio_file.filename == '':
+        return jsonify({'error': 'No selected file'}), 400
+    
+    # Generate a unique filename
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"recording_{timestamp}.webm"
+    save_path = os.path.join('live_recored_meet_audio', filename)
+    
+    audio_file.save(save_path)
+    
+    return jsonify({
+        'message': 'Audio saved successfully',
+        'filename': filename,
+        'audio_url': f'/live_recored_meet_audio/{filename}'
+    })
+
+
+def stop_session_response(results):
+    return {
+        "status": "success",
+        "transcript": results["transcript"],
+        "audio_path": f"/live_recored_meet_audio/{os.path.basename(results['audio_file'])}",
+        "transcript_path": f"/live_transcripts/{os.path.basename(results['transcript_file'])}",
+        "audio_duration": get_audio_duration(results["audio_file"])
+    }
+
+
+def live_transcript_response(live):
+    """Full live transcript, or with ?since=<seq> only the segments committed from that sequence number on."""
+    since = request.args.get('since', type=int)
+    if since is not None:
+        since = max(0, since)
+        segments = live.segments_since(since)
+        return {
+            "status": "success",
+            "segments": segments,
+            "next_seq": since + len(segments),
+            "provisional": live.get_provisional_transcript(),
+            "is_active": True,
+            "model": "faster-whisper"
+        }
+    return {
+        "status": "success",
+        "text": live.get_live_transcript(),
+        "provisional": live.get_provisional_transcript(),
+        "is_active": True,
+        "model": "faster-whisper"
+    }
+
+
+def live_transcript_stream(live):
+    """
+    Push channel for a live transcript: one SSE event per committed segment, with the
+    segment's seq as the event id. Reconnecting clients resume with ?since=<seq> or the
+    Last-Event-ID header (sent automatically by EventSource) instead of refetching everything.
+    """
+    since = request.args.get('since', type=int)
+    last_event_id = request.headers.get('Last-Event-ID')
+    if last_event_id and last_event_id.isdigit():
+        since = int(last_event_id) + 1
+    since = max(0, since or 0)
+
+    def events():
+        seq = since
+        yield "retry: 2000\n\n"
+        while True:
+            segments = live.wait_for_segments(seq, timeout=LIVE_STREAM_HEARTBEAT_SECONDS)
+            for segment in segments:
+                yield f"id: {segment['seq']}\nevent: segment\ndata: {json.dumps(segment)}\n\n"
+            seq += len(segments)
+            if live.finished and seq >= len(live.segments):
+                yield f"event: end\ndata: {json.dumps({'next_seq': seq})}\n\n"
+                return
+            if not segments:
+                yield ": keep-alive\n\n"
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+# Live sessions: any number of concurrent meetings, decoded on a shared pool of preloaded models
+@app.route('/live_sessions', methods=['POST'])
+def start_live_session():
+    body = request.get_json(silent=True) or {}
+    try:
+        live = live_sessions.start('live_recored_meet_audio', session_id=body.get('session_id'),
+                                   source=body.get('source', 'device'),
+                                   audio_format=body.get('format', 'pcm_s16le'))
+    except IngestError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    except SessionExists:
+        return jsonify({"status": "error", "message": "Session already running"}), 409
+    except TooManySessions as e:
+        return jsonify({"status": "error", "message": str(e)}), 503
+    except Exception as e:
+        print(f"Error starting live session: {str(e)}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+    return jsonify({"status": "success", "session_id": live.session_id, "model": "faster-whisper"}), 201
+
+
+@app.route('/live_sessions', methods=['GET'])
+def list_live_sessions():
+    return jsonify({"sessions": live_sessions.list(), "models": live_model_pool.stats()})
+
+
+@app.route('/live_sessions/<session_id>', methods=['GET'])
+def get_live_session(session_id):
+    live = live_sessions.get(session_id)
+    if live is None:
+        return jsonify({"status": "error", "message": "Session not found"}), 404
+    ingest = live_sessions.get_ingest(session_id)
+    return jsonify({**live_transcript_response(live), "session_id": session_id,
+                    "is_active": not live.stop_flag.is_set(),
+                    "ingest": ingest.stats() if ingest else None,
+                    "processing": live.processing_stats()})
+
+
+# Audio pushed by the browser for a session started with {"source": "push"}. The body is one
+# frame: raw 16 kHz mono PCM (pcm_s16le / pcm_f32le) or the next MediaRecorder chunk (webm/ogg).
+# Frames are numbered with ?seq=0,1,2... and may arrive out of order or be retried.
+@app.route('/live_sessions/<session_id>/audio', methods=['POST'])
+def push_live_audio(session_id):
+    ingest = live_sessions.get_ingest(session_id)
+    if ingest is None:
+        return jsonify({"status": "error", "message": "No push session with this id"}), 404
+    seq = request.args.get('seq', type=int)
+    if seq is None or seq < 0:
+        return jsonify({"status": "error", "message": "seq query parameter is required"}), 400
+    try:
+        ingest.push(seq, request.get_data())
+    except Backpressure as e:
+        response = jsonify({"status": "busy", "message": str(e), "seq": seq})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 429
+    except IngestError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    return jsonify({"status": "success", "seq": seq, **ingest.stats()})
+
+
+@app.route('/live_sessions/<session_id>/stream', methods=['GET'])
+def stream_live_session(session_id):
+    live = live_sessions.get(session_id)
+    if live is None:
+        return jsonify({"status": "error", "message": "Session not found"}), 404
+    return live_transcript_stream(live)
+
+
+@app.route('/live_sessions/<session_id>/stop', methods=['POST'])
+def stop_live_session(session_id):
+    try:
+        results = live_sessions.stop(session_id)
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+    if results is None:
+        return jsonify({"status": "error", "message": "No active session"}), 404
+    return jsonify({**stop_session_response(results), "session_id": session_id}), 200
+
+
+# The original single-meeting routes operate on the default session
+@app.route('/start_realtime_transcription', methods=['POST'])
+def start_transcription():
+    try:
+        live_sessions.start('live_recored_meet_audio', session_id=DEFAULT_SESSION_ID)
+        return jsonify({
+            "status": "success",
+            "message": "Real-time transcription started",
+            "model": "faster-whisper"
+        }), 200
+    except SessionExists:
+        return jsonify({
+            "status": "error",
+            "message": "Transcription already running"
+        }), 400
+    except Exception as e:
+        print(f"Error starting transcription: {str(e)}")
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+
+
+@app.route('/stop_realtime_transcription', methods=['POST'])
+def stop_transcription():
+    try:
+        results = live_sessions.stop(DEFAULT_SESSION_ID)
+        if results is None:
+            return jsonify({"status": "error", "message": "No active transcription"}), 400
+        return jsonify(stop_session_response(results)), 200
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+def get_audio_duration(filepath):
+    """Get duration in seconds of audio file"""
+    try:
+        with sf.SoundFile(filepath) as f:
+            return len(f) / f.samplerate
+    except:
+        return 0
+
+
+# temp audio recorded file saved at location and found using this api
+@app.route('/transcripts/<path:filename>')
+def serve_audio_file(filename):
+    return send_from_directory('transcripts', filename)
+
+
+
+@app.route('/get_live_transcript', methods=['GET'])
+def get_live_transcript():
+    transcriber = live_sessions.get(DEFAULT_SESSION_ID)
+    if transcriber is None:
+        return jsonify({
+            "status": "error",
+            "message": "Transcriber not initialized",
+            "debug": "Transcriber is None"
+        }), 400
+        
+    if transcriber.stop_flag.is_set():
+        return jsonify({
+            "status": "error",
+            "message": "Transcription stopped",
+            "debug": "Stop flag is set"
+        }), 400
+        
+    try:
+        return jsonify(live_transcript_response(transcriber))
+    except Exception as e:
+        print(f"Error in get_live_transcript: {str(e)}")
+        return jsonify({
+            "status": "error",
+            "message": str(e),
+            "debug": "Exception occurred"
+        }), 500
+
+
+@app.route('/live_transcript/stream', methods=['GET'])
+def stream_live_transcript():
+    transcriber = live_sessions.get(DEFAULT_SESSION_ID)
+    if transcriber is None:
+        return jsonify({"status": "error", "message": "Transcriber not initialized"}), 400
+    return live_transcript_stream(transcriber)
+
+
+@app.route('/get_transcript_file', methods=['GET'])
+def get_transcript_file():
+    if os.path.exists(LIVE_TRANSCRIPT_FOLDER):
+        return send_file(LIVE_TRANSCRIPT_FOLDER, mimetype='text/plain', as_attachment=False)
+    return jsonify({"message": "Transcript file not found."}), 404
+
+
+
+@app.route('/build-index', methods=['POST'])
+def build_index_route():
+    try:
+        body = request.get_json(silent=True) or {}
+        stats = build_meeting_index(source=body.get("source"))
+        return jsonify({"status": "success", **stats}), 200
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@app.route('/query', methods=['POST'])
+def query_route():
+    try:
+        body = request.get_json()
+        user_query = body.get("query", "")
+        if not user_query:
+            return jsonify({"error": "Query is required"}), 400
+
+        filters = {key: body[key] for key in FILTER_KEYS if body.get(key)}
+        if filters.get("type") and filters["type"] not in CHUNK_TYPES:
+            return jsonify({"error": f"type must be one of: {', '.join(CHUNK_TYPES)}"}), 400
+
+        result = query_meeting_qa(user_query, filters=filters)
+        return jsonify(result), 200
+
+    except UpstreamRateLimited as e:
+        return rate_limited_response(e)
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
@@ -0,0 +1,115 @@
+import os
+import numpy as np
+import torch
+from resemblyzer import VoiceEncoder, preprocess_wav
+from resemblyzer.audio import wav_to_mel_spectrogram
+from resemblyzer.hparams import sampling_rate, model_embedding_size
+from audio_ingest import load_pcm
+
+EMBED_BATCH_SIZE = int(os.getenv("SPEAKER_EMBED_BATCH_SIZE", 64))  # partial mels per forward pass
+PARTIAL_RATE = 1.3  # same defaults as VoiceEncoder.embed_utterance
+MIN_COVERAGE = 0.75
+
+encoder = VoiceEncoder()
+
+
+def load_audio(filepath):
+    """Decode the whole file once into a mono float32 buffer at the encoder's sample rate."""
+    return load_pcm(filepath, sample_rate=sampling_rate)
+
+
+def slice_segments(audio, segments):
+    """Return zero-copy views of `audio` for each {start, end} segment (seconds)."""
+    views = []
+    for seg in segments:
+        start = max(0, int(seg["start"] * sampling_rate))
+        end = min(len(audio), int(seg["end"] * sampling_rate))
+        views.append(audio[start:end] if end > start else None)
+    return views
+
+
+def _iter_partial_mels(wavs):
+    """Yield (segment index, partial mel) pairs, mirroring VoiceEncoder.embed_utterance."""
+    for i, wav in enumerate(wavs):
+        if wav is None or len(wav) == 0:
+            continue
+        try:
+            wav = preprocess_wav(wav)
+        except Exception as e:
+            print(f"Skipping segment {i}: {e}")
+            continue
+        if len(wav) == 0:
+            continue
+        wav_slices, mel_slices = VoiceEncoder.compute_partial_slices(len(wav), PARTIAL_RATE, MIN_COVERAGE)
+        max_wave_length = wav_slices[-1].stop
+        if max_wave_length >= len(wav):
+            wav = np.pad(wav, (0, max_wave_length - len(wav)), "constant")
+        mel = wav_to_mel_spectrogram(wav)
+        for s in mel_slices:
+            yield i, mel[s]
+
+
+def embed_segments(wavs, batch_size=EMBED_BATCH_SIZE):
+    """
+    Embed many audio segments with batched forward passes through the encoder.
+    Returns an (n, d) float32 matrix of L2-normalized embeddings and a boolean mask
+    marking the rows that could be embedded (too-short or silent segments are False).
+    """
+    embeddings = np.zeros((len(wavs), model_embedding_size), dtype=np.float32)
+    owners, mels = [], []
+
+    def flush():
+        with torch.no_grad():
+            batch = torch.from_numpy(np.stack(mels)).to(encoder.device)
+            partial_embeds = encoder(batch).cpu().numpy()
+        np.add.at(embeddings, owners, partial_embeds)
+        owners.clear()
+        mels.clear()
+
+    for owner, mel in _iter_partial_mels(wavs):
+        owners.append(owner)
+        mels.append(mel)
+        if len(mels) >= batch_size:
+            flush()
+    if mels:
+        flush()
+
+    norms = np.linalg.norm(embeddings, axis=1)
+    valid = norms > 0
+    embeddings[valid] /= norms[valid, None]
+    return embeddings, valid
+
+
+def match_speakers(embeddings, valid, known_names, known_matrix):
+    """
+    Score every segment against every enrolled speaker with one matrix product.
+    Returns (best name or None, score) per segment.
+    """
+    if not known_names or known_matrix is None or len(known_matrix) == 0:
+        return [(None, None)] * len(embeddings)
+    scores = embeddings @ np.asarray(known_matrix, dtype=np.float32).T
+    best = np.argmax(scores, axis=1)
+    matches = []
+    for i, idx in enumerate(best):
+        if valid[i]:
+            matches.append((known_names[idx], float(scores[i, idx])))
+        else:
+            matches.append((None, None))
+    return matches
+
+
+def recognize_speakers(filepath, segments, known_names, known_matrix):
+    """
+    Label diarized segments with enrolled speaker names.
+    The file is decoded once; segments fall back to their diarization label when
+    they cannot be embedded or no speakers are enrolled.
+    """
+    audio = load_audio(filepath)
+    wavs = slice_segments(audio, segments)
+    embeddings, valid = embed_segments(wavs)
+    matches = match_speakers(embeddings, valid, known_names, known_matrix)
+
+    labelled = []
+    for seg, (name, _score) in zip(segments, matches):
+        labelled.append({**seg, "speaker": name if name else seg["speaker"]})
+    return labelled
@@ -0,0 +1,107 @@
+import os, re
+import numpy as np
+
+SAMPLE_RATE = 16000
+# The window is trimmed back to the last committed word once it grows past this
+LIVE_WINDOW_SECONDS = float(os.getenv("LIVE_WINDOW_SECONDS", 15))
+LIVE_BEAM_SIZE = int(os.getenv("LIVE_BEAM_SIZE", 1))
+PROMPT_CHARS = 200  # committed text handed back to the model as initial_prompt
+
+
+def _norm(word):
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+class LocalAgreementDecoder:
+    """
+    Incremental decoding over a sliding window. Each call to process() re-decodes the
+    uncommitted audio plus the newly arrived audio, with the tail of the committed text
+    as initial_prompt. A word is committed only when two consecutive hypotheses agree
+    on it (LocalAgreement-2), so words cut at a chunk boundary are fixed by the next
+    pass instead of being emitted twice or half-heard. Committed words never change;
+    the rest of the latest hypothesis is exposed as provisional text.
+    """
+
+    def __init__(self, model, sample_rate=SAMPLE_RATE, window_seconds=LIVE_WINDOW_SECONDS,
+                 beam_size=LIVE_BEAM_SIZE, **transcribe_kwargs):
+        self.model = model
+        self.sample_rate = sample_rate
+        self.window_seconds = window_seconds
+        self.beam_size = beam_size
+        self.transcribe_kwargs = transcribe_kwargs
+        self.audio = np.zeros(0, dtype=np.float32)
+        self.offset = 0.0  # absolute time of self.audio[0]
+        self.committed_tail = ""  # end of the committed text, used as the prompt
+        self.previous = []  # uncommitted words from the last hypothesis
+        self.last_committed_end = 0.0
+
+    @property
+    def provisional_text(self):
+        return "".join(w for _, _, w in self.previous).strip()
+
+    def restart(self, offset):
+        """Start a new utterance at absolute time `offset` (audio in between was skipped)."""
+        self.audio = np.zeros(0, dtype=np.float32)
+        self.previous = []
+        self.offset = offset
+
+    def insert_audio(self, samples):
+        self.audio = np.concatenate([self.audio, samples])
+
+    def _hypothesis(self):
+        segments, _info = self.model.transcribe(
+            self.audio,
+            beam_size=self.beam_size,
+            initial_prompt=self.committed_tail.strip() or None,
+            word_timestamps=True,
+            condition_on_previous_text=False,
+            **self.transcribe_kwargs)
+        words = []
+        for segment in segments:
+            for w in segment.words or []:
+                start, end = self.offset + w.start, self.offset + w.end
+                # Words already committed from the overlap are decoded again; skip them
+                if end <= self.last_committed_end + 0.05 or not _norm(w.word):
+                    continue
+                words.append((start, end, w.word))
+        return words
+
+    def process(self):
+        """Decode the current window; returns the words newly committed by this pass."""
+        if len(self.audio) == 0:
+            return []
+        hypothesis = self._hypothesis()
+        agreed = 0
+        while (agreed < len(hypothesis) and agreed < len(self.previous)
+               and _norm(hypothesis[agreed][2]) == _norm(self.previous[agreed][2])):
+            agreed += 1
+        new_words = hypothesis[:agreed]
+        self.previous = hypothesis[agreed:]
+        self._commit(new_words)
+        self._trim()
+        return new_words
+
+    def _commit(self, words):
+        if words:
+            self.committed_tail = (self.committed_tail + "".join(w for _, _, w in words))[-PROMPT_CHARS:]
+            self.last_committed_end = words[-1][1]
+
+    def _trim(self):
+        """Drop committed audio once the window is too long, keeping the uncommitted tail as overlap."""
+        if len(self.audio) / self.sample_rate <= self.window_seconds:
+            return
+        cut = self.last_committed_end - self.offset
+        if cut <= 0:
+            # Nothing committed inside the window: keep only the most recent window's worth
+            cut = len(self.audio) / self.sample_rate - self.window_seconds
+        cut_samples = int(cut * self.sample_rate)
+        self.audio = self.audio[cut_samples:]
+        self.offset += cut_samples / self.sample_rate
+
+    def finish(self):
+        """End of stream: decode the last audio once more and commit all of it."""
+        remaining = self._hypothesis() if len(self.audio) else self.previous
+        self.previous = []
+        self._commit(remaining)
+        self.audio = np.zeros(0, dtype=np.float32)
+        return remaining
@@ -1,6 +1,7 @@
 from transformers import BartTokenizer, BartForConditionalGeneration
 from transformers import pipeline
-import re , os, requests
+import re , os
+import http_client
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -20,7 +21,7 @@ def summarize_with_hf_api(text, min_length=100, max_length=500):
             "max_length": max_length
         }
     }
-    response = requests.post(API_URL, headers=HEADERS, json=payload)
+    response = http_client.post(API_URL, headers=HEADERS, json=payload, idempotent=True)
     if response.status_code != 200:
         print("API Error:", response.status_code, response.text)
         return "ERROR: Could not summarize."
@@ -0,0 +1,6 @@
+import os, sys, tempfile
+
+# The backend modules are flat files imported by name, as server.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# llm_generate opens its cache on import; keep it out of the working tree
+os.environ.setdefault("LLM_CACHE_PATH", os.path.join(tempfile.mkdtemp(), "llm_cache.sqlite3"))
@@ -0,0 +1,87 @@
+import io
+import pytest
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+import http_client
+from http_client import _replayable_bodies, backoff_delay, never_sent
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def close(self):
+        pass
+
+
+def test_replayable_bodies_records_file_positions():
+    data = io.BytesIO(b"hello")
+    data.read(2)
+    upload = io.BytesIO(b"part")
+    assert _replayable_bodies({"data": data, "files": {"file": ("a.wav", upload)}}) == [(data, 2), (upload, 0)]
+
+
+def test_in_memory_bodies_need_no_rewind_and_generators_cant_be_replayed():
+    assert _replayable_bodies({"json": {"a": 1}}) == []
+    assert _replayable_bodies({"data": b"raw"}) == []
+    assert _replayable_bodies({"data": (chunk for chunk in [b"a"])}) is None
+
+
+def test_backoff_honours_retry_after_up_to_the_cap():
+    assert backoff_delay(0, FakeResponse(429, {"Retry-After": "3"})) == 3
+    assert backoff_delay(0, FakeResponse(429, {"Retry-After": "100000"})) == http_client.HTTP_BACKOFF_MAX
+
+
+def test_backoff_jitter_stays_within_the_exponential_bound():
+    for attempt in range(6):
+        bound = min(http_client.HTTP_BACKOFF_MAX, http_client.HTTP_BACKOFF_BASE * 2 ** attempt)
+        delay = backoff_delay(attempt, FakeResponse(503, {"Retry-After": "Wed, 21 Oct 2026 07:28:00 GMT"}))
+        assert 0 <= delay <= bound
+
+
+def test_never_sent_only_for_failures_before_connecting():
+    refused = requests.ConnectionError(MaxRetryError(None, "/", NewConnectionError(None, "refused")))
+    assert never_sent(refused)
+    assert never_sent(requests.ConnectTimeout())
+    assert not never_sent(requests.ReadTimeout())
+    assert not never_sent(requests.ConnectionError("Connection aborted"))
+
+
+@pytest.fixture
+def fake_session(monkeypatch):
+    """Replaces the pooled session for example.test; returns the list of statuses to answer with."""
+    statuses = []
+    calls = []
+    client = http_client.configure("https://example.test", retries=3)
+
+    def request(method, url, **kwargs):
+        calls.append(method)
+        return FakeResponse(statuses.pop(0))
+
+    monkeypatch.setattr(client.session, "request", request)
+    monkeypatch.setattr(http_client.time, "sleep", lambda seconds: None)
+    return statuses, calls
+
+
+def test_get_is_retried_on_server_errors(fake_session):
+    statuses, calls = fake_session
+    statuses.extend([500, 502, 200])
+    assert http_client.get("https://example.test/x").status_code == 200
+    assert calls == ["GET"] * 3
+
+
+def test_post_is_retried_only_when_the_server_turned_it_away(fake_session):
+    statuses, calls = fake_session
+    statuses.extend([500])
+    assert http_client.post("https://example.test/x", json={}).status_code == 500
+    statuses.extend([503, 429, 200])
+    assert http_client.post("https://example.test/x", json={}).status_code == 200
+    assert len(calls) == 4
+
+
+def test_idempotent_post_is_retried_like_a_get(fake_session):
+    statuses, calls = fake_session
+    statuses.extend([500, 200])
+    assert http_client.post("https://example.test/x", json={}, idempotent=True).status_code == 200
+    assert len(calls) == 2
@@ -0,0 +1,113 @@
+import json, time, threading
+import pytest
+from jobs import JobQueue, QueueFull
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def queue():
+    queue = JobQueue(max_workers=1, max_pending=2)
+    yield queue
+    queue.executor.shutdown(wait=False, cancel_futures=True)
+
+
+@pytest.fixture
+def fake_backend(monkeypatch, tmp_path):
+    pytest.importorskip("librosa")  # transcription_backends -> audio_ingest
+    import transcription_backends
+    segments = [{"speaker": "A", "start": 0.0, "end": 2.5, "text": "Hello."}]
+    path = tmp_path / "transcript.json"
+    path.write_text(json.dumps(segments))
+    monkeypatch.setattr(transcription_backends, "FAKE_TRANSCRIPT_PATH", str(path))
+    monkeypatch.setattr(transcription_backends, "FAKE_TRANSCRIPTION_DELAY", 0.3)
+    backend = transcription_backends.FakeBackend()
+    backend.segments = segments
+    return backend
+
+
+def blocker():
+    """A job body that runs until released."""
+    release = threading.Event()
+
+    def run(on_stage=None):
+        on_stage("transcribing")
+        release.wait(5)
+        return "done"
+
+    return run, release
+
+
+def test_fake_transcription_reports_stages_until_completed(queue, fake_backend):
+    job = queue.submit("transcribe", fake_backend.transcribe, "meeting.wav")
+    seen = []
+    while not job.finished:
+        status = queue.get(job.id).to_dict()  # what GET /jobs/<id> returns
+        if (status["status"], status["stage"]) not in seen:
+            seen.append((status["status"], status["stage"]))
+        time.sleep(0.01)
+    assert ("running", "transcribing") in seen
+    assert job.to_dict()["status"] == "completed" and job.progress == 1.0
+    assert job.result == fake_backend.segments
+
+
+def test_fake_transcription_failure_is_reported(queue, fake_backend, monkeypatch, tmp_path):
+    import transcription_backends
+    monkeypatch.setattr(transcription_backends, "FAKE_TRANSCRIPT_PATH", str(tmp_path / "missing.json"))
+    job = queue.submit("transcribe", fake_backend.transcribe, "meeting.wav")
+    wait_until(lambda: job.finished)
+    assert job.status == "failed"
+    assert "missing.json" in job.to_dict()["error"]
+
+
+def test_running_fake_transcription_stops_at_its_next_stage(queue, fake_backend):
+    job = queue.submit("transcribe", fake_backend.transcribe, "meeting.wav")
+    wait_until(lambda: job.status == "running")
+    queue.cancel(job.id)
+    wait_until(lambda: job.finished)
+    assert job.status == "cancelled" and job.result is None
+
+
+def test_job_lifecycle_and_stage_progress(queue):
+    run, release = blocker()
+    job = queue.submit("transcribe", run)
+    wait_until(lambda: job.stage == "transcribing")
+    assert job.status == "running" and 0 < job.progress < 1
+    release.set()
+    wait_until(lambda: job.finished)
+    assert (job.status, job.result, job.progress) == ("completed", "done", 1.0)
+
+
+def test_full_queue_rejects_new_jobs(queue):
+    run, release = blocker()
+    queue.submit("transcribe", run)
+    queue.submit("transcribe", run)
+    with pytest.raises(QueueFull):
+        queue.submit("transcribe", run)
+    release.set()
+    wait_until(lambda: all(job.finished for job in queue.jobs.values()))
+    queue.submit("transcribe", run)  # finished jobs no longer count
+
+
+def test_cancelling_a_queued_job_is_immediate(queue):
+    run, release = blocker()
+    queue.submit("transcribe", run)
+    waiting = queue.submit("transcribe", run)
+    assert queue.cancel(waiting.id).status == "cancelled"
+    assert queue.cancel("unknown") is None
+    release.set()
+
+
+def test_finished_jobs_are_pruned_after_retention():
+    queue = JobQueue(max_workers=1, retention_seconds=0)
+    job = queue.submit("transcribe", lambda on_stage=None: "done")
+    wait_until(lambda: job.finished)
+    time.sleep(0.01)
+    queue.submit("transcribe", lambda on_stage=None: "done")
+    assert queue.get(job.id) is None
+    queue.executor.shutdown()
@@ -0,0 +1,132 @@
+import shutil, subprocess
+from types import SimpleNamespace
+import numpy as np
+import pytest
+import live_ingest
+from live_ingest import JitterBuffer, LiveIngest, Backpressure, IngestError, LIVE_MAX_BACKLOG_SECONDS
+from ring_buffer import AudioRingBuffer
+
+
+class FakeTranscriber:
+    """The parts of CustomTranscriber that LiveIngest uses."""
+
+    sample_rate = 16000
+
+    def __init__(self):
+        self.ring = AudioRingBuffer(self.sample_rate * 60)
+        self.ring.add_reader("asr")
+        self.touched = 0
+
+    def touch(self):
+        self.touched += 1
+
+    def write_audio(self, samples):
+        self.ring.write(samples)
+
+
+def f32_frame(i, n=100):
+    return np.arange(i * n, (i + 1) * n, dtype=np.float32).tobytes()
+
+
+def test_frames_are_released_in_order():
+    jitter = JitterBuffer()
+    assert jitter.push(1, "b") == []
+    assert jitter.push(2, "c") == []
+    assert jitter.push(0, "a") == ["a", "b", "c"]
+    assert jitter.push(3, "d") == ["d"]
+
+
+def test_duplicates_and_late_frames_are_dropped_and_counted():
+    jitter = JitterBuffer()
+    jitter.push(0, "a")
+    jitter.push(2, "c")
+    assert jitter.push(0, "a") == []  # already released
+    assert jitter.push(2, "c") == []  # already held
+    assert jitter.duplicates == 2
+
+
+def test_pcm_gap_is_skipped_once_too_many_frames_wait():
+    jitter = JitterBuffer(max_pending=2)
+    jitter.push(0, "a")
+    assert jitter.push(2, "c") == []
+    assert jitter.push(3, "d") == []
+    assert jitter.push(4, "e") == ["c", "d", "e"]
+    assert jitter.lost == 1
+    assert jitter.push(1, "b") == []  # arrived too late
+    assert jitter.duplicates == 1
+
+
+def test_flush_releases_held_frames_across_gaps():
+    jitter = JitterBuffer()
+    jitter.push(1, "b")
+    jitter.push(3, "d")
+    assert jitter.flush() == ["b", "d"]
+    assert jitter.lost == 2
+
+
+def test_compressed_gap_is_waited_for_with_backpressure():
+    jitter = JitterBuffer(max_pending=2, skip_gaps=False)
+    jitter.push(0, "a")
+    jitter.push(2, "c")
+    jitter.push(3, "d")
+    with pytest.raises(Backpressure):
+        jitter.push(4, "e")
+    assert jitter.push(1, "b") == ["b", "c", "d"]  # the missing frame is always accepted
+    assert jitter.push(4, "e") == ["e"]
+    assert jitter.lost == 0
+
+
+def test_compressed_flush_drops_frames_behind_a_gap():
+    jitter = JitterBuffer(skip_gaps=False)
+    jitter.push(1, "b")
+    jitter.push(2, "c")
+    assert jitter.flush() == []
+    assert jitter.lost == 3
+
+
+def test_pcm_frames_reach_the_transcriber_as_float32():
+    transcriber = FakeTranscriber()
+    ingest = LiveIngest(transcriber, "pcm_s16le")
+    ingest.push(1, np.array([16384, -16384], dtype=np.int16).tobytes())
+    ingest.push(0, np.array([0, 32767], dtype=np.int16).tobytes())
+    np.testing.assert_allclose(transcriber.ring.read("asr"), [0, 32767 / 32768, 0.5, -0.5])
+    assert ingest.stats()["next_seq"] == 2 and transcriber.touched == 2
+
+
+def test_bad_frames_and_formats_are_rejected():
+    with pytest.raises(IngestError):
+        LiveIngest(FakeTranscriber(), "mp3")
+    ingest = LiveIngest(FakeTranscriber(), "pcm_s16le")
+    with pytest.raises(IngestError):
+        ingest.push(0, b"\x00\x00\x00")  # not a whole number of samples
+    ingest.close()
+    with pytest.raises(IngestError):
+        ingest.push(0, b"\x00\x00")
+
+
+def test_backlog_over_the_limit_answers_backpressure():
+    transcriber = FakeTranscriber()
+    ingest = LiveIngest(transcriber, "pcm_f32le")
+    backlog = int((LIVE_MAX_BACKLOG_SECONDS + 4) * transcriber.sample_rate)
+    ingest.push(0, np.zeros(backlog, dtype=np.float32).tobytes())
+    with pytest.raises(Backpressure) as raised:
+        ingest.push(1, f32_frame(1))
+    assert raised.value.retry_after >= 1
+    assert ingest.stats()["next_seq"] == 1  # the refused frame can be sent again
+    transcriber.ring.read("asr")
+    ingest.push(1, f32_frame(1))
+
+
+@pytest.mark.skipif(shutil.which("cat") is None, reason="needs cat to stand in for ffmpeg")
+def test_compressed_frames_go_through_the_decoder_in_order(monkeypatch):
+    # cat passes the bytes through unchanged, so f32 frames come out as the decoder's output
+    fake = SimpleNamespace(PIPE=subprocess.PIPE, DEVNULL=subprocess.DEVNULL,
+                           Popen=lambda args, **kwargs: subprocess.Popen(["cat"], **kwargs))
+    monkeypatch.setattr(live_ingest, "subprocess", fake)
+    transcriber = FakeTranscriber()
+    ingest = LiveIngest(transcriber, "webm")
+    for seq in [0, 2, 1, 4, 3, 3]:
+        ingest.push(seq, f32_frame(seq))
+    ingest.close()
+    np.testing.assert_array_equal(transcriber.ring.read("asr"), np.arange(500, dtype=np.float32))
+    assert ingest.stats()["duplicate_frames"] == 1
@@ -0,0 +1,49 @@
+import pytest
+import llm_cache
+from llm_cache import LLMCache, make_cache_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.time for the cache module; every read advances it by a millisecond."""
+    now = [1_000_000.0]
+
+    def time():
+        now[0] += 0.001
+        return now[0]
+
+    monkeypatch.setattr(llm_cache.time, "time", time)
+    return now
+
+
+def test_cache_key_ignores_argument_order():
+    assert make_cache_key(model="m", prompt="p") == make_cache_key(prompt="p", model="m")
+    assert make_cache_key(model="m", prompt="p") != make_cache_key(model="m", prompt="q")
+
+
+def test_entries_expire_after_the_ttl(tmp_path, clock):
+    cache = LLMCache(str(tmp_path / "cache.sqlite3"), ttl=60)
+    cache.set("k", "value")
+    assert cache.get("k") == "value"
+    clock[0] += 61
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted_first(tmp_path, clock):
+    cache = LLMCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")  # b is now the least recently used
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_size_limit_evicts_until_under_budget(tmp_path, clock):
+    cache = LLMCache(str(tmp_path / "cache.sqlite3"), max_bytes=10)
+    cache.set("a", "x" * 6)
+    cache.set("b", "y" * 6)
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 6
@@ -0,0 +1,89 @@
+import json
+import pytest
+import llm_generate
+from llm_cache import LLMCache
+
+
+class FakeStreamResponse:
+    """Stands in for a streamed requests.Response; `lines` are the raw SSE lines."""
+
+    def __init__(self, lines, status_code=200):
+        self.lines = lines
+        self.status_code = status_code
+        self.text = "error body"
+        self.closed = False
+
+    def iter_lines(self, chunk_size=None):
+        for line in self.lines:
+            yield line.encode("utf-8")
+
+    def close(self):
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def delta(text):
+    return "data: " + json.dumps({"choices": [{"delta": {"content": text}}]})
+
+
+@pytest.fixture
+def api(monkeypatch, tmp_path):
+    """Deterministic (cacheable) mode with a fresh cache; `api.responses` are returned in order."""
+    monkeypatch.setattr(llm_generate, "LLM_DETERMINISTIC", True)
+    monkeypatch.setattr(llm_generate, "llm_cache", LLMCache(str(tmp_path / "cache.sqlite3")))
+    api = type("FakeAPI", (), {"responses": [], "calls": 0})()
+
+    def post(url, **kwargs):
+        assert kwargs["stream"] and kwargs["json"]["stream"]
+        api.calls += 1
+        return api.responses.pop(0)
+
+    monkeypatch.setattr(llm_generate.http_client, "post", post)
+    return api
+
+
+def stream(prompt="prompt", **kwargs):
+    return list(llm_generate._stream_chat_completion(prompt, cache_key="key", **kwargs))
+
+
+def test_deltas_are_yielded_in_order_and_other_lines_ignored(api):
+    api.responses.append(FakeStreamResponse([
+        ": keep-alive", "", delta("Hello"), "event: ping",
+        "data: " + json.dumps({"choices": [{"delta": {"role": "assistant"}}]}),
+        delta(", world"), "data: [DONE]", delta("after done"),
+    ]))
+    assert stream() == ["Hello", ", world"]
+
+
+def test_completed_stream_is_cached_and_replayed_as_one_delta(api):
+    api.responses.append(FakeStreamResponse([delta("Hello"), delta(" again"), "data: [DONE]"]))
+    stream()
+    assert stream() == ["Hello again"]
+    assert api.calls == 1
+
+
+def test_stream_cut_off_before_done_is_not_cached(api):
+    api.responses.append(FakeStreamResponse([delta("Half an ans")]))
+    assert stream() == ["Half an ans"]
+    assert llm_generate.llm_cache.get("key") is None
+
+
+def test_regenerate_skips_the_cache(api):
+    llm_generate.llm_cache.set("key", "cached")
+    api.responses.append(FakeStreamResponse([delta("fresh"), "data: [DONE]"]))
+    assert stream(use_cache=False) == ["fresh"]
+    assert llm_generate.llm_cache.get("key") == "cached"
+
+
+def test_error_status_raises_and_caches_nothing(api):
+    response = FakeStreamResponse([], status_code=500)
+    api.responses.append(response)
+    with pytest.raises(RuntimeError):
+        stream()
+    assert response.closed
+    assert llm_generate.llm_cache.get("key") is None
@@ -0,0 +1,159 @@
+import os, hashlib, sqlite3
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+from meeting_index import (MeetingIndex, ResidentIndex, current_checkpoint, filter_clause, fts_query,
+                           reciprocal_rank_fusion)
+
+
+def test_rrf_rewards_ids_ranked_well_by_both_retrievers():
+    dense = [1, 2, 3]
+    keyword = [3, 1, 4]
+    assert reciprocal_rank_fusion([dense, keyword]) == [1, 3, 2, 4]
+
+
+def test_rrf_of_a_single_ranking_keeps_its_order():
+    assert reciprocal_rank_fusion([[5, 9, 7]]) == [5, 9, 7]
+    assert reciprocal_rank_fusion([[], []]) == []
+
+
+def test_filter_clause_builds_parameterized_conditions():
+    where, params = filter_clause({"meeting_id": "m-1", "type": "note", "date_from": "2025-01-01",
+                                   "date_to": ""}, alias="c.")
+    assert where == "c.meeting_id = ? AND c.type = ? AND c.date >= ?"
+    assert params == ["m-1", "note", "2025-01-01"]
+    assert filter_clause(None) == ("", [])
+
+
+def test_filter_clause_rejects_unknown_keys():
+    with pytest.raises(ValueError):
+        filter_clause({"speaker": "A"})
+
+
+def test_filter_clause_selects_matching_rows():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE chunks (id INTEGER, meeting_id TEXT, type TEXT, date TEXT)")
+    conn.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?)", [
+        (1, "m-1", "transcript", "2025-06-01"),
+        (2, "m-1", "note", "2025-06-01"),
+        (3, "m-2", "transcript", "2025-07-15"),
+    ])
+    where, params = filter_clause({"type": "transcript", "date_to": "2025-06-30"})
+    assert conn.execute(f"SELECT id FROM chunks WHERE {where}", params).fetchall() == [(1,)]
+
+
+def test_fts_query_quotes_terms_so_punctuation_cant_break_match():
+    assert fts_query("PAY-142 schema? schema") == '"pay" OR "142" OR "schema"'
+    assert fts_query("?!") == ""
+
+
+class FakeEmbedder:
+    """Deterministic unit vectors derived from the text; records what it was asked to embed."""
+
+    dim = 8
+
+    def __init__(self):
+        self.embedded = []
+        self.fail = False
+
+    def encode_batches(self, texts):
+        if self.fail:
+            raise RuntimeError("embedding service unavailable")
+        self.embedded.extend(texts)
+        vectors = [np.frombuffer(hashlib.sha256(t.encode()).digest()[:self.dim * 4], dtype=np.uint32)
+                   .astype(np.float32) for t in texts]
+        vectors = np.stack(vectors)
+        yield 0, vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def split_lines(text):
+    return [{"text": line} for line in text.splitlines() if line.strip()]
+
+
+def doc(doc_id, text, meeting_id="m-1"):
+    return {"doc_id": doc_id, "text": text, "metadata": {"meeting_id": meeting_id, "type": "transcript"}}
+
+
+@pytest.fixture
+def index(tmp_path):
+    embedder = FakeEmbedder()
+    resident = ResidentIndex(str(tmp_path))
+    writer = MeetingIndex(embedder, split_lines, index_dir=str(tmp_path), on_checkpoint=resident.reload)
+    return embedder, writer, resident
+
+
+def texts(snapshot):
+    return sorted(chunk["text"] for chunk in snapshot.fetch(range(100)))
+
+
+def test_only_new_or_changed_content_is_embedded(index):
+    embedder, writer, resident = index
+    stats = writer.update([doc("a", "alpha one\nalpha two"), doc("b", "beta one")])
+    assert (stats["added"], stats["embedded_chunks"]) == (2, 3)
+
+    embedder.embedded.clear()
+    stats = writer.update([doc("a", "alpha one\nalpha two"), doc("b", "beta one\nbeta two")])
+    assert (stats["unchanged"], stats["changed"]) == (1, 1)
+    assert embedder.embedded == ["beta two"]  # "beta one" keeps its vector
+
+    stats = writer.update([doc("b", "beta one\nbeta two")])
+    assert (stats["removed"], stats["removed_chunks"]) == (1, 2)
+    assert texts(resident.snapshot()) == ["beta one", "beta two"]
+    assert resident.snapshot().ntotal == 2
+
+
+def test_unchanged_corpus_writes_no_checkpoint(index, tmp_path):
+    _, writer, _ = index
+    documents = [doc("a", "alpha one")]
+    writer.update(documents)
+    checkpoint = current_checkpoint(str(tmp_path))
+    writer.update(documents)
+    assert current_checkpoint(str(tmp_path)) == checkpoint
+
+
+def test_checkpoint_swap_leaves_open_snapshots_readable(index, tmp_path):
+    _, writer, resident = index
+    writer.update([doc("a", "launch is on friday")])
+    before = resident.snapshot()
+    writer.update([doc("a", "launch moved to monday")])
+    after = resident.snapshot()
+
+    assert after.generation == before.generation + 1
+    assert texts(before) == ["launch is on friday"]
+    assert before.keyword_search("friday", 5) and not after.keyword_search("friday", 5)
+    assert after.keyword_search("monday", 5)
+
+    # Another process polls CURRENT instead of being told about the swap
+    assert ResidentIndex(str(tmp_path)).snapshot().generation == after.generation
+    writer.update([doc("a", "launch cancelled")])
+    checkpoints = sorted(name for name in os.listdir(tmp_path) if name.startswith("checkpoint-"))
+    assert checkpoints == ["checkpoint-2", "checkpoint-3"]  # the one before the previous is dropped
+
+
+def test_failed_update_keeps_the_previous_checkpoint_and_is_redone(index, tmp_path):
+    embedder, writer, resident = index
+    writer.update([doc("a", "alpha one")])
+    checkpoint = current_checkpoint(str(tmp_path))
+
+    embedder.fail = True
+    with pytest.raises(RuntimeError):
+        writer.update([doc("a", "alpha one"), doc("b", "beta one")])
+    assert current_checkpoint(str(tmp_path)) == checkpoint
+    assert texts(resident.snapshot()) == ["alpha one"]
+
+    # The failed document must not count as already indexed
+    embedder.fail = False
+    stats = writer.update([doc("a", "alpha one"), doc("b", "beta one")])
+    assert (stats["unchanged"], stats["added"], stats["embedded_chunks"]) == (1, 1, 1)
+    assert texts(resident.snapshot()) == ["alpha one", "beta one"]
+
+
+def test_a_restarted_writer_continues_from_the_checkpoint(index, tmp_path):
+    _, writer, _ = index
+    documents = [doc("a", "alpha one"), doc("b", "beta one")]
+    writer.update(documents)
+    embedder = FakeEmbedder()
+    stats = MeetingIndex(embedder, split_lines, index_dir=str(tmp_path)).update(documents + [doc("c", "gamma")])
+    assert (stats["unchanged"], stats["added"]) == (2, 1)
+    assert embedder.embedded == ["gamma"]
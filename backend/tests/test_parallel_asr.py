@@ -0,0 +1,29 @@
+import os, sys, subprocess
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Modules that build app state (models, voiceprints, the meeting index, job queues) on import
+APP_MODULES = ("server", "transcript_gen", "speaker_recognition", "chat", "live_sessions", "jobs")
+
+
+def loaded_app_modules():
+    """Runs in a worker: import what an ASR task needs and report which app modules came with it."""
+    import asr_worker  # noqa: F401
+    return [name for name in APP_MODULES if name in sys.modules]
+
+
+def test_spawned_workers_do_not_load_app_state():
+    # Same start method as parallel_asr; its initializer would load a Whisper model, so none here
+    with ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("spawn")) as pool:
+        results = [pool.submit(loaded_app_modules).result(timeout=60) for _ in range(2)]
+    assert results == [[], []]
+
+
+def test_main_script_is_bare_when_a_worker_reruns_it():
+    # What every spawned worker does with the main script before running its first task
+    probe = ("import sys, multiprocessing.spawn as spawn; spawn.import_main_path('app.py'); "
+             f"print([name for name in {APP_MODULES!r} if name in sys.modules])")
+    output = subprocess.run([sys.executable, "-c", probe], cwd=BACKEND_DIR, capture_output=True,
+                            text=True, check=True, timeout=60).stdout
+    assert output.strip() == "[]"
@@ -0,0 +1,96 @@
+import threading, time
+import pytest
+import rate_limiter
+from rate_limiter import TokenBucket, ProviderLimiter, UpstreamRateLimited, PRIORITY_BATCH, PRIORITY_INTERACTIVE
+
+
+def test_bucket_starts_full_and_refills_at_its_rate():
+    bucket = TokenBucket(60)  # one per second
+    now = bucket.updated
+    assert bucket.time_until(60, now) == 0
+    bucket.take(60)
+    assert bucket.time_until(1, now) == pytest.approx(1.0)
+    assert bucket.time_until(1, now + 1) == pytest.approx(0.0)
+
+
+def test_bucket_caps_oversized_requests_and_unlimited_never_waits():
+    bucket = TokenBucket(60)
+    bucket.take(1000)  # charged at most a full bucket
+    assert bucket.level == 0
+    assert TokenBucket(0).time_until(10 ** 6, time.time()) == 0
+
+
+def test_waiting_requests_are_admitted_by_priority_then_arrival():
+    limiter = ProviderLimiter("test", max_in_flight=1, rpm=0, tpm=0)
+    limiter.acquire(1)  # holds the only slot
+    order = []
+
+    def wait(label, priority):
+        limiter.acquire(1, priority, timeout=5)
+        order.append(label)
+        limiter.release()
+
+    threads = []
+    for label, priority in [("batch-1", PRIORITY_BATCH), ("batch-2", PRIORITY_BATCH),
+                            ("interactive", PRIORITY_INTERACTIVE)]:
+        thread = threading.Thread(target=wait, args=(label, priority))
+        thread.start()
+        threads.append(thread)
+        while len(limiter.queue) < len(threads):
+            time.sleep(0.01)
+    limiter.release()
+    for thread in threads:
+        thread.join(5)
+    assert order == ["interactive", "batch-1", "batch-2"]
+
+
+def test_queue_timeout_raises_rate_limited():
+    limiter = ProviderLimiter("test", max_in_flight=1, rpm=0, tpm=0)
+    limiter.acquire(1)
+    with pytest.raises(UpstreamRateLimited):
+        limiter.acquire(1, timeout=0.05)
+    assert limiter.queue == []
+    assert limiter.stats()["rejected"] == 1
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    limiter = ProviderLimiter("test", max_in_flight=1, rpm=0, tpm=0)
+    monkeypatch.setitem(rate_limiter.limiters, "test", limiter)
+    return limiter
+
+
+def test_admitted_request_requeues_each_retry_after_a_429(limiter):
+    responses = [FakeResponse(429, {"Retry-After": "0"}), FakeResponse(200)]
+    with rate_limiter.admitted_request("test", "prompt", lambda: responses.pop(0), retries=2) as response:
+        assert response.status_code == 200
+        assert limiter.in_flight == 1
+    assert limiter.in_flight == 0
+    assert limiter.admitted == 2
+    assert limiter.upstream_429s == 1
+
+
+def test_admitted_request_raises_on_a_final_429(limiter):
+    with pytest.raises(UpstreamRateLimited) as e:
+        with rate_limiter.admitted_request("test", "prompt", lambda: FakeResponse(429, {"Retry-After": "7"}),
+                                           retries=0):
+            pass
+    assert e.value.retry_after == 7
+    assert limiter.in_flight == 0
+    assert limiter.paused_until > time.time() + 5
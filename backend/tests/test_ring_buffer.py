@@ -0,0 +1,65 @@
+import threading
+import numpy as np
+from ring_buffer import AudioRingBuffer
+
+
+def samples(start, n):
+    return np.arange(start, start + n, dtype=np.float32)
+
+
+def test_readers_keep_independent_cursors():
+    ring = AudioRingBuffer(10)
+    ring.add_reader("fast")
+    ring.add_reader("slow")
+    ring.write(samples(0, 4))
+    np.testing.assert_array_equal(ring.read("fast"), samples(0, 4))
+    assert ring.available("fast") == 0
+    assert ring.available("slow") == 4
+    np.testing.assert_array_equal(ring.read("slow", 2), samples(0, 2))
+    assert ring.position("slow") == 2
+
+
+def test_reads_wrap_around_the_end_of_the_buffer():
+    ring = AudioRingBuffer(8)
+    ring.add_reader("r")
+    ring.write(samples(0, 6))
+    ring.read("r")
+    ring.write(samples(6, 5))
+    out = np.empty(8, dtype=np.float32)
+    assert ring.read_into("r", out) == 5
+    np.testing.assert_array_equal(out[:5], samples(6, 5))
+
+
+def test_a_reader_that_falls_behind_skips_to_the_oldest_sample():
+    ring = AudioRingBuffer(8)
+    ring.add_reader("r")
+    ring.write(samples(0, 6))
+    ring.write(samples(6, 6))
+    assert ring.dropped["r"] == 4
+    np.testing.assert_array_equal(ring.read("r"), samples(4, 8))
+
+
+def test_writes_larger_than_the_buffer_keep_the_newest_samples():
+    ring = AudioRingBuffer(4)
+    ring.add_reader("r")
+    ring.write(samples(0, 10))
+    np.testing.assert_array_equal(ring.read("r"), samples(6, 4))
+
+
+def test_late_reader_can_start_from_the_oldest_retained_sample():
+    ring = AudioRingBuffer(8)
+    ring.write(samples(0, 10))
+    ring.add_reader("late", from_start=True)
+    ring.add_reader("live")
+    assert ring.available("late") == 8
+    assert ring.available("live") == 0
+
+
+def test_wait_returns_what_is_left_once_closed():
+    ring = AudioRingBuffer(8)
+    ring.add_reader("r")
+    ring.write(samples(0, 3))
+    closer = threading.Timer(0.05, ring.close)
+    closer.start()
+    assert ring.wait("r", 5, timeout=5) == 3
+    closer.join()
@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+import numpy as np
+from streaming_decoder import LocalAgreementDecoder
+
+
+class ScriptedModel:
+    """Returns one scripted hypothesis per transcribe call: a list of (start, end, word)."""
+
+    def __init__(self, hypotheses):
+        self.hypotheses = list(hypotheses)
+        self.prompts = []
+
+    def transcribe(self, audio, initial_prompt=None, **kwargs):
+        self.prompts.append(initial_prompt)
+        words = [SimpleNamespace(start=s, end=e, word=w) for s, e, w in self.hypotheses.pop(0)]
+        return [SimpleNamespace(words=words)], None
+
+
+def decoder_for(hypotheses):
+    decoder = LocalAgreementDecoder(ScriptedModel(hypotheses), sample_rate=10)
+    decoder.insert_audio(np.zeros(10, dtype=np.float32))
+    return decoder
+
+
+def test_words_are_committed_only_once_two_passes_agree():
+    decoder = decoder_for([
+        [(0.0, 0.4, " Hello"), (0.4, 0.8, " word")],
+        [(0.0, 0.4, " hello,"), (0.4, 0.8, " world"), (0.8, 1.0, " again")],
+    ])
+    assert decoder.process() == []
+    assert decoder.provisional_text == "Hello word"
+    committed = decoder.process()
+    assert [w for _, _, w in committed] == [" hello,"]  # case and punctuation don't matter
+    assert decoder.provisional_text == "world again"
+
+
+def test_committed_words_are_not_emitted_again_and_prime_the_prompt():
+    decoder = decoder_for([
+        [(0.0, 0.5, " One"), (0.5, 1.0, " two")],
+        [(0.0, 0.5, " One"), (0.5, 1.0, " two")],
+        [(0.0, 0.5, " One"), (0.5, 1.0, " two"), (1.0, 1.5, " three")],
+    ])
+    decoder.process()
+    assert [w for _, _, w in decoder.process()] == [" One", " two"]
+    assert decoder.finish() == [(1.0, 1.5, " three")]
+    assert decoder.model.prompts[-1] == "One two"
+
+
+def test_restart_offsets_word_times_and_drops_the_provisional_tail():
+    decoder = decoder_for([[(0.0, 0.5, " stale")], [(0.0, 0.5, " fresh")]])
+    decoder.process()
+    decoder.restart(30.0)
+    decoder.insert_audio(np.zeros(10, dtype=np.float32))
+    assert decoder.provisional_text == ""
+    assert decoder.finish() == [(30.0, 30.5, " fresh")]
@@ -0,0 +1,58 @@
+import pytest
+from transcript_chunker import parse_turns, chunk_transcript, validate_turns
+
+
+def count_words(text):
+    return len(text.split())
+
+
+TRANSCRIPT = """[A - 0.00s to 4.00s]: Let's start with the rollout plan.
+[B - 4.00s to 9.50s]: The checklist is ready for review.
+[A - 9.50s to 12.00s]: Great, thanks."""
+
+
+def test_parse_turns_reads_speaker_times_and_plain_lines():
+    turns = parse_turns(TRANSCRIPT + "\nA note without a speaker")
+    assert turns[1] == {"speaker": "B", "start": 4.0, "end": 9.5, "text": "The checklist is ready for review."}
+    assert turns[-1] == {"speaker": None, "start": None, "end": None, "text": "A note without a speaker"}
+
+
+def test_whole_turns_are_grouped_up_to_the_budget():
+    chunks = chunk_transcript(TRANSCRIPT, count_words, max_tokens=25)
+    assert [chunk["text"].count("\n") + 1 for chunk in chunks] == [2, 1]
+    assert chunks[0]["start_seconds"] == 0.0 and chunks[0]["end_seconds"] == 9.5
+    assert chunks[0]["speakers"] == "A, B"
+    assert chunks[1]["speakers"] == "A"
+
+
+def test_a_turn_over_the_budget_is_split_and_keeps_its_speaker_and_times():
+    long_turn = "[C - 1.00s to 30.00s]: " + "One two three four five. " * 10
+    chunks = chunk_transcript(long_turn, count_words, max_tokens=20)
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert count_words(chunk["text"]) <= 20
+        assert chunk["text"].startswith("[C - 1.00s to 30.00s]: ")
+        assert (chunk["start_seconds"], chunk["end_seconds"], chunk["speakers"]) == (1.0, 30.0, "C")
+
+
+def test_untimed_text_has_no_times_or_speakers():
+    chunks = chunk_transcript("First note line.\nSecond note line.", count_words, max_tokens=50)
+    assert chunks == [{"text": "First note line.\nSecond note line.", "start_seconds": None,
+                       "end_seconds": None, "speakers": None}]
+
+
+def test_validate_turns_normalizes_client_segments():
+    turns = validate_turns([{"speaker": 1, "start": "0.5", "end": 2, "text": "hi"}])
+    assert turns == [{"speaker": "1", "start": 0.5, "end": 2.0, "text": "hi"}]
+
+
+@pytest.mark.parametrize("segments", [
+    {"start": 0},
+    [{"start": 0, "text": "no end"}],
+    [{"start": "soon", "end": 1, "text": "x"}],
+    [{"start": 2, "end": 1, "text": "backwards"}],
+    [{"start": 0, "end": 1, "text": None}],
+])
+def test_validate_turns_rejects_malformed_segments(segments):
+    with pytest.raises(ValueError):
+        validate_turns(segments)
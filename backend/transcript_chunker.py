@@ -0,0 +1,120 @@
+import os, re
+
+# Budget per index chunk, in embedding-model tokens (all-MiniLM-L6-v2 truncates at 256)
+INDEX_CHUNK_TOKENS = int(os.getenv("INDEX_CHUNK_TOKENS", 200))
+
+# Matches the lines /transcribe produces: "[A - 1.00s to 4.20s]: text"
+TURN_PATTERN = re.compile(r"^\[(?P<speaker>.+?) - (?P<start>[\d.]+)s to (?P<end>[\d.]+)s\]:\s*(?P<text>.*)$")
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
+
+def format_turn(turn):
+    if turn.get("speaker") is None:
+        return turn["text"]
+    return f"[{turn['speaker']} - {turn['start']:.2f}s to {turn['end']:.2f}s]: {turn['text']}"
+
+
+def parse_turns(transcript):
+    """Split a combined transcript back into speaker turns; unmatched lines become plain turns."""
+    turns = []
+    for line in transcript.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        match = TURN_PATTERN.match(line)
+        if match:
+            turns.append({
+                "speaker": match.group("speaker"),
+                "start": float(match.group("start")),
+                "end": float(match.group("end")),
+                "text": match.group("text")
+            })
+        else:
+            turns.append({"speaker": None, "start": None, "end": None, "text": line})
+    return turns
+
+
+def validate_turns(segments):
+    """
+    Client-supplied speaker segments as turns, with start/end as floats and the speaker as
+    a string (or None). Raises ValueError describing the first malformed segment.
+    """
+    if not isinstance(segments, list):
+        raise ValueError("expected a list of {speaker, start, end, text} objects")
+    turns = []
+    for i, segment in enumerate(segments):
+        if not isinstance(segment, dict):
+            raise ValueError(f"segment {i} is not an object")
+        missing = [key for key in ("start", "end", "text") if key not in segment]
+        if missing:
+            raise ValueError(f"segment {i} is missing {', '.join(missing)}")
+        if not isinstance(segment["text"], str):
+            raise ValueError(f"segment {i} text must be a string")
+        try:
+            start, end = float(segment["start"]), float(segment["end"])
+        except (TypeError, ValueError):
+            raise ValueError(f"segment {i} start and end must be numbers")
+        if not (0 <= start <= end < float("inf")):
+            raise ValueError(f"segment {i} must have 0 <= start <= end")
+        speaker = segment.get("speaker")
+        turns.append({"speaker": None if speaker is None else str(speaker),
+                      "start": start, "end": end, "text": segment["text"]})
+    return turns
+
+
+def split_turn_text(text, max_tokens, count_tokens):
+    """Split one turn's text on sentence boundaries, falling back to words for run-on sentences."""
+    pieces, current, current_tokens = [], [], 0
+    for sentence in SENTENCE_PATTERN.split(text):
+        units = sentence.split() if count_tokens(sentence) > max_tokens else [sentence]
+        for unit in units:
+            tokens = count_tokens(unit) + 1
+            if current and current_tokens + tokens > max_tokens:
+                pieces.append(" ".join(current))
+                current, current_tokens = [], 0
+            current.append(unit)
+            current_tokens += tokens
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def _close_chunk(turns):
+    timed = [turn for turn in turns if turn["start"] is not None]
+    speakers = []
+    for turn in turns:
+        if turn["speaker"] is not None and turn["speaker"] not in speakers:
+            speakers.append(turn["speaker"])
+    return {
+        "text": "\n".join(format_turn(turn) for turn in turns),
+        "start_seconds": min(turn["start"] for turn in timed) if timed else None,
+        "end_seconds": max(turn["end"] for turn in timed) if timed else None,
+        "speakers": ", ".join(speakers) or None,
+    }
+
+
+def chunk_transcript(text, count_tokens, max_tokens=INDEX_CHUNK_TOKENS):
+    """
+    Index chunks for a transcript (or a note, which parses as plain lines). Whole speaker
+    turns are grouped up to `max_tokens`; only a turn that is longer than the budget by
+    itself is split, and each piece keeps the turn's speaker and times. Every chunk is
+    {"text", "start_seconds", "end_seconds", "speakers"}, times None for untimed text.
+    """
+    chunks, current, current_tokens = [], [], 0
+    for turn in parse_turns(text):
+        pieces = [turn]
+        if count_tokens(format_turn(turn)) + 1 > max_tokens:
+            # Leave room for the "[speaker - start to end]: " prefix each piece repeats
+            prefix = count_tokens(format_turn(dict(turn, text=""))) + 1
+            pieces = [dict(turn, text=piece)
+                      for piece in split_turn_text(turn["text"], max(1, max_tokens - prefix), count_tokens)]
+        for piece in pieces:
+            tokens = count_tokens(format_turn(piece)) + 1
+            if current and current_tokens + tokens > max_tokens:
+                chunks.append(_close_chunk(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += tokens
+    if current:
+        chunks.append(_close_chunk(current))
+    return chunks
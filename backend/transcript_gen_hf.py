@@ -1,8 +1,10 @@
-import time, requests
+import time
+import http_client
 import librosa
 import whisper
 import soundfile as sf
-from faster_whisper import WhisperModel
+from faster_whisper import WhisperModel, decode_audio
+from parallel_asr import transcribe_parallel, PARALLEL_ASR_MIN_SECONDS
 from transformers import pipeline
 
 import os
@@ -70,10 +72,16 @@ def generate_transcript_faster_whisper(audio_filepath):
     """Generates transcript using the faster-whisper model."""
     start_time = time.time()
     try:
-        segments, info = faster_whisper_model.transcribe(audio_filepath, beam_size=5)
-        full_transcript = ""
-        for segment in segments:
-            full_transcript += segment.text + " "
+        audio = decode_audio(audio_filepath, sampling_rate=16000)
+        if len(audio) / 16000 >= PARALLEL_ASR_MIN_SECONDS:
+            # Long files: chunks cut at pauses, transcribed across a process pool
+            segments = transcribe_parallel(audio, "base", compute_type="float32", beam_size=5)
+            full_transcript = " ".join(text for _, _, text in segments) + " "
+        else:
+            segments, info = faster_whisper_model.transcribe(audio, beam_size=5)
+            full_transcript = ""
+            for segment in segments:
+                full_transcript += segment.text + " "
         end_time = time.time()
         transcription_time = end_time - start_time
         return full_transcript.strip(), transcription_time
@@ -89,7 +97,7 @@ def generate_transcript_hf(filepath):
     
     try:
         with open(filepath, "rb") as audio_file:
-            response = requests.post(API_URL, headers=HEADERS, files={"file": audio_file})
+            response = http_client.post(API_URL, headers=HEADERS, files={"file": audio_file}, idempotent=True)
 
         if response.status_code != 200:
             print("API Error:", response.status_code, response.text)
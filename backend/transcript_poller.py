@@ -0,0 +1,166 @@
+import os, time, heapq, threading
+from concurrent.futures import Future
+import http_client
+
+TRANSCRIPT_ENDPOINT = "https://api.assemblyai.com/v2/transcript"
+POLL_POOL_SIZE = int(os.getenv("POLL_POOL_SIZE", 10))
+POLL_MIN_INTERVAL = float(os.getenv("POLL_MIN_INTERVAL", 3))
+POLL_MAX_INTERVAL = float(os.getenv("POLL_MAX_INTERVAL", 30))
+POLL_BACKOFF = 1.5
+POLL_REQUEST_TIMEOUT = (5, 30)  # connect, read
+# AssemblyAI usually finishes in a fraction of the audio duration; don't poll before that
+EXPECTED_PROCESSING_RATIO = float(os.getenv("EXPECTED_PROCESSING_RATIO", 0.15))
+DEADLINE_RATIO = float(os.getenv("POLL_DEADLINE_RATIO", 2.0))
+MIN_DEADLINE_SECONDS = float(os.getenv("POLL_MIN_DEADLINE", 600))
+
+
+class TranscriptionTimeout(Exception):
+    pass
+
+
+class _Pending:
+    def __init__(self, transcript_id, future, deadline, interval):
+        self.transcript_id = transcript_id
+        self.future = future
+        self.deadline = deadline
+        self.interval = interval
+        self.due = None  # when the next poll is scheduled; None while a poll is running
+
+
+class TranscriptPoller:
+    """
+    One background thread that tracks every outstanding AssemblyAI transcript.
+
+    Each submitted transcript id gets a Future that resolves with the transcript JSON.
+    Polls are scheduled on a heap so the thread only wakes when the next poll is due,
+    go through the shared pooled HTTP client, start after an estimate based on audio
+    duration and back off geometrically. When webhooks are used, no polls are scheduled
+    at all and the webhook handler calls notify() instead. Every job has an overall
+    deadline.
+    """
+
+    def __init__(self, headers):
+        self.headers = headers
+        http_client.configure(TRANSCRIPT_ENDPOINT, pool_size=POLL_POOL_SIZE)
+        self.pending = {}
+        self.schedule = []  # heap of (due time, transcript id)
+        self.early_notifications = {}  # webhooks that arrived before submit(), id -> time
+        self.condition = threading.Condition()
+        self.thread = None
+
+    def _ensure_thread(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, name="transcript-poller", daemon=True)
+            self.thread.start()
+
+    def submit(self, transcript_id, audio_duration=None, use_webhook=False):
+        """Start tracking `transcript_id`. Returns a Future resolving to the completed transcript JSON."""
+        now = time.time()
+        duration = audio_duration or 0
+        deadline = now + max(MIN_DEADLINE_SECONDS, duration * DEADLINE_RATIO)
+        first_poll = now + max(POLL_MIN_INTERVAL, duration * EXPECTED_PROCESSING_RATIO)
+        future = Future()
+        with self.condition:
+            self.pending[transcript_id] = _Pending(transcript_id, future, deadline, POLL_MIN_INTERVAL)
+            if self.early_notifications.pop(transcript_id, None):
+                due = now
+            elif use_webhook:
+                # With a webhook configured the only scheduled wake-up is the deadline check
+                due = deadline
+            else:
+                due = first_poll
+            self.pending[transcript_id].due = due
+            heapq.heappush(self.schedule, (due, transcript_id))
+            self._ensure_thread()
+            self.condition.notify()
+        return future
+
+    def notify(self, transcript_id):
+        """Webhook entry point: fetch `transcript_id` now. Returns False if it isn't tracked yet."""
+        with self.condition:
+            if transcript_id not in self.pending:
+                # The callback can beat submit(); remember it for a while
+                cutoff = time.time() - MIN_DEADLINE_SECONDS
+                for stale in [k for k, t in self.early_notifications.items() if t < cutoff]:
+                    del self.early_notifications[stale]
+                self.early_notifications[transcript_id] = time.time()
+                return False
+            entry = self.pending[transcript_id]
+            now = time.time()
+            if entry.due is not None and entry.due <= now:
+                return True  # a poll is already due; a repeated webhook doesn't add another
+            # Moves the poll forward (or, if one is running, queues another right after it)
+            entry.due = now
+            heapq.heappush(self.schedule, (now, transcript_id))
+            self.condition.notify()
+        return True
+
+    def cancel(self, transcript_id):
+        with self.condition:
+            entry = self.pending.pop(transcript_id, None)
+        if entry:
+            entry.future.cancel()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while True:
+                    # Drop heap entries for transcripts that already finished or were rescheduled
+                    while self.schedule and (self.schedule[0][1] not in self.pending
+                                             or self.schedule[0][0] != self.pending[self.schedule[0][1]].due):
+                        heapq.heappop(self.schedule)
+                    if not self.schedule:
+                        self.condition.wait()
+                        continue
+                    due, transcript_id = self.schedule[0]
+                    wait = due - time.time()
+                    if wait <= 0:
+                        heapq.heappop(self.schedule)
+                        entry = self.pending[transcript_id]
+                        entry.due = None
+                        break
+                    self.condition.wait(timeout=wait)
+            self._poll(entry)
+
+    def _poll(self, entry):
+        if entry.future.cancelled():
+            self._resolve(entry)
+            return
+
+        # Polled even at the deadline: with webhooks this is the only check, and the
+        # transcript may well be done with its callback lost
+        try:
+            # No retries here: a failed poll is simply rescheduled
+            response = http_client.get(f"{TRANSCRIPT_ENDPOINT}/{entry.transcript_id}",
+                                       headers=self.headers, timeout=POLL_REQUEST_TIMEOUT, retries=0)
+            result = response.json()
+            status = result.get("status")
+        except Exception as e:
+            # Transient network problems just push the next poll back
+            print(f"Polling {entry.transcript_id} failed: {e}")
+            status = None
+
+        if status == "completed":
+            self._resolve(entry, result=result)
+        elif status == "error":
+            self._resolve(entry, error=RuntimeError(f"Transcription error: {result.get('error')}"))
+        elif time.time() >= entry.deadline:
+            self._resolve(entry, error=TranscriptionTimeout(
+                f"Transcript {entry.transcript_id} did not complete before its deadline"))
+        else:
+            with self.condition:
+                # A webhook during this poll already scheduled the next one
+                if entry.transcript_id in self.pending and entry.due is None:
+                    entry.due = min(time.time() + entry.interval, entry.deadline)
+                    entry.interval = min(entry.interval * POLL_BACKOFF, POLL_MAX_INTERVAL)
+                    heapq.heappush(self.schedule, (entry.due, entry.transcript_id))
+
+    def _resolve(self, entry, result=None, error=None):
+        with self.condition:
+            self.pending.pop(entry.transcript_id, None)
+        if entry.future.cancelled():
+            return
+        if error is not None:
+            entry.future.set_exception(error)
+        else:
+            entry.future.set_result(result)
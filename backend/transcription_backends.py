@@ -0,0 +1,283 @@
+import time, os, json
+import concurrent.futures
+import threading
+import http_client
+from http_client import HTTP_CONNECT_TIMEOUT
+from transcript_poller import TranscriptPoller
+from parallel_asr import transcribe_parallel, PARALLEL_ASR_MIN_SECONDS
+from audio_ingest import audio_duration, read_manifest
+
+TRANSCRIPTION_BACKEND = os.getenv("TRANSCRIPTION_BACKEND", "assemblyai")
+
+ASSEMBLYAI_API_KEY = os.getenv("ASSEMBLYAI_API_KEY")
+HEADERS = {
+    "authorization": ASSEMBLYAI_API_KEY,
+    "content-type": "application/json"
+}
+UPLOAD_HEADERS = {
+    "authorization": ASSEMBLYAI_API_KEY,
+}
+# When set, AssemblyAI calls this URL on completion and transcripts are not polled
+ASSEMBLYAI_WEBHOOK_URL = os.getenv("ASSEMBLYAI_WEBHOOK_URL")
+ASSEMBLYAI_WEBHOOK_SECRET = os.getenv("ASSEMBLYAI_WEBHOOK_SECRET")
+WEBHOOK_AUTH_HEADER = "X-Webhook-Secret"
+# The upload response only arrives once AssemblyAI has stored the whole file
+ASSEMBLYAI_UPLOAD_READ_TIMEOUT = float(os.getenv("ASSEMBLYAI_UPLOAD_READ_TIMEOUT", 300))
+
+# Shared by every in-flight transcription
+poller = TranscriptPoller(HEADERS)
+
+# Local CPU backend settings
+LOCAL_WHISPER_MODEL = os.getenv("LOCAL_WHISPER_MODEL", "small")
+LOCAL_WHISPER_THREADS = int(os.getenv("LOCAL_WHISPER_THREADS", 0))  # 0 = ctranslate2 default
+DIARIZATION_MODEL = os.getenv("DIARIZATION_MODEL", "pyannote/speaker-diarization-3.1")
+HUGGINGFACE_API_TOKEN = os.getenv("HUGGINGFACE_API_TOKEN")
+MERGE_GAP_SECONDS = 1.0  # consecutive same-speaker segments closer than this become one utterance
+SPEECH_CLIP_PAD_SECONDS = 0.3  # margin around ingest speech regions, so onsets aren't clipped
+
+# Fake backend settings, used to exercise the job queue without AssemblyAI
+FAKE_TRANSCRIPT_PATH = os.getenv("FAKE_TRANSCRIPT_PATH")  # JSON list of {speaker,start,end,text}
+FAKE_TRANSCRIPTION_DELAY = float(os.getenv("FAKE_TRANSCRIPTION_DELAY", 2))
+FAKE_SEGMENT_SECONDS = 10
+
+
+def _report(on_stage, stage):
+    if on_stage:
+        on_stage(stage)
+
+
+def upload_to_assemblyai(audio_path):
+    with open(audio_path, 'rb') as f:
+        response = http_client.post(
+            'https://api.assemblyai.com/v2/upload',
+            headers=UPLOAD_HEADERS,
+            data=f,
+            timeout=(HTTP_CONNECT_TIMEOUT, ASSEMBLYAI_UPLOAD_READ_TIMEOUT),
+            idempotent=True  # a repeated upload only leaves an unused copy behind
+        )
+    response.raise_for_status()
+    return response.json()['upload_url']
+
+
+def request_transcription(audio_url):
+    json_data = {
+        "audio_url": audio_url,
+        "speaker_labels": True,
+        "auto_chapters": False,
+        "punctuate": True,
+        "format_text": True
+    }
+    if ASSEMBLYAI_WEBHOOK_URL:
+        json_data["webhook_url"] = ASSEMBLYAI_WEBHOOK_URL
+        if ASSEMBLYAI_WEBHOOK_SECRET:
+            json_data["webhook_auth_header_name"] = WEBHOOK_AUTH_HEADER
+            json_data["webhook_auth_header_value"] = ASSEMBLYAI_WEBHOOK_SECRET
+    response = http_client.post(
+        "https://api.assemblyai.com/v2/transcript",
+        headers=HEADERS,
+        json=json_data
+    )
+    response.raise_for_status()
+    return response.json()['id']
+
+
+def get_transcription_result(transcript_id, audio_duration=None, on_stage=None):
+    """Wait for the shared poller (or webhook) to resolve `transcript_id`."""
+    future = poller.submit(transcript_id, audio_duration=audio_duration,
+                           use_webhook=bool(ASSEMBLYAI_WEBHOOK_URL))
+    try:
+        while True:
+            # Lets a job queue cancel while we wait
+            _report(on_stage, "transcribing")
+            try:
+                return future.result(timeout=1)
+            except concurrent.futures.TimeoutError:
+                continue
+    except BaseException:
+        poller.cancel(transcript_id)
+        raise
+
+
+class AssemblyAIBackend:
+    """Upload + speaker-labelled transcription on AssemblyAI."""
+    name = "assemblyai"
+
+    def transcribe(self, audio_path, on_stage=None):
+        _report(on_stage, "uploading")
+        upload_url = upload_to_assemblyai(audio_path)
+        transcript_id = request_transcription(upload_url)
+        result = get_transcription_result(transcript_id, audio_duration=audio_duration(audio_path),
+                                          on_stage=on_stage)
+
+        return [{
+            "speaker": utterance["speaker"],
+            "start": utterance["start"] / 1000.0,  # ms to seconds
+            "end": utterance["end"] / 1000.0,
+            "text": utterance["text"].strip()
+        } for utterance in result.get("utterances", [])]
+
+
+def speech_clips(audio_path, pad=SPEECH_CLIP_PAD_SECONDS):
+    """
+    The speech regions found while the audio was ingested, padded and merged into the flat
+    [start, end, start, end, ...] list faster-whisper takes as clip_timestamps. None when
+    the artifact has no regions (not a chunked upload, or no speech detected).
+    """
+    manifest = read_manifest(audio_path)
+    regions = manifest.get("speech_regions") if manifest else None
+    if not regions:
+        return None
+    clips = []
+    for start, end in regions:
+        start, end = max(0.0, start - pad), end + pad
+        if clips and start <= clips[-1]:
+            clips[-1] = max(clips[-1], end)
+        else:
+            clips += [start, end]
+    return clips
+
+
+def assign_speakers(asr_segments, turns):
+    """
+    Give each ASR segment the diarization speaker it overlaps most, then merge consecutive
+    segments of the same speaker into utterances. Labels become A, B, ... in order of appearance.
+    """
+    letters = {}
+    utterances = []
+    for start, end, text in asr_segments:
+        best_label, best_overlap = None, 0.0
+        for turn_start, turn_end, label in turns:
+            overlap = min(end, turn_end) - max(start, turn_start)
+            if overlap > best_overlap:
+                best_label, best_overlap = label, overlap
+        if best_label is None:
+            # No overlapping turn (e.g. diarization unavailable): inherit the previous speaker
+            best_label = utterances[-1]["label"] if utterances else "default"
+        if best_label not in letters:
+            letters[best_label] = chr(ord("A") + len(letters)) if len(letters) < 26 else f"S{len(letters)}"
+        speaker = letters[best_label]
+
+        previous = utterances[-1] if utterances else None
+        if previous and previous["speaker"] == speaker and start - previous["end"] <= MERGE_GAP_SECONDS:
+            previous["end"] = end
+            previous["text"] = f"{previous['text']} {text}"
+        else:
+            utterances.append({"speaker": speaker, "label": best_label, "start": start, "end": end, "text": text})
+
+    return [{key: u[key] for key in ("speaker", "start", "end", "text")} for u in utterances]
+
+
+class LocalWhisperBackend:
+    """
+    On-prem CPU backend: faster-whisper (int8) for ASR and pyannote for diarization.
+    Nothing leaves the machine. Models load on first use and are shared across requests.
+    """
+    name = "local"
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.model = None
+        self.diarization = None
+        self.diarization_failed = False
+
+    def _load_models(self):
+        # Imported here so the other backends don't need faster-whisper, pyannote or torch
+        from faster_whisper import WhisperModel
+
+        with self.lock:
+            if self.model is None:
+                print(f"Loading faster-whisper '{LOCAL_WHISPER_MODEL}' (int8, CPU)...")
+                self.model = WhisperModel(LOCAL_WHISPER_MODEL, device="cpu", compute_type="int8",
+                                          cpu_threads=LOCAL_WHISPER_THREADS)
+            if self.diarization is None and not self.diarization_failed:
+                try:
+                    import torch
+                    from pyannote.audio import Pipeline
+                    print(f"Loading diarization pipeline {DIARIZATION_MODEL}...")
+                    self.diarization = Pipeline.from_pretrained(DIARIZATION_MODEL,
+                                                                use_auth_token=HUGGINGFACE_API_TOKEN)
+                    self.diarization.to(torch.device("cpu"))
+                except Exception as e:
+                    # Transcripts still work, just with a single speaker
+                    print(f"Diarization unavailable, continuing without it: {e}")
+                    self.diarization_failed = True
+
+    def transcribe(self, audio_path, on_stage=None):
+        self._load_models()
+
+        _report(on_stage, "transcribing")
+        if audio_duration(audio_path) >= PARALLEL_ASR_MIN_SECONDS:
+            # Long recordings are cut at pauses and decoded across all cores
+            asr_segments = transcribe_parallel(audio_path, LOCAL_WHISPER_MODEL, compute_type="int8",
+                                               on_stage=on_stage, beam_size=5, vad_filter=True)
+        else:
+            # Speech found during a chunked upload saves a second VAD pass over the file
+            clips = speech_clips(audio_path)
+            options = {"clip_timestamps": clips} if clips else {"vad_filter": True}
+            segments, info = self.model.transcribe(audio_path, beam_size=5, **options)
+            asr_segments = []
+            for segment in segments:  # generator: decoding happens while iterating
+                _report(on_stage, "transcribing")
+                if segment.text.strip():
+                    asr_segments.append((segment.start, segment.end, segment.text.strip()))
+
+        turns = []
+        if self.diarization is not None:
+            _report(on_stage, "diarizing")
+            annotation = self.diarization(audio_path)
+            turns = [(turn.start, turn.end, label) for turn, _, label in annotation.itertracks(yield_label=True)]
+
+        return assign_speakers(asr_segments, turns)
+
+
+class FakeBackend:
+    """
+    Local stand-in for AssemblyAI. Returns the segments in FAKE_TRANSCRIPT_PATH, or
+    one canned segment per 10 s of audio with alternating speakers, after a short delay.
+    """
+    name = "fake"
+
+    def transcribe(self, audio_path, on_stage=None):
+        _report(on_stage, "uploading")
+        deadline = time.time() + FAKE_TRANSCRIPTION_DELAY
+        while time.time() < deadline:
+            _report(on_stage, "transcribing")
+            time.sleep(min(0.1, max(0.0, deadline - time.time())))
+
+        if FAKE_TRANSCRIPT_PATH:
+            with open(FAKE_TRANSCRIPT_PATH, "r", encoding="utf-8") as f:
+                return json.load(f)
+
+        duration = audio_duration(audio_path)
+        segments = []
+        start = 0.0
+        while start < duration:
+            end = min(duration, start + FAKE_SEGMENT_SECONDS)
+            segments.append({
+                "speaker": "AB"[len(segments) % 2],
+                "start": start,
+                "end": end,
+                "text": f"Fake segment {len(segments) + 1}."
+            })
+            start = end
+        return segments
+
+
+BACKENDS = {
+    AssemblyAIBackend.name: AssemblyAIBackend,
+    LocalWhisperBackend.name: LocalWhisperBackend,
+    FakeBackend.name: FakeBackend,
+}
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_backend(name=None):
+    """Return the (shared) backend instance for `name`, defaulting to TRANSCRIPTION_BACKEND."""
+    name = name or TRANSCRIPTION_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown transcription backend: {name}")
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = BACKENDS[name]()
+        return _instances[name]
@@ -0,0 +1,87 @@
+import os
+import numpy as np
+
+VAD_FRAME_MS = int(os.getenv("VAD_FRAME_MS", 30))
+# A frame is speech when it is this far above the tracked noise floor...
+VAD_MARGIN_DB = float(os.getenv("VAD_MARGIN_DB", 10))
+# ...and above this absolute level (dBFS), so near-digital-silence never counts
+VAD_MIN_DB = float(os.getenv("VAD_MIN_DB", -50))
+VAD_HANGOVER_MS = int(os.getenv("VAD_HANGOVER_MS", 300))
+VAD_MIN_SPEECH_MS = int(os.getenv("VAD_MIN_SPEECH_MS", 200))
+NOISE_FLOOR_RISE_DB = 0.05  # per frame, so the floor follows a slowly rising background
+
+
+class EnergyVAD:
+    """
+    Streaming frame-energy speech detector. Feed mono samples in any block size with
+    process(); it returns the speech regions (start, end) in seconds that closed during
+    that block. Regions shorter than VAD_MIN_SPEECH_MS are dropped, and a region stays
+    open through pauses shorter than VAD_HANGOVER_MS.
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=VAD_FRAME_MS, margin_db=VAD_MARGIN_DB,
+                 min_db=VAD_MIN_DB, hangover_ms=VAD_HANGOVER_MS, min_speech_ms=VAD_MIN_SPEECH_MS):
+        self.sample_rate = sample_rate
+        self.frame = int(sample_rate * frame_ms / 1000)
+        self.margin_db = margin_db
+        self.min_db = min_db
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.noise_floor = None
+        self.pending = np.zeros(0, dtype=np.float32)
+        self.frames_seen = 0
+        self.speech_start = None  # frame index of the open region
+        self.last_speech = None
+        self.speech_frames = 0
+
+    @property
+    def in_speech(self):
+        return self.speech_start is not None
+
+    def frame_levels(self, samples):
+        """dBFS level of each whole frame in `samples`."""
+        n_frames = len(samples) // self.frame
+        frames = samples[:n_frames * self.frame].reshape(n_frames, self.frame)
+        rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+        return 20 * np.log10(np.maximum(rms, 1e-10))
+
+    def process(self, samples):
+        samples = np.asarray(samples, dtype=np.float32)
+        if len(self.pending):
+            samples = np.concatenate([self.pending, samples])
+        n_whole = len(samples) // self.frame * self.frame
+        self.pending = samples[n_whole:].copy()
+
+        closed = []
+        for level in self.frame_levels(samples[:n_whole]):
+            if self.noise_floor is None:
+                self.noise_floor = level
+            is_speech = level > max(self.noise_floor + self.margin_db, self.min_db)
+            if not is_speech:
+                self.noise_floor = min(level, self.noise_floor + NOISE_FLOOR_RISE_DB)
+
+            if is_speech:
+                if self.speech_start is None:
+                    self.speech_start = self.frames_seen
+                    self.speech_frames = 0
+                self.last_speech = self.frames_seen
+                self.speech_frames += 1
+            elif self.speech_start is not None and self.frames_seen - self.last_speech >= self.hangover_frames:
+                region = self._close()
+                if region:
+                    closed.append(region)
+            self.frames_seen += 1
+        return closed
+
+    def flush(self):
+        """Close any open region at end of stream."""
+        region = self._close() if self.speech_start is not None else None
+        return [region] if region else []
+
+    def _close(self):
+        start, end, voiced = self.speech_start, self.last_speech + 1, self.speech_frames
+        self.speech_start = self.last_speech = None
+        self.speech_frames = 0
+        if voiced < self.min_speech_frames:
+            return None
+        return start * self.frame / self.sample_rate, end * self.frame / self.sample_rate
@@ -0,0 +1,192 @@
+import os, json, time, hashlib, threading
+import numpy as np
+from resemblyzer import preprocess_wav
+from resemblyzer.hparams import model_embedding_size
+from speaker_recognition import encoder
+
+VOICEPRINT_DIR = os.getenv("VOICEPRINT_DIR", "voiceprints")
+INDEX_FILE = "index.json"
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _atomic_write_json(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class VoiceprintStore:
+    """
+    On-disk store of enrolled speaker embeddings.
+
+    Layout inside `store_dir`:
+      index.json          - speakers (name, sample hash, source path) and the current matrix file
+      embeddings-<n>.npy  - (num_speakers, d) float32 matrix of L2-normalized embeddings, row i = speakers[i]
+
+    The matrix is memory-mapped read-only. Every change writes a new matrix file and then
+    swaps index.json atomically, so readers always see a consistent (names, matrix) pair.
+    Samples are keyed by content hash and only new or changed samples get embedded.
+    """
+
+    def __init__(self, store_dir=VOICEPRINT_DIR):
+        self.store_dir = store_dir
+        self.index_path = os.path.join(store_dir, INDEX_FILE)
+        self.lock = threading.Lock()
+        os.makedirs(store_dir, exist_ok=True)
+        self.speakers = []
+        self.matrix = np.zeros((0, model_embedding_size), dtype=np.float32)
+        self.generation = 0
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        self.speakers = index.get("speakers", [])
+        self.generation = index.get("generation", 0)
+        matrix_file = index.get("matrix_file")
+        if matrix_file and self.speakers:
+            self.matrix = np.load(os.path.join(self.store_dir, matrix_file), mmap_mode="r")
+        print(f"Loaded {len(self.speakers)} voiceprints from {self.store_dir}")
+
+    def _persist(self, speakers, matrix):
+        """Write a new matrix generation, swap the index, then drop the old matrix file."""
+        old_matrix_file = f"embeddings-{self.generation}.npy"
+        generation = self.generation + 1
+        matrix_file = f"embeddings-{generation}.npy"
+        matrix_path = os.path.join(self.store_dir, matrix_file)
+        with open(matrix_path, "wb") as f:
+            np.save(f, np.asarray(matrix, dtype=np.float32))
+        _atomic_write_json(self.index_path, {
+            "generation": generation,
+            "matrix_file": matrix_file,
+            "speakers": speakers
+        })
+        # Swap in the new snapshot before removing the previous one
+        self.speakers = speakers
+        self.matrix = np.load(matrix_path, mmap_mode="r")
+        self.generation = generation
+        old_matrix_path = os.path.join(self.store_dir, old_matrix_file)
+        if os.path.exists(old_matrix_path):
+            os.remove(old_matrix_path)
+
+    def snapshot(self):
+        """Return (names, matrix) for matching. The pair is never mutated in place."""
+        with self.lock:
+            return [s["name"] for s in self.speakers], self.matrix
+
+    def list(self):
+        with self.lock:
+            return [{"name": s["name"], "sha256": s["sha256"], "enrolled_at": s["enrolled_at"]}
+                    for s in self.speakers]
+
+    def enroll(self, name, sample_path):
+        """
+        Enroll or update `name` from a voice sample.
+        Returns True if the store changed, False if the same sample was already enrolled.
+        """
+        return self.enroll_many([(name, sample_path)]) > 0
+
+    def enroll_many(self, samples):
+        """Enroll a list of (name, sample_path) pairs with a single write. Returns the number changed."""
+        hashed = [(name, path, file_sha256(path)) for name, path in samples]
+        embedded = {}
+        while True:
+            # Embedding is slow, so it happens outside the lock and matching isn't held up.
+            # Identical audio already enrolled under another name reuses its embedding.
+            with self.lock:
+                known = {s["sha256"] for s in self.speakers}
+            for name, path, sample_hash in hashed:
+                if sample_hash not in known and sample_hash not in embedded:
+                    print(f"Embedding voice sample for {name}...")
+                    embedded[sample_hash] = encoder.embed_utterance(preprocess_wav(path)).astype(np.float32)
+            with self.lock:
+                changed = self._merge(hashed, embedded)
+            if changed is not None:
+                return changed
+            # A concurrent enrollment replaced a sample we meant to reuse; embed it after all
+
+    def _merge(self, hashed, embedded):
+        """Apply enrollments under the lock. Returns the number changed, or None if an embedding is missing."""
+        speakers = list(self.speakers)
+        rows = {s["name"]: i for i, s in enumerate(speakers)}
+        by_hash = {s["sha256"]: i for i, s in enumerate(speakers)}
+        updates, appended = {}, []
+
+        for name, path, sample_hash in hashed:
+            if name in rows and speakers[rows[name]]["sha256"] == sample_hash:
+                continue
+            if sample_hash in embedded:
+                embedding = embedded[sample_hash]
+            elif sample_hash in by_hash:
+                embedding = np.array(self.matrix[by_hash[sample_hash]])
+            else:
+                return None
+            entry = {
+                "name": name,
+                "sha256": sample_hash,
+                "source": path,
+                "enrolled_at": time.time()
+            }
+            if name in rows:
+                speakers[rows[name]] = entry
+                updates[rows[name]] = embedding
+            else:
+                rows[name] = len(speakers)
+                speakers.append(entry)
+                appended.append(embedding)
+
+        changed = len(updates) + len(appended)
+        if changed:
+            matrix = np.array(self.matrix, dtype=np.float32)
+            for row, embedding in updates.items():
+                matrix[row] = embedding
+            if appended:
+                matrix = np.vstack([matrix, np.stack(appended)])
+            self._persist(speakers, matrix)
+        return changed
+
+    def delete(self, name):
+        """Remove a speaker and its source sample. Returns False if the name is unknown."""
+        with self.lock:
+            rows = [i for i, s in enumerate(self.speakers) if s["name"] == name]
+            if not rows:
+                return False
+            row = rows[0]
+            source = self.speakers[row].get("source")
+            speakers = self.speakers[:row] + self.speakers[row + 1:]
+            matrix = np.delete(np.asarray(self.matrix), row, axis=0)
+            self._persist(speakers, matrix)
+        # Otherwise sync_directory would re-enroll it on the next start
+        if source and os.path.exists(source):
+            os.remove(source)
+        return True
+
+    def sync_directory(self, voice_sample_dir):
+        """
+        Enroll every .wav in `voice_sample_dir`; unchanged samples are skipped by hash.
+        A sample already enrolled keeps the name it was enrolled under (file names are
+        secure_filename'd, so "Jane Doe" is stored as Jane_Doe.wav); other files are
+        enrolled under their file name.
+        """
+        if not os.path.isdir(voice_sample_dir):
+            return 0
+        with self.lock:
+            names = {os.path.abspath(s["source"]): s["name"] for s in self.speakers if s.get("source")}
+        samples = []
+        for file in sorted(os.listdir(voice_sample_dir)):
+            if file.endswith(".wav"):
+                path = os.path.join(voice_sample_dir, file)
+                samples.append((names.get(os.path.abspath(path), os.path.splitext(file)[0]), path))
+        changed = self.enroll_many(samples)
+        print(f"Voiceprint sync: {changed} new or changed samples embedded")
+        return changed